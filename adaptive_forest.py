@@ -0,0 +1,158 @@
+# adaptive_forest.py
+"""
+Adaptive forest size with out-of-bag convergence.
+
+train_rf always grows n_estimators trees. With ~700 training rows the
+out-of-bag probabilities and the probabilities of the rows we actually
+forecast from settle long before that: their change per increment decays
+like 1/n_trees. grow_until_converged() grows the forest in warm_start
+increments and stops once both changes have stayed within tolerance for a
+few increments, so scoring (which is linear in the number of trees) gets
+cheaper while the probabilities stay within tolerance of the full forest.
+OOB accuracy is recorded too, but hard labels near 0.5 flip too easily to
+be a stopping rule on this data.
+
+Warm-started increments draw the same per-tree seeds as a single fit, so
+an adaptive forest is exactly the first N trees of the full forest.
+
+Benchmark:
+    python adaptive_forest.py BTC ETH SOL
+"""
+import argparse
+import time
+
+import numpy as np
+
+DEFAULT_START = 25
+DEFAULT_STEP = 25
+DEFAULT_OOB_TOL = 0.015
+DEFAULT_PROB_TOL = 0.025
+DEFAULT_PATIENCE = 2
+
+
+def grow_until_converged(model, X, y, X_watch, start=DEFAULT_START, step=DEFAULT_STEP,
+                         oob_tol=DEFAULT_OOB_TOL, prob_tol=DEFAULT_PROB_TOL,
+                         patience=DEFAULT_PATIENCE):
+    """
+    Fit a bootstrapped forest in increments until it has converged.
+
+    Args:
+        model: Unfitted RandomForestClassifier; its n_estimators is the upper bound
+        X, y: Training rows
+        X_watch: Rows whose UP probability must settle (e.g. the latest rows)
+        start: Trees in the first fit
+        step: Trees added per increment
+        oob_tol: Max mean change in out-of-bag UP probabilities between increments
+        prob_tol: Max change in any watched probability between increments
+        patience: Consecutive increments within both tolerances needed to stop
+
+    Returns:
+        Tuple of (fitted model, trace) where trace lists n_trees, oob_score
+        (OOB accuracy) and the probability changes measured after every increment
+    """
+    if not getattr(model, "bootstrap", False):
+        raise ValueError("Adaptive training needs a bootstrapped forest (out-of-bag samples)")
+
+    max_trees = model.n_estimators
+    n_trees = min(start, max_trees)
+    model.set_params(warm_start=True, oob_score=True, n_estimators=n_trees)
+
+    trace = []
+    prev_oob, prev_proba = None, None
+    stable = 0
+
+    while True:
+        model.fit(X, y)
+        # rows without out-of-bag trees yet are NaN
+        oob = model.oob_decision_function_[:, 1]
+        proba = model.predict_proba(X_watch)[:, 1]
+
+        oob_change = float(np.nanmean(np.abs(oob - prev_oob))) if prev_oob is not None else None
+        prob_change = float(np.abs(proba - prev_proba).max()) if prev_proba is not None else None
+        trace.append({
+            "n_trees": n_trees,
+            "oob_score": float(model.oob_score_),
+            "oob_proba_change": oob_change,
+            "max_proba_change": prob_change
+        })
+
+        if oob_change is not None and oob_change <= oob_tol and prob_change <= prob_tol:
+            stable += 1
+        else:
+            stable = 0
+
+        if stable >= patience or n_trees >= max_trees:
+            break
+
+        prev_oob, prev_proba = oob, proba
+        n_trees = min(n_trees + step, max_trees)
+        model.set_params(n_estimators=n_trees)
+
+    # Later warm_start growth (incremental_training) should not pay for OOB scoring
+    model.set_params(warm_start=False, oob_score=False)
+    return model, trace
+
+
+def compare_adaptive(X, y, watch_rows=20, **params):
+    """
+    Full 200-tree train_rf vs adaptive train_rf on one symbol.
+
+    Returns:
+        dict with tree counts, test accuracy, ROC-AUC and per-row FlatForest latency
+    """
+    from train_model import train_rf
+    from tree_inference import get_flat_forest
+
+    results = {}
+    for name, adaptive in [("full", False), ("adaptive", True)]:
+        start = time.perf_counter()
+        model, metrics, _ = train_rf(X, y, adaptive=adaptive, watch_rows=watch_rows, **params)
+        fit_time = time.perf_counter() - start
+
+        flat = get_flat_forest(model)
+        row = X[list(model.feature_names_in_)].iloc[-1:]
+        flat.predict_proba(row)
+        start = time.perf_counter()
+        for _ in range(200):
+            flat.predict_proba(row)
+        latency = (time.perf_counter() - start) / 200
+
+        results[name] = {
+            "n_trees": len(model.estimators_),
+            "accuracy": metrics["accuracy"],
+            "roc_auc": metrics["roc_auc"],
+            "fit_time_s": fit_time,
+            "row_latency_ms": latency * 1e3
+        }
+    return results
+
+
+def main():
+    from fetch_coinlore import fetch_crypto_data
+    from feature_engineering import build_features_raw
+
+    parser = argparse.ArgumentParser(description="Adaptive vs fixed forest size")
+    parser.add_argument("symbols", nargs="+", help="Crypto symbols, e.g. BTC ETH")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("ADAPTIVE FOREST SIZE (OOB convergence)")
+    print("=" * 80)
+    print(f"\n{'Symbol':<8}{'Mode':<10}{'Trees':>7}{'Accuracy':>10}{'ROC-AUC':>10}"
+          f"{'Fit (s)':>9}{'ms/row':>9}")
+
+    for symbol in args.symbols:
+        try:
+            X, y, _ = build_features_raw(fetch_crypto_data(symbol.upper()))
+            results = compare_adaptive(X, y)
+        except Exception as e:
+            print(f"✗ {symbol}: {str(e)[:80]}")
+            continue
+
+        for mode, r in results.items():
+            print(f"{symbol.upper():<8}{mode:<10}{r['n_trees']:>7}{r['accuracy']:>10.4f}"
+                  f"{r['roc_auc']:>10.4f}{r['fit_time_s']:>9.2f}{r['row_latency_ms']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,37 @@
 from flask import Flask, render_template, request, jsonify
-from fetch_coinlore import fetch_crypto_data
-from crypto_stats import get_crypto_stats
-from volatility_pipeline import compute_conditional_volatility
-from feature_engineering import build_features, create_target, add_lag_features
-from train_model import predict_next_n_days_prices, train_rf
-from data_preparation_platform import prepare_platform_data, get_crypto_platforms, get_platform_cryptos, prepare_crypto_data_for_clustering
+from model_registry import ModelRegistry
+from prediction_service import run_prediction, run_whatif, combine_results, MODEL_TYPES, BOTH_MODEL_TYPE
+from whatif import return_grid, DEFAULT_MIN_RETURN, DEFAULT_MAX_RETURN, DEFAULT_STEPS, DEFAULT_CV_SCALES
+from prediction_snapshots import (
+    SnapshotStore,
+    PrecomputeScheduler,
+    SNAPSHOT_MAX_AGE,
+    PRECOMPUTE_INTERVAL
+)
+from data_preparation_platform import get_platform_cryptos, parse_selection
+from clustering_session import ClusteringSessionStore
 from clustering_module import (
-    DTWKMeansClustering,
-    EuclideanKMeansClustering,
-    compute_elbow_curve,
     compute_cluster_visualization_data,
     get_cluster_statistics,
     detect_elbow_point,
-    compute_cluster_metrics
+    compute_cluster_metrics,
+    DTW_SAKOE_CHIBA_RADIUS,
+    DTW_ITAKURA_MAX_SLOPE,
+    DTW_METHODS
 )
 
-import pandas as pd
-import numpy as np
-
 app = Flask(__name__)
 
-# =================================================
-# Helper Functions for Feature Building
-# =================================================
-def build_features_raw(df):
-    """Build features from raw data (no CV processing)"""
-    df = df.copy()
-    df['log_return'] = np.log(df['Close'] / df['Close'].shift(1))
-    df['target'] = (df['log_return'].shift(-1) > 0).astype(int)
-    df['return_lag1'] = df['log_return'].shift(1)
-    df['return_lag2'] = df['log_return'].shift(2)
-    
-    delta = df['Close'].diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-    avg_gain = gain.rolling(14).mean()
-    avg_loss = loss.rolling(14).mean()
-    rs = avg_gain / avg_loss
-    df['rsi_14'] = 100 - (100 / (1 + rs))
-    df['rsi_slope'] = df['rsi_14'].diff()
-    
-    df = df.dropna()
-    feature_cols = ['return_lag1', 'return_lag2', 'rsi_14', 'rsi_slope']
-    X = df[feature_cols]
-    y = df['target']
-    return X, y, df  # Return df too so it has log_return for predictions
+# Fitted models are reused across requests with the same data and settings
+model_registry = ModelRegistry()
+snapshot_store = SnapshotStore()
+
+# cv_df, distance matrix and fitted models shared by the elbow and result pages
+cluster_sessions = ClusteringSessionStore()
+
+# Optional in-process precompute thread (set PRECOMPUTE_INTERVAL in seconds)
+if PRECOMPUTE_INTERVAL > 0:
+    PrecomputeScheduler(snapshot_store, model_registry, interval=PRECOMPUTE_INTERVAL).start()
 
 # =================================================
 # INDEX
@@ -62,7 +49,6 @@ def predict():
     result = None
     ticker = None
     model_type = None
-    model_info = None
 
     if request.method == "POST":
         ticker = request.form.get("ticker", "").upper()
@@ -72,88 +58,28 @@ def predict():
             return render_template("predict.html", error="Please enter a crypto symbol")
 
         try:
-            df = fetch_crypto_data(ticker)
-            
-            # Choose model based on user selection
-            if model_type == "direction":
-                # Use RAW DATA model - Best for direction prediction (57.34% accuracy)
-                X, y, df = build_features_raw(df)
-                model, metrics, _ = train_rf(X, y, return_only_model=False)
-                model_info = {
-                    "type": "Raw Data Model",
-                    "purpose": "Direction Prediction (UP/DOWN)",
-                    "accuracy": f"{metrics['accuracy']:.4f}",
-                    "f1_score": f"{metrics['f1']:.4f}",
-                    "roc_auc": f"{metrics['roc_auc']:.4f}",
-                    "note": "Best for predicting market direction"
-                }
-                
-            else:  # model_type == "price"
-                # Use WITH CV model - Best for price prediction (7.07% MAPE error)
-                df_cv = compute_conditional_volatility(df)
-                X, y = build_features(df_cv)
-                model, metrics, _ = train_rf(X, y, df=df, return_only_model=False)
-                model_info = {
-                    "type": "CV-Processed Model",
-                    "purpose": "Price Prediction Accuracy",
-                    "accuracy": f"{metrics['accuracy']:.4f}",
-                    "mape": f"{metrics['mape']:.2f}%" if metrics.get('mape') else "N/A",
-                    "roc_auc": f"{metrics['roc_auc']:.4f}",
-                    "note": "Best for accurately predicting price movement"
-                }
-                df = df_cv
-            
-            predicted_prices, preds, probs = predict_next_n_days_prices(
-                model, X, df, n=5
-            )
-
-            last_date = pd.to_datetime(df.index[-1])
-            future_dates = [
-                (last_date + pd.Timedelta(days=i + 1)).strftime("%Y-%m-%d")
-                for i in range(5)
-            ]
-
-            dates = pd.to_datetime(df.index).strftime("%Y-%m-%d").tolist()
-            prices = df["Close"].round(2).tolist()
-            if "cv" in df.columns:
-                cv_values = df["cv"].round(4).tolist()
+            if model_type == BOTH_MODEL_TYPE:
+                # One fetch for both models; each half is also kept as its own snapshot
+                snapshots = [
+                    snapshot_store.latest(ticker, t, max_age=SNAPSHOT_MAX_AGE)
+                    for t in MODEL_TYPES
+                ]
+                if all(s is not None for s in snapshots):
+                    result = combine_results(*[s["result"] for s in snapshots])
+                else:
+                    result = run_prediction(ticker, model_type, model_registry)
+                    for model_result in result["models"]:
+                        snapshot_store.save(ticker, model_result["model_type"], model_result)
             else:
-                cv_values = [None] * len(prices)
-            
-            importance = (
-                pd.Series(model.feature_importances_, index=X.columns)
-                .sort_values(ascending=False)
-            )
-            
-            # Get crypto stats
-            crypto_stats = get_crypto_stats(ticker)
-
-            result = {
-                "ticker": ticker,
-                "model_type": model_type,
-                "model_info": model_info,
-                "crypto_stats": crypto_stats,
-                "predictions": [
-                    {
-                        "date": d,
-                        "prediction": "UP" if p == 1 else "DOWN",
-                        "probability": round(float(prob), 4),
-                        "predicted_price": round(float(price), 2),
-                    }
-                    for d, p, prob, price in zip(
-                        future_dates, preds, probs, predicted_prices
-                    )
-                ],
-                "dates": dates,
-                "prices": prices,
-                "cv": cv_values,
-                "feat_items": list(
-                    zip(
-                        importance.index.tolist(),
-                        importance.values.round(4).tolist(),
-                    )
-                ),
-            }
+                # Serve the precomputed snapshot when it is fresh enough
+                snapshot_type = model_type if model_type in ("direction", "pooled") else "price"
+                snapshot = snapshot_store.latest(ticker, snapshot_type, max_age=SNAPSHOT_MAX_AGE)
+                if snapshot is not None:
+                    result = snapshot["result"]
+                    result["model_type"] = model_type
+                else:
+                    result = run_prediction(ticker, model_type, model_registry)
+                    snapshot_store.save(ticker, snapshot_type, result)
 
         except Exception as e:
             return render_template("predict.html", error=str(e), ticker=ticker, model_type=model_type)
@@ -161,6 +87,37 @@ def predict():
     return render_template("predict.html", result=result, ticker=ticker, model_type=model_type)
 
 
+# =================================================
+# API: WHAT-IF PROBABILITY SURFACE
+# =================================================
+@app.route("/api/whatif/<ticker>")
+def api_whatif(ticker):
+    model_type = request.args.get("model_type", "direction")
+    cv_param = request.args.get("cv_scales", "")
+
+    try:
+        returns = return_grid(
+            request.args.get("min", DEFAULT_MIN_RETURN, type=float),
+            request.args.get("max", DEFAULT_MAX_RETURN, type=float),
+            request.args.get("steps", DEFAULT_STEPS, type=int)
+        )
+        cv_scales = [float(s) for s in cv_param.split(",")] if cv_param else DEFAULT_CV_SCALES
+        return jsonify(run_whatif(ticker.upper(), model_type, model_registry, returns, cv_scales))
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# =================================================
+# API: MODEL CACHE STATS
+# =================================================
+@app.route("/api/model-cache")
+def api_model_cache():
+    return jsonify(model_registry.cache.stats())
+
+
 # =================================================
 # CLUSTER ENTRY
 # =================================================
@@ -208,6 +165,14 @@ def cluster_select_method(platform):
         return render_template("cluster_select_method.html", market=platform)
 
 
+def dtw_constraint_args():
+    """DTW window of a /cluster request (?radius=<steps> or ?itakura=<slope>)"""
+    return {
+        "sakoe_chiba_radius": request.args.get("radius", DTW_SAKOE_CHIBA_RADIUS, type=int),
+        "itakura_max_slope": request.args.get("itakura", DTW_ITAKURA_MAX_SLOPE, type=float)
+    }
+
+
 # =================================================
 # CLUSTER: Step 2 - Show Elbow Plot (รับ stocks)
 # =================================================
@@ -216,55 +181,20 @@ def cluster_elbow(platform):
     method = request.args.get("method", "dtw")
     cryptos_param = request.args.get("cryptos", "")
     platforms_param = request.args.get("platforms", "")
+    constraint = dtw_constraint_args()
     
     try:
-        # Handle multiple platforms
-        if platform == 'multi' and platforms_param:
-            platforms = platforms_param.split(',')
-            all_cryptos = []
-            for p in platforms:
-                p_cryptos = get_platform_cryptos(p)
-                for c in p_cryptos:
-                    c['platform'] = p.title()
-                all_cryptos.extend(p_cryptos)
-            
-            cv_df = prepare_crypto_data_for_clustering(
-                all_cryptos,
-                window_days=60,
-                include_platform=True
-            )
-        elif cryptos_param:
-            selected_cryptos = cryptos_param.split(',')
-            all_cryptos = get_platform_cryptos(platform)
-            crypto_objs = [c for c in all_cryptos if c['symbol'] in selected_cryptos]
-            for c in crypto_objs:
-                c['platform'] = platform.title()
-            cv_df = prepare_crypto_data_for_clustering(
-                crypto_objs,
-                window_days=60,
-                include_platform=True
-            )
-        else:
-            cv_df = prepare_platform_data(
-                platform,
-                window_days=60,
-                include_platform=True
-            )
+        platforms, symbols = parse_selection(platform, platforms_param, cryptos_param)
+        session = cluster_sessions.session(platforms, symbols, method=method, **constraint)
 
-        if len(cv_df) < 3:
+        if len(session) < 3:
             return render_template(
                 "cluster_elbow.html",
                 elbow_data={"error": "Not enough cryptos"},
                 market=platform
             )
 
-        X = cv_df.iloc[:, 1:-1].values
-
-        elbow_data = compute_elbow_curve(
-            X,
-            k_range=range(2, min(10, len(X))),
-            method=method
-        )
+        elbow_data = session.elbow(range(2, min(10, len(session))))
 
         elbow_info = detect_elbow_point(
             elbow_data["inertia_values"],
@@ -275,6 +205,8 @@ def cluster_elbow(platform):
         elbow_data["method"] = method
         elbow_data["cryptos"] = cryptos_param
         elbow_data["platforms"] = platforms_param
+        elbow_data["radius"] = session.constraint["sakoe_chiba_radius"]
+        elbow_data["itakura"] = session.constraint["itakura_max_slope"]
 
         return render_template(
             "cluster_elbow.html",
@@ -298,42 +230,15 @@ def cluster_result(platform, k):
     method = request.args.get("method", "dtw")
     cryptos_param = request.args.get("cryptos", "")
     platforms_param = request.args.get("platforms", "")
+    constraint = dtw_constraint_args()
 
     try:
-        # Handle multiple platforms
-        if platform == 'multi' and platforms_param:
-            platforms = platforms_param.split(',')
-            all_cryptos = []
-            for p in platforms:
-                p_cryptos = get_platform_cryptos(p)
-                for c in p_cryptos:
-                    c['platform'] = p.title()
-                all_cryptos.extend(p_cryptos)
-            
-            cv_df = prepare_crypto_data_for_clustering(
-                all_cryptos,
-                window_days=60,
-                include_platform=True
-            )
-        elif cryptos_param:
-            selected_cryptos = cryptos_param.split(',')
-            all_cryptos = get_platform_cryptos(platform)
-            crypto_objs = [c for c in all_cryptos if c['symbol'] in selected_cryptos]
-            for c in crypto_objs:
-                c['platform'] = platform.title()
-            cv_df = prepare_crypto_data_for_clustering(
-                crypto_objs,
-                window_days=60,
-                include_platform=True
-            )
-        else:
-            cv_df = prepare_platform_data(
-                platform,
-                window_days=60,
-                include_platform=True
-            )
+        # Same session as the elbow page: cv_df and the fit for k are reused
+        platforms, symbols = parse_selection(platform, platforms_param, cryptos_param)
+        session = cluster_sessions.session(platforms, symbols, method=method, **constraint)
+        cv_df = session.cv_df
 
-        if len(cv_df) < 3:
+        if len(session) < 3:
             return render_template(
                 "cluster_result.html",
                 result={"error": "Not enough cryptos for clustering"},
@@ -341,19 +246,17 @@ def cluster_result(platform, k):
                 category_filter="all"
             )
 
-        X = cv_df.iloc[:, 1:-1].values
-        crypto_ids = cv_df["crypto_id"].values
+        X = session.X
+        clustering = session.fit(k)
+        labels = clustering.labels_
 
-        clustering = (
-            DTWKMeansClustering(k)
-            if method == "dtw"
-            else EuclideanKMeansClustering(k)
+        metrics = compute_cluster_metrics(
+            X, labels, method=method,
+            dist_matrix=session.distance_matrix() if method in DTW_METHODS else None,
+            **session.constraint
         )
 
-        labels = clustering.fit_predict(X)
-        metrics = compute_cluster_metrics(X, labels, method=method)
-
-        assignments_df = clustering.get_cluster_assignments(crypto_ids)
+        assignments_df = clustering.get_cluster_assignments(session.crypto_ids)
         assignments_df["category"] = cv_df["category"].values
 
         viz_pca = compute_cluster_visualization_data(X, labels, method="pca")
@@ -363,11 +266,14 @@ def cluster_result(platform, k):
             "market": platform,
             "method": method,
             "optimal_k": k,
+            "dtw_constraint": session.constraint,
             "metrics": metrics,
             "assignments": assignments_df.to_dict("records"),
             "cluster_stats": cluster_stats,
             "viz_pca": viz_pca
         }
+        if hasattr(clustering, "dendrogram_data"):
+            result["dendrogram"] = clustering.dendrogram_data(session.crypto_ids)
 
         return render_template(
             "cluster_result.html",
@@ -385,6 +291,63 @@ def cluster_result(platform, k):
         )
 
 
+
+# =================================================
+# API: ASSIGN A NEW COIN TO FITTED CLUSTERS
+# =================================================
+def _cluster_api_session(platform):
+    platforms, symbols = parse_selection(
+        platform, request.args.get("platforms", ""), request.args.get("cryptos", "")
+    )
+    return cluster_sessions.session(
+        platforms, symbols, method=request.args.get("method", "dtw"), **dtw_constraint_args()
+    )
+
+
+@app.route("/api/cluster/assign/<platform>/<int:k>", methods=["POST"])
+def api_cluster_assign(platform, k):
+    symbol = request.args.get("symbol", "").upper()
+
+    try:
+        if not symbol:
+            raise ValueError("Missing symbol")
+        session = _cluster_api_session(platform)
+        if not 2 <= k < len(session):
+            raise ValueError(f"k must be between 2 and {len(session) - 1}")
+        return jsonify(session.add_coin(k, symbol))
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/cluster/refit/<platform>/<int:k>", methods=["POST"])
+def api_cluster_refit(platform, k):
+    try:
+        session = _cluster_api_session(platform)
+        if not 2 <= k < len(session):
+            raise ValueError(f"k must be between 2 and {len(session) - 1}")
+        n_cryptos = session.refit(k)
+
+        clustering = session.fit(k)
+        metrics = compute_cluster_metrics(
+            session.X, clustering.labels_, method=session.method,
+            dist_matrix=session.distance_matrix() if session.method in DTW_METHODS else None,
+            **session.constraint
+        )
+        return jsonify({
+            "n_cryptos": n_cryptos,
+            "k": k,
+            "metrics": metrics,
+            "assignments": clustering.get_cluster_assignments(session.crypto_ids).to_dict("records")
+        })
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # =================================================
 if __name__ == "__main__":
     app.run(debug=False, host='0.0.0.0', port=5000)
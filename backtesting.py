@@ -0,0 +1,242 @@
+# backtesting.py
+"""
+Parallel walk-forward backtesting.
+
+train_rf evaluates on a shuffled train_test_split, which leaks future days
+into training. This module evaluates the same RandomForest setup on
+time-ordered folds instead:
+
+- expanding: train on every day before the test window
+- rolling:   train on a fixed number of days before the test window
+
+The feature matrix of every symbol is built once (panel_features), each
+fold is a slice view of it, and folds of all symbols are trained in
+parallel across a process pool.
+
+Usage:
+    python backtesting.py BTC ETH SOL --mode rolling --train-size 365 --test-size 30
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
+
+from panel_features import build_symbol_tensor
+from model_zoo import make_model as zoo_model
+
+# Same settings as train_rf
+DEFAULT_MODEL_PARAMS = {
+    "n_estimators": 200,
+    "max_depth": 5,
+    "random_state": 42,
+    "class_weight": "balanced"
+}
+
+# Feature matrices of the current process (set once per worker)
+_MATRICES = {}
+
+
+def walk_forward_folds(n_rows, mode="expanding", train_size=365, test_size=30, step=None):
+    """
+    Time-ordered fold boundaries.
+
+    Args:
+        n_rows: Number of rows in the feature matrix
+        mode: "expanding" or "rolling"
+        train_size: Initial (expanding) or fixed (rolling) training length
+        test_size: Rows per test window
+        step: Rows between fold starts (default: test_size)
+
+    Returns:
+        List of (train_start, train_end, test_start, test_end) tuples
+    """
+    if mode not in ("expanding", "rolling"):
+        raise ValueError(f"Unknown walk-forward mode: {mode}")
+
+    step = step or test_size
+    folds = []
+    end = train_size
+    while end + test_size <= n_rows:
+        start = 0 if mode == "expanding" else end - train_size
+        folds.append((start, end, end, end + test_size))
+        end += step
+    return folds
+
+
+def feature_matrices(tensor):
+    """
+    Contiguous (X, y) arrays per symbol from a FeatureTensor.
+
+    Folds are later taken as slices of these arrays, so no copy is made per fold.
+    """
+    matrices = {}
+    for s, symbol in enumerate(tensor.symbols):
+        rows = tensor.mask[s]
+        if not rows.any():
+            continue
+        X = np.ascontiguousarray(tensor.X[s, rows], dtype=np.float32)
+        y = tensor.y[s, rows].astype(int)
+        matrices[symbol] = (X, y)
+    return matrices
+
+
+def _init_worker(matrices):
+    global _MATRICES
+    _MATRICES = matrices
+
+
+def make_model(model_params=None):
+    """RandomForest with train_rf settings, or another model_zoo backend via 'backend'"""
+    params = dict(model_params or {})
+    backend = params.pop("backend", "rf")
+    if backend != "rf":
+        return zoo_model(backend, **params)
+    return zoo_model("rf", **dict(DEFAULT_MODEL_PARAMS, **params))
+
+
+def evaluate_fold(symbol, fold_id, bounds, model_params=None, matrices=None, feature_idx=None):
+    """
+    Train on one fold's training slice and score its test slice.
+
+    Args:
+        feature_idx: Optional column indices to train on (feature subset)
+
+    Returns:
+        dict of fold metrics
+    """
+    X, y = (matrices or _MATRICES)[symbol]
+    if feature_idx is not None:
+        X = X[:, feature_idx]
+    train_start, train_end, test_start, test_end = bounds
+    X_train, y_train = X[train_start:train_end], y[train_start:train_end]
+    X_test, y_test = X[test_start:test_end], y[test_start:test_end]
+
+    model = make_model(model_params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+
+    y_pred = model.predict(X_test)
+    y_proba = model.predict_proba(X_test)[:, 1]
+
+    try:
+        roc_auc = roc_auc_score(y_test, y_proba)
+    except ValueError:
+        # only one class in this test window
+        roc_auc = None
+
+    return {
+        "symbol": symbol,
+        "fold": fold_id,
+        "train_start": train_start,
+        "train_end": train_end,
+        "test_start": test_start,
+        "test_end": test_end,
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred, zero_division=0),
+        "recall": recall_score(y_test, y_pred, zero_division=0),
+        "f1": f1_score(y_test, y_pred, zero_division=0),
+        "roc_auc": roc_auc,
+        "n_correct": int((y_pred == y_test).sum()),
+        "n_test": len(y_test),
+        "fit_time": fit_time
+    }
+
+
+def aggregate_folds(fold_df):
+    """Per-symbol metrics averaged over folds, plus pooled accuracy"""
+    grouped = fold_df.groupby("symbol")
+    summary = grouped[["accuracy", "precision", "recall", "f1", "roc_auc", "fit_time"]].mean()
+    summary["pooled_accuracy"] = grouped["n_correct"].sum() / grouped["n_test"].sum()
+    summary["n_folds"] = grouped.size()
+    return summary.reset_index()
+
+
+def run_backtest(matrices, mode="expanding", train_size=365, test_size=30, step=None,
+                 model_params=None, max_workers=None):
+    """
+    Walk-forward backtest of every symbol in parallel.
+
+    Args:
+        matrices: {symbol: (X, y)} as returned by feature_matrices
+        mode, train_size, test_size, step: See walk_forward_folds
+        model_params: Overrides for the RandomForest settings ('backend' picks another model)
+        max_workers: Process pool size (1 runs in-process)
+
+    Returns:
+        Tuple of (fold_df, summary_df)
+    """
+    tasks = []
+    for symbol, (X, _) in matrices.items():
+        for fold_id, bounds in enumerate(
+            walk_forward_folds(len(X), mode, train_size, test_size, step)
+        ):
+            tasks.append((symbol, fold_id, bounds))
+
+    if not tasks:
+        raise ValueError("Not enough rows for a single walk-forward fold")
+
+    if max_workers == 1:
+        results = [evaluate_fold(*t, model_params=model_params, matrices=matrices) for t in tasks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(matrices,)
+        ) as pool:
+            futures = [pool.submit(evaluate_fold, *t, model_params=model_params) for t in tasks]
+            results = [f.result() for f in futures]
+
+    fold_df = pd.DataFrame(results)
+    return fold_df, aggregate_folds(fold_df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest")
+    parser.add_argument("symbols", nargs="+", help="Crypto symbols, e.g. BTC ETH")
+    parser.add_argument("--approach", choices=["raw", "cv"], default="raw")
+    parser.add_argument("--mode", choices=["expanding", "rolling"], default="expanding")
+    parser.add_argument("--train-size", type=int, default=365)
+    parser.add_argument("--test-size", type=int, default=30)
+    parser.add_argument("--step", type=int, default=None)
+    parser.add_argument("--backend", default="rf", help="Model backend (see model_zoo.py)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default=None, help="Write fold results to this CSV/JSON file")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"WALK-FORWARD BACKTEST ({args.mode}, {args.approach})")
+    print("=" * 80)
+
+    tensor = build_symbol_tensor([s.upper() for s in args.symbols], approach=args.approach)
+    matrices = feature_matrices(tensor)
+
+    start = time.perf_counter()
+    fold_df, summary = run_backtest(
+        matrices,
+        mode=args.mode,
+        train_size=args.train_size,
+        test_size=args.test_size,
+        step=args.step,
+        model_params={"backend": args.backend},
+        max_workers=args.workers
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"\n✓ {len(fold_df)} folds over {len(matrices)} symbols in {elapsed:.1f}s\n")
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    if args.output:
+        if args.output.endswith(".json"):
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(fold_df.to_dict("records"), f, indent=2, default=str)
+        else:
+            fold_df.to_csv(args.output, index=False)
+        print(f"\n✓ Fold results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
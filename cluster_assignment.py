@@ -0,0 +1,149 @@
+# cluster_assignment.py
+"""
+Incremental cluster assignment of coins added after a clustering fit.
+
+A ClusterAssigner keeps what a fitted clustering needs to place one more
+coin without refitting:
+
+- the cluster centers (k-means centroids or DBA barycenters, k-medoids
+  medoids, hierarchical cluster means / medoids) and their distance metric
+- the window normalization (window_days, per-window z-score as in
+  prepare_crypto_window)
+- per-cluster radii (95th percentile of the members' distance to their center)
+
+A new coin costs one CV window and k distances. Coins that land outside
+their cluster's radius count as outliers; once too many coins were added or
+too many of them are outliers, needs_refit tells the caller to recluster.
+"""
+import os
+
+import joblib
+import numpy as np
+from tslearn.metrics import cdist_dtw
+
+from clustering_module import medoid_indices
+from dtw_pruning import metric_params
+from model_registry import MODEL_STORE_DIR
+
+CLUSTER_ASSIGNER_DIR = os.environ.get("CLUSTER_ASSIGNER_DIR", os.path.join(MODEL_STORE_DIR, "clusters"))
+
+# Refit once this share of the added coins are outliers ...
+CLUSTER_REFIT_OUTLIER_SHARE = float(os.environ.get("CLUSTER_REFIT_OUTLIER_SHARE", "0.2"))
+# ... or the added coins exceed this share of the fitted ones
+CLUSTER_REFIT_GROWTH = float(os.environ.get("CLUSTER_REFIT_GROWTH", "0.25"))
+
+# Member distance quantile used as a cluster's radius
+RADIUS_QUANTILE = 0.95
+
+# Methods whose centers live in Euclidean space
+EUCLIDEAN_METHODS = ("euclidean", "hierarchical")
+
+
+def center_distances(windows, centers, metric, constraint=None):
+    """(n, k) distances of normalized windows to every center (one pass)"""
+    windows = np.atleast_2d(np.asarray(windows, dtype=float))
+    if metric == "euclidean":
+        return np.linalg.norm(windows[:, None, :] - centers[None, :, :], axis=2)
+    return cdist_dtw(windows[:, :, None], centers[:, :, None], **(metric_params(**(constraint or {})) or {}))
+
+
+class ClusterAssigner:
+    """
+    Nearest-cluster assignment for a fitted clustering.
+
+    Args:
+        centers: (k, window_days) cluster centers
+        metric: "euclidean" or "dtw"
+        member_distances: Distance of every fitted coin to its center
+        labels: Fitted labels (same order as member_distances)
+        crypto_ids: Fitted coins
+        window_days: CV window length of the fit
+        constraint: DTW window (sakoe_chiba_radius / itakura_max_slope)
+    """
+
+    def __init__(self, centers, metric, member_distances, labels, crypto_ids, window_days=60, constraint=None):
+        self.centers = np.asarray(centers, dtype=float)
+        self.metric = metric
+        self.labels = np.asarray(labels)
+        self.crypto_ids = [str(c) for c in crypto_ids]
+        self.window_days = window_days
+        self.normalization = "zscore"
+        self.constraint = dict(constraint or {})
+        self.radii = self._radii(np.asarray(member_distances, dtype=float))
+        self.added = []     # assign() results of the coins added since the fit
+        self.added_windows = {}
+
+    @classmethod
+    def from_model(cls, model, X, crypto_ids, method, window_days=60, constraint=None, dist_matrix=None):
+        """ClusterAssigner of a fitted clustering model of X"""
+        labels = np.asarray(model.labels_)
+        metric = "euclidean" if method in EUCLIDEAN_METHODS else "dtw"
+
+        centers = getattr(model, "cluster_centers_", None)
+        if centers is None and metric == "euclidean":
+            centers = np.array([X[labels == c].mean(axis=0) for c in range(labels.max() + 1)])
+        elif centers is None:
+            medoids = medoid_indices(dist_matrix, labels)
+            centers = X[[medoids[c] for c in range(labels.max() + 1)]]
+
+        centers = np.asarray(centers, dtype=float)
+        member_distances = center_distances(X, centers, metric, constraint)[np.arange(len(X)), labels]
+        return cls(centers, metric, member_distances, labels, crypto_ids, window_days, constraint)
+
+    def _radii(self, member_distances):
+        overall = np.quantile(member_distances, RADIUS_QUANTILE)
+        radii = []
+        for c in range(len(self.centers)):
+            within = member_distances[self.labels == c]
+            radii.append(np.quantile(within, RADIUS_QUANTILE) if len(within) >= 3 else overall)
+        return np.array(radii)
+
+    def assign(self, symbol, window):
+        """
+        Assign one normalized CV window to its nearest cluster.
+
+        Returns:
+            Dict with cluster, distance, radius, within_radius, distances
+            and the cluster's fitted members
+        """
+        if len(window) != self.window_days:
+            raise ValueError(f"Expected a {self.window_days}-day window, got {len(window)}")
+
+        distances = center_distances(window, self.centers, self.metric, self.constraint)[0]
+        cluster = int(np.argmin(distances))
+        result = {
+            "symbol": symbol,
+            "cluster": cluster,
+            "distance": float(distances[cluster]),
+            "radius": float(self.radii[cluster]),
+            "within_radius": bool(distances[cluster] <= self.radii[cluster]),
+            "distances": distances.tolist(),
+            "members": [c for c, l in zip(self.crypto_ids, self.labels) if l == cluster]
+        }
+        self.added = [a for a in self.added if a["symbol"] != symbol] + [result]
+        self.added_windows[symbol] = np.asarray(window, dtype=float)
+        return result
+
+    def quality(self):
+        """Assignment quality of the added coins and the refit decision"""
+        n_added = len(self.added)
+        outliers = sum(not a["within_radius"] for a in self.added)
+        outlier_share = outliers / n_added if n_added else 0.0
+        growth = n_added / len(self.crypto_ids)
+        return {
+            "fitted": len(self.crypto_ids),
+            "added": n_added,
+            "outliers": outliers,
+            "outlier_share": outlier_share,
+            "growth": growth,
+            "needs_refit": outlier_share > CLUSTER_REFIT_OUTLIER_SHARE or growth > CLUSTER_REFIT_GROWTH
+        }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(self, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path) if os.path.exists(path) else None
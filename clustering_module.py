@@ -1,22 +1,138 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
+from scipy.cluster.hierarchy import cut_tree, dendrogram, linkage
+from scipy.spatial.distance import squareform
 from sklearn.cluster import KMeans
 from tslearn.clustering import TimeSeriesKMeans
 from sklearn.decomposition import PCA
 from sklearn.manifold import TSNE
 from sklearn.metrics import silhouette_score, davies_bouldin_score
 from tslearn.metrics import cdist_dtw
+from dtw_pruning import PrunedDTWKMeans, assign_pruned, metric_params
 import warnings
 warnings.filterwarnings("ignore")
 
+# Parallel jobs for DTW distance matrices (-1: all cores)
+DTW_N_JOBS = int(os.environ.get("DTW_N_JOBS", "-1"))
+
+# Default global DTW constraint: Sakoe-Chiba band or Itakura parallelogram
+# (both unset: unconstrained)
+DTW_SAKOE_CHIBA_RADIUS = (
+    int(os.environ["DTW_SAKOE_CHIBA_RADIUS"]) if os.environ.get("DTW_SAKOE_CHIBA_RADIUS") else None
+)
+DTW_ITAKURA_MAX_SLOPE = (
+    float(os.environ["DTW_ITAKURA_MAX_SLOPE"]) if os.environ.get("DTW_ITAKURA_MAX_SLOPE") else None
+)
+
+# DTW k-means assignment with LB_Kim / LB_Keogh pruning (0: tslearn's brute-force assignment)
+DTW_PRUNED_ASSIGNMENT = os.environ.get("DTW_PRUNED_ASSIGNMENT", "1") == "1"
+
+# Elbow curve: process pool size (1: in-process), seeding k from the k-1 fit,
+# and stopping once the detected elbow held for this many more k (0: off)
+ELBOW_MAX_WORKERS = int(os.environ.get("ELBOW_MAX_WORKERS", "1"))
+ELBOW_WARM_START = os.environ.get("ELBOW_WARM_START", "0") == "1"
+ELBOW_EARLY_STOP = int(os.environ.get("ELBOW_EARLY_STOP", "0"))
+
+# Linkage of the DTW hierarchical method ("average" or "complete")
+HIERARCHICAL_DTW_LINKAGE = os.environ.get("HIERARCHICAL_DTW_LINKAGE", "average")
+
+# Clustering methods that work on DTW distances (precomputed matrix, DTW silhouette)
+DTW_METHODS = ("dtw", "kmedoids", "hierarchical_dtw")
+
+# Most recent DTW matrices, keyed by (data hash, constraint)
+_DTW_MATRICES = OrderedDict()
+_DTW_MATRICES_LIMIT = 8
+_DTW_LOCK = threading.Lock()
+
+# Most recent linkage trees, keyed by (data hash, linkage, distances hash)
+_LINKAGES = OrderedDict()
+_LINKAGES_LIMIT = 16
+
+
+# =================================================
+# DTW DISTANCE MATRIX (computed once per cv_df)
+# =================================================
+def compute_dtw_matrix(X, sakoe_chiba_radius=DTW_SAKOE_CHIBA_RADIUS, n_jobs=DTW_N_JOBS,
+                       itakura_max_slope=DTW_ITAKURA_MAX_SLOPE):
+    """
+    Pairwise DTW distances between the rows of X.
+
+    Only the upper triangle is computed (in parallel) and the result is
+    cached per (data, constraint), so silhouette scoring, medoid seeding and
+    the elbow curve of the same cv_df share one computation.
+
+    Args:
+        X: (n_series, n_timestamps) array
+        sakoe_chiba_radius: Sakoe-Chiba band width, None for no band
+        n_jobs: Parallel jobs passed to cdist_dtw
+        itakura_max_slope: Itakura parallelogram slope, None for none
+
+    Returns:
+        (n_series, n_series) read-only array
+    """
+    X = np.ascontiguousarray(X, dtype=float)
+    constraint = metric_params(sakoe_chiba_radius, itakura_max_slope) or {}
+    key = (hashlib.sha1(X.tobytes()).hexdigest(), X.shape, tuple(sorted(constraint.items())))
+
+    with _DTW_LOCK:
+        if key in _DTW_MATRICES:
+            _DTW_MATRICES.move_to_end(key)
+            return _DTW_MATRICES[key]
+
+    dist_matrix = cdist_dtw(X.reshape(X.shape[0], X.shape[1], 1), n_jobs=n_jobs, **constraint)
+    dist_matrix.flags.writeable = False
+
+    with _DTW_LOCK:
+        _DTW_MATRICES[key] = dist_matrix
+        while len(_DTW_MATRICES) > _DTW_MATRICES_LIMIT:
+            _DTW_MATRICES.popitem(last=False)
+    return dist_matrix
+
+
+def medoid_indices(dist_matrix, labels):
+    """Row index of each cluster's medoid (smallest total distance to its members)"""
+    medoids = {}
+    for c in np.unique(labels):
+        members = np.flatnonzero(labels == c)
+        within = dist_matrix[np.ix_(members, members)].sum(axis=1)
+        medoids[int(c)] = int(members[np.argmin(within)])
+    return medoids
+
+
+def medoid_seeds(dist_matrix, k):
+    """
+    k well spread initial medoids from a distance matrix (PAM BUILD step).
+
+    The first seed is the most central series; each next seed is the one
+    that most reduces the total distance of every series to its nearest seed.
+    """
+    seeds = [int(np.argmin(dist_matrix.sum(axis=1)))]
+    nearest = dist_matrix[seeds[0]].copy()
+
+    for _ in range(1, k):
+        gain = np.maximum(nearest[None, :] - dist_matrix, 0).sum(axis=1)
+        gain[seeds] = -1
+        seeds.append(int(np.argmax(gain)))
+        nearest = np.minimum(nearest, dist_matrix[seeds[-1]])
+
+    return seeds
+
 
 # =================================================
 # EUCLIDEAN KMEANS
 # =================================================
 class EuclideanKMeansClustering:
-    def __init__(self, n_clusters=3, random_state=42):
+    def __init__(self, n_clusters=3, random_state=42, init=None):
         self.n_clusters = n_clusters
         self.random_state = random_state
+        self.init = init
         self.labels_ = None
         self.inertia_ = None
 
@@ -24,12 +140,19 @@ class EuclideanKMeansClustering:
         model = KMeans(
             n_clusters=self.n_clusters,
             random_state=self.random_state,
-            n_init=10
+            n_init=10 if self.init is None else 1,
+            init="k-means++" if self.init is None else self.init
         )
         self.labels_ = model.fit_predict(X)
         self.inertia_ = float(model.inertia_)
+        self.cluster_centers_ = model.cluster_centers_
         return self.labels_
 
+    def next_init(self, X, dist_matrix=None):
+        """Centers for k+1: these centers plus the worst-fitted series"""
+        residual = ((X - self.cluster_centers_[self.labels_]) ** 2).sum(axis=1)
+        return np.vstack([self.cluster_centers_, X[np.argmax(residual)]])
+
     def get_cluster_assignments(self, crypto_ids):
         return pd.DataFrame({
             "crypto_id": crypto_ids,
@@ -41,24 +164,77 @@ class EuclideanKMeansClustering:
 # DTW KMEANS (ปรับให้เร็วขึ้น)
 # =================================================
 class DTWKMeansClustering:
-    def __init__(self, n_clusters=3, random_state=42):
+    """
+    DTW k-means (DBA barycenters).
+
+    With a precomputed DTW matrix (compute_dtw_matrix) the centroids start
+    from medoid_seeds, which replaces the 3 random k-means++ restarts with
+    one deterministic, well spread start.
+
+    With pruning=True the k-means loop is PrunedDTWKMeans, whose assignment
+    step skips most full DTW evaluations via lower bounds (same labels as a
+    brute-force assignment); prune_stats_ then counts the skipped pairs.
+
+    sakoe_chiba_radius / itakura_max_slope constrain the warping window of
+    both the assignment and the barycenter averaging: O(T * window) instead
+    of O(T^2) per pair, and no pathological warps between unrelated days.
+    """
+
+    def __init__(self, n_clusters=3, random_state=42, dist_matrix=None, pruning=DTW_PRUNED_ASSIGNMENT,
+                 sakoe_chiba_radius=DTW_SAKOE_CHIBA_RADIUS, itakura_max_slope=DTW_ITAKURA_MAX_SLOPE,
+                 init=None):
         self.n_clusters = n_clusters
         self.random_state = random_state
+        self.dist_matrix = dist_matrix
+        self.pruning = pruning
+        self.init = init
+        self.sakoe_chiba_radius = sakoe_chiba_radius
+        self.itakura_max_slope = itakura_max_slope
+        self.metric_params = metric_params(sakoe_chiba_radius, itakura_max_slope)
         self.labels_ = None
         self.inertia_ = None
+        self.prune_stats_ = None
 
     def fit_predict(self, X):
         X_reshaped = X.reshape(X.shape[0], X.shape[1], 1)
 
+        if self.init is not None:
+            init = np.asarray(self.init, dtype=float).reshape(self.n_clusters, X.shape[1], 1)
+            n_init = 1
+        elif self.dist_matrix is not None:
+            init = X_reshaped[medoid_seeds(self.dist_matrix, self.n_clusters)]
+            n_init = 1
+        else:
+            init, n_init = "k-means++", 3
+
+        if self.pruning:
+            model = PrunedDTWKMeans(
+                n_clusters=self.n_clusters,
+                random_state=self.random_state,
+                n_init=n_init,
+                max_iter=50,
+                init=None if isinstance(init, str) else init[:, :, 0],
+                sakoe_chiba_radius=self.sakoe_chiba_radius,
+                itakura_max_slope=self.itakura_max_slope
+            )
+            self.labels_ = model.fit_predict(X)
+            self.inertia_ = model.inertia_
+            self.cluster_centers_ = model.cluster_centers_
+            self.prune_stats_ = model.prune_stats_
+            return self.labels_
+
         model = TimeSeriesKMeans(
             n_clusters=self.n_clusters,
             metric="dtw",
+            metric_params=self.metric_params,
             random_state=self.random_state,
-            n_init=3,
-            max_iter=50
+            n_init=n_init,
+            max_iter=50,
+            init=init
         )
 
         self.labels_ = model.fit_predict(X_reshaped)
+        self.cluster_centers_ = model.cluster_centers_[:, :, 0]
 
         self.inertia_ = (
             float(model.inertia_)
@@ -68,6 +244,13 @@ class DTWKMeansClustering:
 
         return self.labels_
 
+    def next_init(self, X, dist_matrix=None):
+        """Centroids for k+1: these centroids plus the worst-fitted series"""
+        _, distances, _ = assign_pruned(
+            X, self.cluster_centers_, self.sakoe_chiba_radius, itakura_max_slope=self.itakura_max_slope
+        )
+        return np.vstack([self.cluster_centers_, X[np.argmax(distances)]])
+
     def get_cluster_assignments(self, crypto_ids):
         return pd.DataFrame({
             "crypto_id": crypto_ids,
@@ -76,24 +259,387 @@ class DTWKMeansClustering:
 
 
 # =================================================
-# ELBOW
+# DTW K-MEDOIDS (precomputed DTW matrix, no barycenters)
+# =================================================
+class DTWKMedoidsClustering:
+    """
+    k-medoids on a precomputed DTW matrix.
+
+    Every cluster center is one of the series, so a fit is pure lookups in
+    the distance matrix: no DTW barycenter averaging, and every k and every
+    restart reuses the one compute_dtw_matrix computation.
+
+    Args:
+        n_clusters: Number of clusters
+        random_state: Seed of the random restarts
+        dist_matrix: Precomputed DTW matrix of X (computed on fit if None)
+        algorithm: "pam" (BUILD + best-improvement SWAP) or "alternate"
+            (assign / re-center until stable, faster but more local)
+        n_init: Starts; the first is the PAM BUILD seeds, the rest random
+        max_iter: Maximum swap or re-center iterations per start
+        init: Row indices of the first start's medoids (instead of BUILD)
+
+    Attributes:
+        labels_, medoid_indices_ (row of each cluster's medoid),
+        cluster_centers_ (medoid series), cost_ (sum of DTW distances to
+        the medoids, the PAM objective) and inertia_ (mean squared DTW
+        distance, the same scale as DTWKMeansClustering)
+    """
+
+    def __init__(self, n_clusters=3, random_state=42, dist_matrix=None, algorithm="pam",
+                 n_init=1, max_iter=100, sakoe_chiba_radius=DTW_SAKOE_CHIBA_RADIUS,
+                 itakura_max_slope=DTW_ITAKURA_MAX_SLOPE, init=None):
+        if algorithm not in ("pam", "alternate"):
+            raise ValueError(f"Unknown k-medoids algorithm: {algorithm}")
+        self.n_clusters = n_clusters
+        self.random_state = random_state
+        self.dist_matrix = dist_matrix
+        self.algorithm = algorithm
+        self.n_init = n_init
+        self.max_iter = max_iter
+        self.sakoe_chiba_radius = sakoe_chiba_radius
+        self.itakura_max_slope = itakura_max_slope
+        self.init = init
+        self.labels_ = None
+        self.inertia_ = None
+
+    @staticmethod
+    def _nearest_two(D, medoids):
+        to_medoids = D[medoids]                      # (k, n)
+        order = np.argsort(to_medoids, axis=0)
+        nearest = order[0]
+        d1 = to_medoids[nearest, np.arange(D.shape[0])]
+        d2 = to_medoids[order[1], np.arange(D.shape[0])] if len(medoids) > 1 else np.full_like(d1, np.inf)
+        return nearest, d1, d2
+
+    def _swap(self, D, medoids):
+        """Best-improvement PAM SWAP, one (medoid, candidate) pair per iteration"""
+        medoids = list(medoids)
+        for _ in range(self.max_iter):
+            nearest, d1, d2 = self._nearest_two(D, medoids)
+            # cost change of every candidate h except for points losing medoid i
+            gain_others = np.minimum(D - d1[None, :], 0)               # (n, n)
+            best_delta, best_swap = -1e-12, None
+            for i in range(len(medoids)):
+                owned = nearest == i
+                delta = (
+                    gain_others[:, ~owned].sum(axis=1)
+                    + (np.minimum(D[:, owned], d2[owned][None, :]) - d1[owned][None, :]).sum(axis=1)
+                )
+                delta[medoids] = np.inf
+                h = int(np.argmin(delta))
+                if delta[h] < best_delta:
+                    best_delta, best_swap = delta[h], (i, h)
+            if best_swap is None:
+                break
+            medoids[best_swap[0]] = best_swap[1]
+        return medoids
+
+    def _alternate(self, D, medoids):
+        medoids = list(medoids)
+        for _ in range(self.max_iter):
+            labels = np.argmin(D[medoids], axis=0)
+            centers = medoid_indices(D, labels)
+            updated = [centers.get(c, medoids[c]) for c in range(len(medoids))]
+            if updated == medoids:
+                break
+            medoids = updated
+        return medoids
+
+    def fit_predict(self, X):
+        D = self.dist_matrix
+        if D is None:
+            D = compute_dtw_matrix(
+                X, sakoe_chiba_radius=self.sakoe_chiba_radius, itakura_max_slope=self.itakura_max_slope
+            )
+        D = np.asarray(D, dtype=float)
+        rng = np.random.RandomState(self.random_state)
+        improve = self._swap if self.algorithm == "pam" else self._alternate
+
+        best = None
+        for run in range(self.n_init):
+            if run == 0:
+                start = list(self.init) if self.init is not None else medoid_seeds(D, self.n_clusters)
+            else:
+                start = list(rng.choice(len(D), self.n_clusters, replace=False))
+            medoids = improve(D, start)
+            cost = float(D[medoids].min(axis=0).sum())
+            if best is None or cost < best[0]:
+                best = (cost, medoids)
+
+        self.cost_, medoids = best
+        self.medoid_indices_ = np.array(medoids)
+        self.labels_ = np.argmin(D[medoids], axis=0)
+        self.cluster_centers_ = np.asarray(X)[self.medoid_indices_]
+        self.inertia_ = float(np.mean(D[medoids].min(axis=0) ** 2))
+        return self.labels_
+
+    def next_init(self, X, dist_matrix=None):
+        """Medoids for k+1: these medoids plus the series farthest from its medoid"""
+        D = dist_matrix if dist_matrix is not None else self.dist_matrix
+        farthest = int(np.argmax(D[self.medoid_indices_].min(axis=0)))
+        return [int(m) for m in self.medoid_indices_] + [farthest]
+
+    def get_cluster_assignments(self, crypto_ids):
+        return pd.DataFrame({
+            "crypto_id": crypto_ids,
+            "cluster": self.labels_
+        })
+
+
 # =================================================
-def compute_elbow_curve(X, k_range, method="dtw"):
-    inertia = []
+# HIERARCHICAL (one linkage tree, every k)
+# =================================================
+def compute_linkage(X, linkage_method="ward", dist_matrix=None):
+    """
+    Linkage tree of the rows of X, cached per (data, linkage, distances).
+
+    Args:
+        X: (n_series, n_timestamps) array
+        linkage_method: "ward" (Euclidean on X) or "average" / "complete"
+            (on dist_matrix when given, else Euclidean)
+        dist_matrix: Precomputed (DTW) distance matrix of X
+
+    Returns:
+        scipy linkage matrix (n_series - 1, 4)
+    """
+    if linkage_method == "ward" and dist_matrix is not None:
+        raise ValueError("Ward linkage needs Euclidean distances, not a precomputed matrix")
+
+    X = np.ascontiguousarray(X, dtype=float)
+    key = (
+        hashlib.sha1(X.tobytes()).hexdigest(), X.shape, linkage_method,
+        None if dist_matrix is None else hashlib.sha1(np.ascontiguousarray(dist_matrix).tobytes()).hexdigest()
+    )
+    with _DTW_LOCK:
+        if key in _LINKAGES:
+            _LINKAGES.move_to_end(key)
+            return _LINKAGES[key]
+
+    if dist_matrix is None:
+        Z = linkage(X, method=linkage_method, metric="euclidean")
+    else:
+        D = np.asarray(dist_matrix, dtype=float)
+        Z = linkage(squareform((D + D.T) / 2, checks=False), method=linkage_method)
+    Z.flags.writeable = False
+
+    with _DTW_LOCK:
+        _LINKAGES[key] = Z
+        while len(_LINKAGES) > _LINKAGES_LIMIT:
+            _LINKAGES.popitem(last=False)
+    return Z
+
+
+def cut_linkage(Z, k):
+    """
+    0-based labels of the k-cluster cut of a linkage tree.
 
-    for k in k_range:
-        if method == "dtw":
-            model = DTWKMeansClustering(k)
+    cut_tree undoes exactly n - k merges, so tied merge heights still give k
+    clusters (fcluster's maxclust cuts by height and can return fewer).
+    """
+    return cut_tree(Z, n_clusters=k).ravel()
+
+
+class HierarchicalClustering:
+    """
+    Agglomerative clustering: Ward on Euclidean windows, or average /
+    complete linkage on the DTW matrix.
+
+    The linkage tree is built once per cv_df (compute_linkage cache), so
+    every k of the elbow curve and of the result page is only a cut.
+
+    Args:
+        n_clusters: Number of clusters of the cut
+        linkage_method: "ward", "average" or "complete"
+        metric: "euclidean" or "dtw"
+        dist_matrix: Precomputed DTW matrix (metric="dtw"; computed if None)
+
+    Attributes:
+        labels_, linkage_, inertia_ (Euclidean: within-cluster sum of
+        squares as KMeans; DTW: mean squared DTW distance to the cluster
+        medoid as DTWKMedoidsClustering)
+    """
+
+    def __init__(self, n_clusters=3, linkage_method="ward", metric="euclidean", dist_matrix=None,
+                 sakoe_chiba_radius=DTW_SAKOE_CHIBA_RADIUS, itakura_max_slope=DTW_ITAKURA_MAX_SLOPE):
+        if metric == "dtw" and linkage_method == "ward":
+            raise ValueError("Ward linkage is only available with the Euclidean metric")
+        self.n_clusters = n_clusters
+        self.linkage_method = linkage_method
+        self.metric = metric
+        self.dist_matrix = dist_matrix
+        self.sakoe_chiba_radius = sakoe_chiba_radius
+        self.itakura_max_slope = itakura_max_slope
+        self.labels_ = None
+        self.inertia_ = None
+
+    def fit_predict(self, X):
+        D = None
+        if self.metric == "dtw":
+            D = self.dist_matrix
+            if D is None:
+                D = compute_dtw_matrix(
+                    X, sakoe_chiba_radius=self.sakoe_chiba_radius, itakura_max_slope=self.itakura_max_slope
+                )
+
+        self.linkage_ = compute_linkage(X, self.linkage_method, dist_matrix=D)
+        self.labels_ = cut_linkage(self.linkage_, self.n_clusters)
+
+        if D is None:
+            self.inertia_ = float(sum(
+                ((X[self.labels_ == c] - X[self.labels_ == c].mean(axis=0)) ** 2).sum()
+                for c in np.unique(self.labels_)
+            ))
         else:
-            model = EuclideanKMeansClustering(k)
+            medoids = medoid_indices(D, self.labels_)
+            to_medoid = D[np.arange(len(X)), [medoids[int(c)] for c in self.labels_]]
+            self.inertia_ = float(np.mean(to_medoid ** 2))
+        return self.labels_
 
-        model.fit_predict(X)
+    def dendrogram_data(self, crypto_ids):
+        """
+        Dendrogram segments of the linkage tree (scipy layout).
+
+        Returns:
+            Dict with icoord / dcoord (one 4-point polyline per merge),
+            leaves (crypto_ids in leaf order) and cut_height (the height at
+            which the tree splits into n_clusters)
+        """
+        tree = dendrogram(self.linkage_, no_plot=True, labels=[str(c) for c in crypto_ids])
+        heights = self.linkage_[:, 2]
+        k = self.n_clusters
+        cut_height = float((heights[-k] + heights[-k + 1]) / 2) if 1 < k <= len(heights) else None
+        return {
+            "icoord": tree["icoord"],
+            "dcoord": tree["dcoord"],
+            "leaves": tree["ivl"],
+            "cut_height": cut_height
+        }
+
+    def get_cluster_assignments(self, crypto_ids):
+        return pd.DataFrame({
+            "crypto_id": crypto_ids,
+            "cluster": self.labels_
+        })
+
+
+# =================================================
+# ELBOW
+# =================================================
+def make_clustering(k, method="dtw", dist_matrix=None,
+                    sakoe_chiba_radius=DTW_SAKOE_CHIBA_RADIUS, itakura_max_slope=DTW_ITAKURA_MAX_SLOPE,
+                    init=None):
+    if method == "hierarchical":
+        return HierarchicalClustering(k, linkage_method="ward")
+    if method == "hierarchical_dtw":
+        return HierarchicalClustering(
+            k, linkage_method=HIERARCHICAL_DTW_LINKAGE, metric="dtw", dist_matrix=dist_matrix,
+            sakoe_chiba_radius=sakoe_chiba_radius, itakura_max_slope=itakura_max_slope
+        )
+    if method == "kmedoids":
+        return DTWKMedoidsClustering(
+            k, dist_matrix=dist_matrix, init=init,
+            sakoe_chiba_radius=sakoe_chiba_radius, itakura_max_slope=itakura_max_slope
+        )
+    if method == "dtw":
+        return DTWKMeansClustering(
+            k, dist_matrix=dist_matrix, init=init,
+            sakoe_chiba_radius=sakoe_chiba_radius, itakura_max_slope=itakura_max_slope
+        )
+    return EuclideanKMeansClustering(k, init=init)
+
+
+def _fit_elbow_k(X, k, method, dist_matrix, constraint, init=None):
+    """Fit one k of the elbow curve (also the process pool task)"""
+    start = time.perf_counter()
+    model = make_clustering(k, method, dist_matrix=dist_matrix, init=init, **constraint)
+    model.fit_predict(X)
+    seconds = time.perf_counter() - start
+    if hasattr(model, "dist_matrix"):
+        model.dist_matrix = None  # not shipped back from workers
+    return model, seconds
+
+
+def _elbow_fits(X, k_values, method, dist_matrix, constraint, max_workers, warm_start):
+    """(k, model, seconds) in k order; a lazy generator so early stopping skips the rest"""
+    if warm_start:
+        init = None
+        for i, k in enumerate(k_values):
+            model, seconds = _fit_elbow_k(X, k, method, dist_matrix, constraint, init)
+            yield k, model, seconds
+            if hasattr(model, "next_init") and i + 1 < len(k_values) and k_values[i + 1] == k + 1:
+                init = model.next_init(X, dist_matrix)
+            else:
+                init = None
+    elif max_workers == 1 or len(k_values) <= 1:
+        for k in k_values:
+            yield (k, *_fit_elbow_k(X, k, method, dist_matrix, constraint))
+    else:
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+        try:
+            futures = [
+                pool.submit(_fit_elbow_k, X, k, method, dist_matrix, constraint) for k in k_values
+            ]
+            for k, future in zip(k_values, futures):
+                yield (k, *future.result())
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def compute_elbow_curve(X, k_range, method="dtw", return_models=False, dist_matrix=None,
+                        sakoe_chiba_radius=DTW_SAKOE_CHIBA_RADIUS, itakura_max_slope=DTW_ITAKURA_MAX_SLOPE,
+                        max_workers=ELBOW_MAX_WORKERS, warm_start=ELBOW_WARM_START,
+                        early_stop=ELBOW_EARLY_STOP):
+    """
+    Inertia for every k in k_range.
+
+    With return_models=True also returns {k: fitted model}, so a later
+    result page for one of these k can reuse the fit. dist_matrix (DTW only)
+    seeds every k from the same precomputed distances; it should use the
+    same constraint as sakoe_chiba_radius / itakura_max_slope.
+
+    Args:
+        max_workers: Fit the k values concurrently in a process pool (1: in-process)
+        warm_start: Seed k from the k-1 solution plus its worst-fitted series
+            (one start per k instead of random restarts; runs in-process)
+        early_stop: Stop once detect_elbow_point returned the same elbow for
+            this many additional k (0: fit every k)
+
+    Returns:
+        {"k_values", "inertia_values", "fit_seconds", "stopped_early"} for
+        the evaluated k (plus {k: model} with return_models=True)
+    """
+    k_values = list(k_range)
+    constraint = {"sakoe_chiba_radius": sakoe_chiba_radius, "itakura_max_slope": itakura_max_slope}
+    evaluated, inertia, seconds = [], [], []
+    models = {}
+    elbows = []
+    stopped_early = False
+
+    fits = _elbow_fits(X, k_values, method, dist_matrix, constraint, max_workers, warm_start)
+    for k, model, fit_seconds in fits:
+        evaluated.append(k)
         inertia.append(float(model.inertia_))
+        seconds.append(fit_seconds)
+        models[k] = model
 
-    return {
-        "k_values": list(k_range),
-        "inertia_values": inertia
+        if early_stop and len(evaluated) >= 4:
+            elbows.append(detect_elbow_point(inertia, evaluated)["elbow_k"])
+            stable = elbows[-early_stop - 1:]
+            if len(stable) > early_stop and len(set(stable)) == 1 and stable[0] < k:
+                stopped_early = len(evaluated) < len(k_values)
+                fits.close()
+                break
+
+    elbow_data = {
+        "k_values": evaluated,
+        "inertia_values": inertia,
+        "fit_seconds": seconds,
+        "stopped_early": stopped_early
     }
+    if return_models:
+        return elbow_data, models
+    return elbow_data
 
 
 def detect_elbow_point(inertia, k_values):
@@ -173,15 +719,22 @@ def compute_cluster_visualization_data(X, labels, method="pca"):
 # =================================================
 # CLUSTER EVALUATION METRICS
 # =================================================
-def compute_cluster_metrics(X, labels, method="euclidean"):
+def compute_cluster_metrics(X, labels, method="euclidean", dist_matrix=None,
+                            sakoe_chiba_radius=DTW_SAKOE_CHIBA_RADIUS,
+                            itakura_max_slope=DTW_ITAKURA_MAX_SLOPE):
     """
     คำนวณ Silhouette Score และ Davies-Bouldin Index
+
+    dist_matrix: precomputed DTW distance matrix of X (computed here if None,
+    with the same sakoe_chiba_radius / itakura_max_slope window as the fit)
     """
     try:
-        if method == "dtw":
+        if method in DTW_METHODS:
             # DTW distance matrix
-            X_reshaped = X.reshape(X.shape[0], X.shape[1], 1)
-            dist_matrix = cdist_dtw(X_reshaped, X_reshaped)
+            if dist_matrix is None:
+                dist_matrix = compute_dtw_matrix(
+                    X, sakoe_chiba_radius=sakoe_chiba_radius, itakura_max_slope=itakura_max_slope
+                )
             silhouette = silhouette_score(dist_matrix, labels, metric='precomputed')
         else:
             # Euclidean distance
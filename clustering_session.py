@@ -0,0 +1,257 @@
+# clustering_session.py
+"""
+Clustering sessions shared by the /cluster elbow and result pages.
+
+Both pages used to rebuild cv_df (fetch + ARIMA + GARCH for every coin) for
+the same selection. A session caches, per selection:
+
+- cv_df, keyed by (platforms, symbols, window_days) and shared by methods
+- per method and DTW constraint: the DTW distance matrix (shared with
+  every session of the same cv_df through compute_dtw_matrix), the elbow
+  curve and every fitted clustering model, keyed by k
+
+so the result page after an elbow page is a lookup, and picking another k
+only fits that k. A fitted k also gets a ClusterAssigner (kept on disk),
+which places coins added later without a recluster until refit() is due.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from cluster_assignment import CLUSTER_ASSIGNER_DIR, ClusterAssigner
+from data_preparation_platform import prepare_crypto_window, prepare_selection_data
+from dtw_pruning import metric_params
+from clustering_module import (
+    DTW_ITAKURA_MAX_SLOPE,
+    DTW_METHODS,
+    DTW_SAKOE_CHIBA_RADIUS,
+    compute_dtw_matrix,
+    compute_elbow_curve,
+    make_clustering
+)
+
+CLUSTER_SESSION_TTL = int(os.environ.get("CLUSTER_SESSION_TTL", "3600"))
+CLUSTER_SESSION_LIMIT = int(os.environ.get("CLUSTER_SESSION_LIMIT", "16"))
+
+
+class ClusteringSession:
+    """
+    Fitted state of one selection and method.
+
+    Attributes:
+        key: (platforms, symbols, window_days, method, sakoe_chiba_radius, itakura_max_slope)
+        cv_df: Normalized CV windows (crypto_id, cv_t_1..cv_t_n, category),
+            including coins added by refit()
+        models: {k: fitted clustering model}
+        assigners: {k: ClusterAssigner}
+    """
+
+    def __init__(self, key, cv_df):
+        self.key = key
+        self.method = key[3]
+        self.constraint = {"sakoe_chiba_radius": key[4], "itakura_max_slope": key[5]}
+        metric_params(**self.constraint)  # reject invalid windows before caching
+        self.base_cv_df = cv_df
+        self._lock = threading.RLock()
+        self._reset(cv_df)
+
+    def _reset(self, cv_df):
+        self.cv_df = cv_df
+        self.X = cv_df.iloc[:, 1:-1].values
+        self.crypto_ids = cv_df["crypto_id"].values
+        self.models = {}
+        self.assigners = {}
+        self._dist_matrix = None
+        self._elbow = {}
+
+    def __len__(self):
+        return len(self.cv_df)
+
+    def distance_matrix(self):
+        """Pairwise DTW distances of the windows (computed once per cv_df)"""
+        if self._dist_matrix is None:
+            self._dist_matrix = compute_dtw_matrix(self.X, **self.constraint)
+        return self._dist_matrix
+
+    def _seed_matrix(self):
+        return self.distance_matrix() if self.method in DTW_METHODS else None
+
+    def elbow(self, k_range):
+        """compute_elbow_curve for k_range; the fitted models are kept"""
+        k_values = tuple(k_range)
+        with self._lock:
+            if k_values not in self._elbow:
+                elbow_data, models = compute_elbow_curve(
+                    self.X, k_values, method=self.method, return_models=True,
+                    dist_matrix=self._seed_matrix(), **self.constraint
+                )
+                self._elbow[k_values] = elbow_data
+                self.models.update(models)
+            return dict(self._elbow[k_values])
+
+    def fit(self, k):
+        """Fitted clustering model for k (fitted on first use)"""
+        with self._lock:
+            if k not in self.models:
+                model = make_clustering(
+                    k, self.method, dist_matrix=self._seed_matrix(), **self.constraint
+                )
+                model.fit_predict(self.X)
+                self.models[k] = model
+            return self.models[k]
+
+    def _assigner_path(self, k):
+        digest = hashlib.sha1((repr(self.key) + hashlib.sha1(self.X.tobytes()).hexdigest()).encode())
+        return os.path.join(CLUSTER_ASSIGNER_DIR, f"{digest.hexdigest()[:20]}_k{k}.joblib")
+
+    def assigner(self, k):
+        """ClusterAssigner of the fit for k (loaded from disk when it was saved for this data)"""
+        with self._lock:
+            if k not in self.assigners:
+                assigner = ClusterAssigner.load(self._assigner_path(k))
+                if assigner is None:
+                    assigner = ClusterAssigner.from_model(
+                        self.fit(k), self.X, self.crypto_ids, self.method,
+                        window_days=self.key[2], constraint=self.constraint,
+                        dist_matrix=self._seed_matrix()
+                    )
+                    assigner.save(self._assigner_path(k))
+                self.assigners[k] = assigner
+            return self.assigners[k]
+
+    def add_coin(self, k, symbol):
+        """
+        Assign a coin to the fitted clusters for k without reclustering.
+
+        Returns:
+            ClusterAssigner.assign result plus the assigner's quality()
+        """
+        with self._lock:
+            assigner = self.assigner(k)
+            if symbol in assigner.crypto_ids:
+                cluster = int(assigner.labels[assigner.crypto_ids.index(symbol)])
+                return {"symbol": symbol, "cluster": cluster, "already_clustered": True,
+                        "quality": assigner.quality()}
+
+        window = prepare_crypto_window(symbol, self.key[2])
+        if window is None:
+            raise ValueError(f"Not enough data for {symbol}")
+
+        with self._lock:
+            result = assigner.assign(symbol, window)
+            assigner.save(self._assigner_path(k))
+            result["quality"] = assigner.quality()
+            return result
+
+    def refit(self, k):
+        """
+        Recluster with every coin added through add_coin.
+
+        The assigner for k is loaded first, so coins added before a restart
+        or a session eviction (persisted on disk) are included. The fitted
+        models, elbow curves, distance matrix and assigners are rebuilt
+        lazily for the extended cv_df.
+
+        Args:
+            k: Cluster count whose added coins are refit
+
+        Returns:
+            Number of coins in the session after the refit
+        """
+        with self._lock:
+            self.assigner(k)
+            windows = {}
+            for assigner in self.assigners.values():
+                windows.update(assigner.added_windows)
+            windows = {s: w for s, w in windows.items() if s not in set(self.crypto_ids)}
+            if not windows:
+                return len(self)
+
+            added = pd.DataFrame(
+                [[s, *w, "Added"] for s, w in windows.items()], columns=self.cv_df.columns
+            )
+            for fitted_k in self.assigners:
+                path = self._assigner_path(fitted_k)
+                if os.path.exists(path):
+                    os.remove(path)
+            self._reset(pd.concat([self.cv_df, added], ignore_index=True))
+            return len(self)
+
+
+class ClusteringSessionStore:
+    """
+    In-process LRU of cv_df frames and clustering sessions.
+
+    Args:
+        ttl: Seconds before a cv_df is rebuilt (prices move daily)
+        max_sessions: Most recently used selections kept in memory
+    """
+
+    def __init__(self, ttl=CLUSTER_SESSION_TTL, max_sessions=CLUSTER_SESSION_LIMIT):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._data = OrderedDict()       # data key -> (cv_df, built_at)
+        self._sessions = OrderedDict()   # session key -> ClusteringSession
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def _fresh_data(self, data_key):
+        entry = self._data.get(data_key)
+        if entry is None or time.time() - entry[1] > self.ttl:
+            return None
+        self._data.move_to_end(data_key)
+        return entry[0]
+
+    def cv_df(self, platforms, symbols=(), window_days=60):
+        """cv_df for a selection, built at most once per ttl"""
+        data_key = (tuple(platforms), tuple(symbols), window_days)
+
+        with self._lock:
+            cv_df = self._fresh_data(data_key)
+            if cv_df is not None:
+                return cv_df
+            build_lock = self._build_locks.setdefault(data_key, threading.Lock())
+
+        # One build per selection; concurrent requests wait for it
+        with build_lock:
+            with self._lock:
+                cv_df = self._fresh_data(data_key)
+            if cv_df is None:
+                cv_df = prepare_selection_data(platforms, symbols, window_days=window_days)
+                with self._lock:
+                    self._data[data_key] = (cv_df, time.time())
+                    # stale sessions of the old frame are dropped with it
+                    for key in [k for k, s in self._sessions.items() if k[:3] == data_key]:
+                        del self._sessions[key]
+                    while len(self._data) > self.max_sessions:
+                        old_key, _ = self._data.popitem(last=False)
+                        self._build_locks.pop(old_key, None)
+            return cv_df
+
+    def session(self, platforms, symbols=(), method="dtw", window_days=60,
+                sakoe_chiba_radius=DTW_SAKOE_CHIBA_RADIUS, itakura_max_slope=DTW_ITAKURA_MAX_SLOPE):
+        """ClusteringSession for a selection, method and DTW constraint"""
+        cv_df = self.cv_df(platforms, symbols, window_days)
+        if method not in DTW_METHODS:
+            sakoe_chiba_radius = itakura_max_slope = None
+        key = (tuple(platforms), tuple(symbols), window_days, method,
+               sakoe_chiba_radius, itakura_max_slope)
+
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None or session.base_cv_df is not cv_df:
+                session = ClusteringSession(key, cv_df)
+                self._sessions[key] = session
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sessions.clear()
@@ -0,0 +1,272 @@
+# compact_model.py
+"""
+Compact on-disk / in-memory format for fitted forests.
+
+A 200-tree sklearn forest keeps float64 thresholds and values, int64 node
+arrays and one Python estimator object per tree. CompactForest keeps only
+what scoring needs, in the narrowest dtype that is still exact:
+
+- thresholds as float32, rounded *down* (inputs are float32, so
+  x <= t32 gives the same split as sklearn's x <= t64)
+- split features as int16, child indices as int16/int32
+- leaf probabilities quantized to uint16 (max error 1/131070 per tree)
+
+Each array is a .npy file in one directory, loaded with mmap_mode="r", so
+many workers can share the same pages. CompactForest is a FlatForest and
+scores with the same predict / predict_proba API.
+
+Size and accuracy report:
+    python compact_model.py                       # synthetic 200-tree forest
+    python compact_model.py --store model_store   # every forest in a registry
+"""
+import argparse
+import glob
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from tree_inference import FlatForest, compile_forest
+
+VALUE_SCALE = np.iinfo(np.uint16).max
+
+_ARRAYS = ("feature", "threshold", "children", "missing_left", "values", "roots")
+
+
+class CompactForest(FlatForest):
+    """
+    FlatForest with narrow dtypes and quantized leaf values.
+
+    Attributes:
+        children: int16/int32 array (2 * n_nodes,), children[2 * node + go_left]
+        values: uint16 array (n_nodes, n_outputs, max_classes), probabilities * VALUE_SCALE
+        (other attributes as FlatForest)
+    """
+
+    def __init__(self, feature, threshold, children, missing_left, values, roots, depth,
+                 classes, n_classes, n_features, feature_names=None, feature_importances=None,
+                 n_horizons=None):
+        self.feature = feature
+        self.threshold = threshold
+        self._children = children
+        self.missing_left = missing_left
+        self.values = values
+        self.roots = roots
+        self.depth = depth
+        self.classes_ = classes
+        self.n_classes_ = n_classes
+        self.n_features = n_features
+        self.feature_names = feature_names
+        if feature_names is not None:
+            self.feature_names_in_ = np.array(feature_names, dtype=object)
+        if feature_importances is not None:
+            self.feature_importances_ = feature_importances
+        if n_horizons is not None:
+            # direct multi-horizon model (multi_horizon.py)
+            self.n_horizons_ = n_horizons
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        summed = self.values[leaves].sum(axis=1, dtype=np.uint32)
+        proba = summed / (float(VALUE_SCALE) * self.n_trees)
+
+        probas = [proba[:, k, :n] for k, n in enumerate(self.n_classes_)]
+        if self.n_outputs == 1:
+            return probas[0]
+        return probas
+
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self._children,
+                                      self.missing_left, self.values, self.roots))
+
+
+def round_down_float32(threshold):
+    """Largest float32 <= each float64 threshold"""
+    t32 = threshold.astype(np.float32)
+    too_high = t32.astype(np.float64) > threshold
+    t32[too_high] = np.nextafter(t32[too_high], np.float32(-np.inf))
+    return t32
+
+
+def _index_dtype(n):
+    # 2 * node + 1 must not overflow while descending
+    return np.int16 if 2 * n + 1 <= np.iinfo(np.int16).max else np.int32
+
+
+def compact_forest(model):
+    """
+    Convert a fitted forest classifier (or FlatForest) into a CompactForest.
+
+    Raises:
+        ValueError: If the model is not a RandomForest / ExtraTrees classifier
+    """
+    flat = model if isinstance(model, FlatForest) else compile_forest(model)
+    n_nodes = len(flat.threshold)
+    index_dtype = _index_dtype(n_nodes)
+
+    return CompactForest(
+        feature=flat.feature.astype(np.int16),
+        threshold=round_down_float32(flat.threshold),
+        children=flat._children.astype(index_dtype),
+        missing_left=flat.missing_left.astype(bool),
+        values=np.rint(flat.values * VALUE_SCALE).astype(np.uint16),
+        roots=flat.roots.astype(np.int32),
+        depth=flat.depth,
+        classes=flat.classes_,
+        n_classes=flat.n_classes_,
+        n_features=flat.n_features,
+        feature_names=flat.feature_names,
+        feature_importances=getattr(model, "feature_importances_", None),
+        n_horizons=getattr(model, "n_horizons_", None)
+    )
+
+
+def save_compact_forest(forest, path):
+    """Write a CompactForest as a directory of .npy files plus meta.json"""
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    arrays = dict(
+        {a: getattr(forest, a) for a in _ARRAYS if a != "children"},
+        children=forest._children
+    )
+    if hasattr(forest, "feature_importances_"):
+        arrays["feature_importances"] = forest.feature_importances_
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp, name + ".npy"), np.ascontiguousarray(array))
+
+    meta = {
+        "depth": int(forest.depth),
+        "classes": [c.tolist() for c in forest.classes_],
+        "n_classes": list(forest.n_classes_),
+        "n_features": int(forest.n_features),
+        "feature_names": forest.feature_names,
+        "n_horizons": getattr(forest, "n_horizons_", None),
+        "value_scale": int(VALUE_SCALE)
+    }
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    # Same content hash -> same directory; replace it whole
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+
+def load_compact_forest(path, mmap_mode="r"):
+    """Load a CompactForest directory, memory-mapping every array"""
+    with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    def load(name):
+        file = os.path.join(path, name + ".npy")
+        return np.load(file, mmap_mode=mmap_mode) if os.path.exists(file) else None
+
+    return CompactForest(
+        **{a: load(a) for a in _ARRAYS},
+        depth=meta["depth"],
+        classes=[np.asarray(c) for c in meta["classes"]],
+        n_classes=meta["n_classes"],
+        n_features=meta["n_features"],
+        feature_names=meta["feature_names"],
+        feature_importances=load("feature_importances"),
+        n_horizons=meta.get("n_horizons")
+    )
+
+
+def directory_bytes(path):
+    return sum(os.path.getsize(f) for f in glob.glob(os.path.join(path, "*")))
+
+
+def compare(model, X, compact=None):
+    """
+    Size and agreement of a CompactForest against its sklearn forest.
+
+    Returns:
+        dict of byte counts, max probability difference and prediction agreement
+    """
+    compact = compact or compact_forest(model)
+    flat = compile_forest(model)
+
+    expected = model.predict_proba(X)
+    actual = compact.predict_proba(X)
+    if not isinstance(expected, list):
+        expected, actual = [expected], [actual]
+
+    flat_bytes = sum(
+        a.nbytes for a in (flat.feature, flat.threshold, flat._children,
+                           flat.missing_left, flat.values, flat.roots)
+    )
+    return {
+        "sklearn_pickle_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        "flat_float64_bytes": flat_bytes,
+        "compact_bytes": compact.nbytes(),
+        "same_leaves": bool(np.array_equal(flat.apply(X), compact.apply(X))),
+        "max_abs_diff": float(max(np.abs(e - a).max() for e, a in zip(expected, actual))),
+        "prediction_agreement": float(np.mean([
+            (e.argmax(axis=1) == a.argmax(axis=1)).mean() for e, a in zip(expected, actual)
+        ]))
+    }
+
+
+def _print_report(name, report):
+    ratio = report["sklearn_pickle_bytes"] / report["compact_bytes"]
+    print(f"  {name}")
+    print(f"    sklearn pickle: {report['sklearn_pickle_bytes'] / 1024:>9.1f} KB")
+    print(f"    flat float64:   {report['flat_float64_bytes'] / 1024:>9.1f} KB")
+    print(f"    compact:        {report['compact_bytes'] / 1024:>9.1f} KB  ({ratio:.1f}x smaller)")
+    print(f"    same leaves: {report['same_leaves']}, max prob diff {report['max_abs_diff']:.2e}, "
+          f"prediction agreement {report['prediction_agreement']:.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact forest size and accuracy report")
+    parser.add_argument("--store", default=None, help="Report every forest in this registry directory")
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("COMPACT FOREST REPORT")
+    print("=" * 60)
+
+    if args.store:
+        for model_path in sorted(glob.glob(os.path.join(args.store, "*.joblib"))):
+            try:
+                model = joblib.load(model_path)
+                compact = compact_forest(model)
+            except (ValueError, OSError) as e:
+                print(f"  ✗ {os.path.basename(model_path)}: {str(e)[:60]}")
+                continue
+            X = np.random.default_rng(0).normal(size=(500, compact.n_features))
+            _print_report(os.path.basename(model_path), compare(model, X, compact))
+        return
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(700, 6))
+    y = (X[:, 0] + rng.normal(scale=2, size=700) > 0).astype(int)
+    model = RandomForestClassifier(
+        n_estimators=args.trees, max_depth=args.depth, random_state=42, class_weight="balanced"
+    ).fit(X, y)
+
+    compact = compact_forest(model)
+    _print_report(f"{args.trees} trees, depth {args.depth}", compare(model, X, compact))
+
+    path = os.path.join(tempfile.mkdtemp(), "forest")
+    save_compact_forest(compact, path)
+    start = time.perf_counter()
+    loaded = load_compact_forest(path)
+    load_ms = (time.perf_counter() - start) * 1e3
+    print(f"    on disk: {directory_bytes(path) / 1024:.1f} KB, mmap load {load_ms:.2f} ms, "
+          f"reload equal: {np.array_equal(loaded.predict_proba(X), compact.predict_proba(X))}")
+    shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
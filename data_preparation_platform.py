@@ -156,6 +156,22 @@ def get_platform_cryptos(platform):
     }
     return platforms.get(platform, [])
 
+def prepare_crypto_window(symbol, window_days=60):
+    """
+    Z-normalized CV window of one crypto (the clustering features).
+
+    Returns:
+        Array of window_days values, or None if there is not enough data
+    """
+    df = fetch_crypto_data(symbol)
+    if df is None or len(df) < window_days:
+        return None
+
+    df_cv = compute_conditional_volatility(df)
+    cv_series = df_cv['cv'].tail(window_days).values
+    return (cv_series - cv_series.mean()) / cv_series.std()
+
+
 def prepare_crypto_data_for_clustering(cryptos, window_days=60, include_platform=True):
     """Prepare crypto data for clustering"""
     cv_series_list = []
@@ -169,16 +185,12 @@ def prepare_crypto_data_for_clustering(cryptos, window_days=60, include_platform
             
             print(f"[{idx}/{total}] Processing {symbol}...")
             
-            df = fetch_crypto_data(symbol)
-            if df is None or len(df) < window_days:
+            cv_normalized = prepare_crypto_window(symbol, window_days)
+            if cv_normalized is None:
                 print(f"Skipping {symbol}: insufficient data")
                 failed.append(symbol)
                 continue
             
-            df_cv = compute_conditional_volatility(df)
-            cv_series = df_cv['cv'].tail(window_days).values
-            cv_normalized = (cv_series - cv_series.mean()) / cv_series.std()
-            
             row_data = {'crypto_id': symbol}
             for i, cv_value in enumerate(cv_normalized):
                 row_data[f'cv_t_{i+1}'] = cv_value
@@ -214,3 +226,45 @@ def prepare_platform_data(platform, window_days=60, include_platform=True):
         crypto['platform'] = platform.title()
     
     return prepare_crypto_data_for_clustering(cryptos, window_days, include_platform)
+
+def parse_selection(platform, platforms_param="", cryptos_param=""):
+    """
+    Normalized (platforms, symbols) of a /cluster request.
+
+    Args:
+        platform: Route platform ('multi' when several platforms are selected)
+        platforms_param: Comma-separated platforms (multi-platform selection)
+        cryptos_param: Comma-separated symbols picked on one platform
+
+    Returns:
+        Tuple of (platforms, symbols); symbols is empty for a whole platform
+    """
+    if platform == 'multi' and platforms_param:
+        platforms = tuple(p for p in platforms_param.split(',') if p)
+        return platforms, ()
+    symbols = tuple(sorted({s for s in cryptos_param.split(',') if s}))
+    return (platform,), symbols
+
+
+def prepare_selection_data(platforms, symbols=(), window_days=60, include_platform=True):
+    """
+    Prepare clustering data for a parsed /cluster selection.
+
+    Args:
+        platforms: Platforms from parse_selection
+        symbols: Symbols to keep (empty keeps every crypto of the platforms)
+        window_days: CV window length
+        include_platform: Add the 'category' column
+
+    Returns:
+        cv_df as prepare_crypto_data_for_clustering
+    """
+    cryptos = []
+    for p in platforms:
+        for crypto in get_platform_cryptos(p):
+            if symbols and crypto['symbol'] not in symbols:
+                continue
+            crypto['platform'] = p.title()
+            cryptos.append(crypto)
+
+    return prepare_crypto_data_for_clustering(cryptos, window_days, include_platform)
@@ -0,0 +1,112 @@
+# dtw_window_benchmark.py
+"""
+Speed vs cluster quality of constrained DTW windows.
+
+For every window (unconstrained, Sakoe-Chiba radii, Itakura slopes) times
+the DTW distance matrix and a DTW k-means elbow run, then scores every k on
+the unconstrained DTW matrix (silhouette) and against the unconstrained
+labels (adjusted Rand index), so the band widths are compared on one scale.
+
+Benchmark:
+    python dtw_window_benchmark.py --series 60 --radii 3 6 12 --slopes 2
+    python dtw_window_benchmark.py --platform ethereum
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score, silhouette_score
+
+from clustering_module import compute_dtw_matrix, compute_elbow_curve
+
+
+def synthetic_windows(n_series=60, length=60, n_shapes=5, seed=42):
+    """Normalized random-walk windows around n_shapes shared shapes"""
+    rng = np.random.RandomState(seed)
+    shapes = rng.randn(n_shapes, length).cumsum(axis=1)
+    X = shapes[rng.randint(n_shapes, size=n_series)] + rng.randn(n_series, length).cumsum(axis=1) * 0.3
+    return (X - X.mean(axis=1, keepdims=True)) / X.std(axis=1, keepdims=True)
+
+
+def window_options(radii, slopes):
+    options = [("none", {"sakoe_chiba_radius": None, "itakura_max_slope": None})]
+    options += [(f"sakoe {r}", {"sakoe_chiba_radius": r, "itakura_max_slope": None}) for r in radii]
+    options += [(f"itakura {s:g}", {"sakoe_chiba_radius": None, "itakura_max_slope": s}) for s in slopes]
+    return options
+
+
+def benchmark(X, k_values, radii=(3, 6, 12), slopes=(2.0,)):
+    """
+    Returns:
+        List of dicts per window: matrix_s, elbow_s, mean silhouette and ARI
+        over k_values, plus per-k inertia
+    """
+    options = window_options(radii, slopes)
+
+    # numba compiles one kernel per constraint: keep that out of the timings
+    for _, constraint in options:
+        warm = X[:4]
+        compute_elbow_curve(warm, [2], dist_matrix=compute_dtw_matrix(warm, **constraint), **constraint)
+
+    reference = reference_labels = None
+    rows = []
+
+    for name, constraint in options:
+        start = time.perf_counter()
+        dist_matrix = compute_dtw_matrix(X, **constraint)
+        matrix_time = time.perf_counter() - start
+        if reference is None:
+            reference = dist_matrix
+
+        start = time.perf_counter()
+        elbow_data, models = compute_elbow_curve(
+            X, k_values, method="dtw", return_models=True, dist_matrix=dist_matrix, **constraint
+        )
+        elbow_time = time.perf_counter() - start
+
+        labels = {k: m.labels_ for k, m in models.items()}
+        if reference_labels is None:
+            reference_labels = labels
+
+        rows.append({
+            "window": name,
+            "matrix_s": matrix_time,
+            "elbow_s": elbow_time,
+            "silhouette": float(np.mean([
+                silhouette_score(reference, labels[k], metric="precomputed") for k in k_values
+            ])),
+            "ari": float(np.mean([adjusted_rand_score(reference_labels[k], labels[k]) for k in k_values])),
+            "inertia": elbow_data["inertia_values"]
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Constrained DTW window benchmark")
+    parser.add_argument("--series", type=int, default=60, help="Synthetic series count")
+    parser.add_argument("--length", type=int, default=60, help="Synthetic window length")
+    parser.add_argument("--platform", default=None, help="Use real CV windows of a platform instead")
+    parser.add_argument("--radii", type=int, nargs="*", default=[3, 6, 12])
+    parser.add_argument("--slopes", type=float, nargs="*", default=[2.0])
+    parser.add_argument("--max-k", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.platform:
+        from data_preparation_platform import prepare_platform_data
+        X = prepare_platform_data(args.platform).iloc[:, 1:-1].values
+    else:
+        X = synthetic_windows(args.series, args.length)
+    k_values = list(range(2, min(args.max_k, len(X) - 1) + 1))
+
+    print("=" * 80)
+    print(f"DTW WINDOW BENCHMARK ({X.shape[0]} series x {X.shape[1]} points, k={k_values[0]}..{k_values[-1]})")
+    print("=" * 80)
+    print(f"\n{'Window':<14}{'Matrix (s)':>12}{'Elbow (s)':>11}{'Silhouette':>12}{'ARI vs none':>13}")
+
+    for r in benchmark(X, k_values, args.radii, args.slopes):
+        print(f"{r['window']:<14}{r['matrix_s']:>12.3f}{r['elbow_s']:>11.3f}"
+              f"{r['silhouette']:>12.3f}{r['ari']:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
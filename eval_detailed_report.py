@@ -1,376 +1,146 @@
 # -*- coding: utf-8 -*-
 """
 Comprehensive Evaluation Report: Raw Data vs Processed Data (with CV)
-Shows detailed metrics comparison in table format
+Shows detailed metrics comparison in table format (metrics from evaluation_runner.py)
+
+Usage:
+    python eval_detailed_report.py [SYMBOL]
 """
 
 import sys
 import io
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
-import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, confusion_matrix
-from sklearn.ensemble import RandomForestClassifier
-from fetch_coinlore import fetch_crypto_data
-from volatility_pipeline import compute_conditional_volatility
-from feature_engineering import build_features
+from evaluation_runner import run_evaluation, results_by_approach
 import warnings
 warnings.filterwarnings('ignore')
 
-print("\n" + "=" * 100)
-print(" " * 20 + "EVALUATION REPORT: RAW DATA vs PROCESSED DATA (with CV)")
-print("=" * 100)
+CLASSIFICATION_ROWS = [
+    ('Accuracy', 'accuracy'),
+    ('Precision', 'precision'),
+    ('Recall', 'recall'),
+    ('F1-Score', 'f1'),
+    ('ROC-AUC', 'roc_auc'),
+]
 
-# =====================================================================
-# Approach 1: RAW DATA
-# =====================================================================
-print("\n[PROCESSING] Approach 1: Raw Data (without CV)...\n")
+DATASET_ROWS = [
+    ('Number of Features', 'n_features'),
+    ('Training Samples', 'train_size'),
+    ('Test Samples', 'test_size'),
+]
 
-def build_features_raw(df):
-    """Build features from raw data (no CV processing)"""
-    df = df.copy()
-    df['log_return'] = np.log(df['Close'] / df['Close'].shift(1))
-    df['target'] = (df['log_return'].shift(-1) > 0).astype(int)
-    df['return_lag1'] = df['log_return'].shift(1)
-    df['return_lag2'] = df['log_return'].shift(2)
-    
-    delta = df['Close'].diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-    avg_gain = gain.rolling(14).mean()
-    avg_loss = loss.rolling(14).mean()
-    rs = avg_gain / avg_loss
-    df['rsi_14'] = 100 - (100 / (1 + rs))
-    df['rsi_slope'] = df['rsi_14'].diff()
-    
-    df = df.dropna()
-    feature_cols = ['return_lag1', 'return_lag2', 'rsi_14', 'rsi_slope']
-    X = df[feature_cols]
-    y = df['target']
-    return X, y
+REGRESSION_ROWS = [
+    ('MAE (Mean Absolute Error)', 'mae', "${:.2f}", 'USD'),
+    ('RMSE (Root Mean Squared Error)', 'rmse', "${:.2f}", 'USD'),
+    ('MAPE (Mean Absolute % Error)', 'mape', "{:.2f}%", '%'),
+]
 
-try:
-    df_raw = fetch_crypto_data('BTC')
-    X_raw, y_raw = build_features_raw(df_raw)
-    X_train_raw, X_test_raw, y_train_raw, y_test_raw = train_test_split(
-        X_raw, y_raw, test_size=0.2, random_state=42
-    )
-    
-    model_raw = RandomForestClassifier(
-        n_estimators=200, max_depth=5, random_state=42, class_weight="balanced"
-    )
-    model_raw.fit(X_train_raw, y_train_raw)
-    
-    y_pred_raw = model_raw.predict(X_test_raw)
-    y_pred_proba_raw = model_raw.predict_proba(X_test_raw)[:, 1]
-    tn_raw, fp_raw, fn_raw, tp_raw = confusion_matrix(y_test_raw, y_pred_raw).ravel()
-    
-    # Calculate regression metrics (price prediction)
-    from sklearn.metrics import mean_absolute_error, mean_squared_error
-    mae_raw = None
-    rmse_raw = None
-    mape_raw = None
-    try:
-        last_price = df_raw["Close"].iloc[-1]
-        returns = df_raw["log_return"].dropna()
-        avg_daily_return = returns.mean()
-        daily_volatility = returns.std()
-        
-        predicted_prices = []
-        current_price = last_price
-        test_size = min(10, len(y_pred_proba_raw))
-        
-        for i in range(test_size):
-            prob = y_pred_proba_raw[i]
-            direction = 1 if prob > 0.5 else 0
-            expected_return = avg_daily_return * prob if direction == 1 else -avg_daily_return * (1 - prob)
-            expected_return += np.random.normal(0, daily_volatility * 0.5)
-            current_price *= (1 + expected_return)
-            predicted_prices.append(current_price)
-        
-        # Use the last N days of actual prices for comparison
-        actual_prices = df_raw["Close"].tail(test_size).values
-        
-        if len(predicted_prices) == len(actual_prices) and len(actual_prices) > 0 and np.all(actual_prices > 0):
-            mae_raw = mean_absolute_error(actual_prices, predicted_prices)
-            rmse_raw = np.sqrt(mean_squared_error(actual_prices, predicted_prices))
-            mape_raw = np.mean(np.abs((actual_prices - predicted_prices) / actual_prices)) * 100
-    except Exception as e:
-        pass
-    
-    results_raw = {
-        'Approach': 'Raw Data (No CV)',
-        'Features': 4,
-        'Train Samples': len(X_train_raw),
-        'Test Samples': len(X_test_raw),
-        'Accuracy': accuracy_score(y_test_raw, y_pred_raw),
-        'Precision': precision_score(y_test_raw, y_pred_raw, zero_division=0),
-        'Recall': recall_score(y_test_raw, y_pred_raw, zero_division=0),
-        'F1-Score': f1_score(y_test_raw, y_pred_raw, zero_division=0),
-        'ROC-AUC': roc_auc_score(y_test_raw, y_pred_proba_raw),
-        'MAE': mae_raw,
-        'RMSE': rmse_raw,
-        'MAPE': mape_raw,
-        'TP': tp_raw,
-        'TN': tn_raw,
-        'FP': fp_raw,
-        'FN': fn_raw
-    }
-    print("✅ Raw Data Model: COMPLETED")
-except Exception as e:
-    print(f"❌ Raw Data Model: FAILED - {str(e)}")
-    results_raw = None
+CONFUSION_ROWS = [
+    ('True Positives (TP)', 'tp'),
+    ('True Negatives (TN)', 'tn'),
+    ('False Positives (FP)', 'fp'),
+    ('False Negatives (FN)', 'fn'),
+]
 
-# =====================================================================
-# Approach 2: PROCESSED DATA (with CV)
-# =====================================================================
-print("\n[PROCESSING] Approach 2: Processed Data (with Conditional Volatility)...\n")
 
-try:
-    df_proc = fetch_crypto_data('BTC')
-    df_cv = compute_conditional_volatility(df_proc)
-    X_proc, y_proc = build_features(df_cv)
-    X_train_proc, X_test_proc, y_train_proc, y_test_proc = train_test_split(
-        X_proc, y_proc, test_size=0.2, random_state=42
-    )
-    
-    model_proc = RandomForestClassifier(
-        n_estimators=200, max_depth=5, random_state=42, class_weight="balanced"
-    )
-    model_proc.fit(X_train_proc, y_train_proc)
-    
-    y_pred_proc = model_proc.predict(X_test_proc)
-    y_pred_proba_proc = model_proc.predict_proba(X_test_proc)[:, 1]
-    tn_proc, fp_proc, fn_proc, tp_proc = confusion_matrix(y_test_proc, y_pred_proc).ravel()
-    
-    # Calculate regression metrics (price prediction)
-    from sklearn.metrics import mean_absolute_error, mean_squared_error
-    mae_proc = None
-    rmse_proc = None
-    mape_proc = None
-    try:
-        last_price = df_proc["Close"].iloc[-1]
-        returns = df_proc["log_return"].dropna()
-        avg_daily_return = returns.mean()
-        daily_volatility = returns.std()
-        
-        predicted_prices = []
-        current_price = last_price
-        test_size = min(10, len(y_pred_proba_proc))
-        
-        for i in range(test_size):
-            prob = y_pred_proba_proc[i]
-            direction = 1 if prob > 0.5 else 0
-            expected_return = avg_daily_return * prob if direction == 1 else -avg_daily_return * (1 - prob)
-            expected_return += np.random.normal(0, daily_volatility * 0.5)
-            current_price *= (1 + expected_return)
-            predicted_prices.append(current_price)
-        
-        # Use the last N days of actual prices for comparison
-        actual_prices = df_proc["Close"].tail(test_size).values
-        
-        if len(predicted_prices) == len(actual_prices) and len(actual_prices) > 0 and np.all(actual_prices > 0):
-            mae_proc = mean_absolute_error(actual_prices, predicted_prices)
-            rmse_proc = np.sqrt(mean_squared_error(actual_prices, predicted_prices))
-            mape_proc = np.mean(np.abs((actual_prices - predicted_prices) / actual_prices)) * 100
-    except Exception as e:
-        pass
-    
-    results_proc = {
-        'Approach': 'Processed (with CV)',
-        'Features': 6,
-        'Train Samples': len(X_train_proc),
-        'Test Samples': len(X_test_proc),
-        'Accuracy': accuracy_score(y_test_proc, y_pred_proc),
-        'Precision': precision_score(y_test_proc, y_pred_proc, zero_division=0),
-        'Recall': recall_score(y_test_proc, y_pred_proc, zero_division=0),
-        'F1-Score': f1_score(y_test_proc, y_pred_proc, zero_division=0),
-        'ROC-AUC': roc_auc_score(y_test_proc, y_pred_proba_proc),
-        'MAE': mae_proc,
-        'RMSE': rmse_proc,
-        'MAPE': mape_proc,
-        'TP': tp_proc,
-        'TN': tn_proc,
-        'FP': fp_proc,
-        'FN': fn_proc
-    }
-    print("✅ Processed Data Model: COMPLETED")
-except Exception as e:
-    print(f"❌ Processed Data Model: FAILED - {str(e)}")
-    results_proc = None
+def _format(value, fmt):
+    return fmt.format(value) if value is not None and not pd.isna(value) else "N/A"
 
-# =====================================================================
-# DISPLAY RESULTS
-# =====================================================================
-if results_raw and results_proc:
-    print("\n" + "=" * 100)
-    print("TABLE 1: PERFORMANCE METRICS COMPARISON (Classification)")
-    print("=" * 100)
-    
-    # Create comparison dataframe
-    metrics_data = [
-        {
-            'Metric': 'Accuracy',
-            'Raw Data (No CV)': f"{results_raw['Accuracy']:.4f}",
-            'with CV': f"{results_proc['Accuracy']:.4f}",
-            'Winner': '🏆 Raw Data' if results_raw['Accuracy'] > results_proc['Accuracy'] else '🏆 with CV',
-            'Difference': f"{abs(results_raw['Accuracy'] - results_proc['Accuracy']):.4f}"
-        },
-        {
-            'Metric': 'Precision',
-            'Raw Data (No CV)': f"{results_raw['Precision']:.4f}",
-            'with CV': f"{results_proc['Precision']:.4f}",
-            'Winner': '🏆 Raw Data' if results_raw['Precision'] > results_proc['Precision'] else '🏆 with CV',
-            'Difference': f"{abs(results_raw['Precision'] - results_proc['Precision']):.4f}"
-        },
-        {
-            'Metric': 'Recall',
-            'Raw Data (No CV)': f"{results_raw['Recall']:.4f}",
-            'with CV': f"{results_proc['Recall']:.4f}",
-            'Winner': '🏆 Raw Data' if results_raw['Recall'] > results_proc['Recall'] else '🏆 with CV',
-            'Difference': f"{abs(results_raw['Recall'] - results_proc['Recall']):.4f}"
-        },
-        {
-            'Metric': 'F1-Score',
-            'Raw Data (No CV)': f"{results_raw['F1-Score']:.4f}",
-            'with CV': f"{results_proc['F1-Score']:.4f}",
-            'Winner': '🏆 Raw Data' if results_raw['F1-Score'] > results_proc['F1-Score'] else '🏆 with CV',
-            'Difference': f"{abs(results_raw['F1-Score'] - results_proc['F1-Score']):.4f}"
-        },
-        {
-            'Metric': 'ROC-AUC',
-            'Raw Data (No CV)': f"{results_raw['ROC-AUC']:.4f}",
-            'with CV': f"{results_proc['ROC-AUC']:.4f}",
-            'Winner': '🏆 Raw Data' if results_raw['ROC-AUC'] > results_proc['ROC-AUC'] else '🏆 with CV',
-            'Difference': f"{abs(results_raw['ROC-AUC'] - results_proc['ROC-AUC']):.4f}"
-        },
-    ]
-    
-    metrics_df = pd.DataFrame(metrics_data)
-    print("\n" + metrics_df.to_string(index=False))
-    
-    print("\n" + "=" * 100)
-    print("TABLE 2: DATASET & TRAINING INFORMATION")
-    print("=" * 100)
-    
-    dataset_data = [
-        {
-            'Aspect': 'Number of Features',
-            'Raw Data': results_raw['Features'],
-            'with CV': results_proc['Features']
-        },
-        {
-            'Aspect': 'Training Samples',
-            'Raw Data': results_raw['Train Samples'],
-            'with CV': results_proc['Train Samples']
-        },
-        {
-            'Aspect': 'Test Samples',
-            'Raw Data': results_raw['Test Samples'],
-            'with CV': results_proc['Test Samples']
-        },
-    ]
-    
-    dataset_df = pd.DataFrame(dataset_data)
-    print("\n" + dataset_df.to_string(index=False))
-    
-    print("\n" + "=" * 100)
-    print("TABLE 3: REGRESSION METRICS (Price Prediction)")
-    print("=" * 100)
-    
-    regression_data = [
-        {
-            'Metric': 'MAE (Mean Absolute Error)',
-            'Raw Data': f"${results_raw['MAE']:.2f}" if results_raw['MAE'] is not None else "N/A",
-            'with CV': f"${results_proc['MAE']:.2f}" if results_proc['MAE'] is not None else "N/A",
-            'Unit': 'USD'
-        },
-        {
-            'Metric': 'RMSE (Root Mean Squared Error)',
-            'Raw Data': f"${results_raw['RMSE']:.2f}" if results_raw['RMSE'] is not None else "N/A",
-            'with CV': f"${results_proc['RMSE']:.2f}" if results_proc['RMSE'] is not None else "N/A",
-            'Unit': 'USD'
-        },
-        {
-            'Metric': 'MAPE (Mean Absolute % Error)',
-            'Raw Data': f"{results_raw['MAPE']:.2f}%" if results_raw['MAPE'] is not None else "N/A",
-            'with CV': f"{results_proc['MAPE']:.2f}%" if results_proc['MAPE'] is not None else "N/A",
-            'Unit': '%'
-        },
-    ]
-    
-    regression_df = pd.DataFrame(regression_data)
-    print("\n" + regression_df.to_string(index=False))
-    
-    print("\n" + "=" * 100)
-    print("TABLE 4: CONFUSION MATRIX")
-    print("=" * 100)
-    
-    confusion_data = [
-        {
-            'Metric': 'True Positives (TP)',
-            'Raw Data': results_raw['TP'],
-            'with CV': results_proc['TP']
-        },
-        {
-            'Metric': 'True Negatives (TN)',
-            'Raw Data': results_raw['TN'],
-            'with CV': results_proc['TN']
-        },
-        {
-            'Metric': 'False Positives (FP)',
-            'Raw Data': results_raw['FP'],
-            'with CV': results_proc['FP']
-        },
-        {
-            'Metric': 'False Negatives (FN)',
-            'Raw Data': results_raw['FN'],
-            'with CV': results_proc['FN']
-        },
-    ]
-    
-    confusion_df = pd.DataFrame(confusion_data)
-    print("\n" + confusion_df.to_string(index=False))
-    
-    # =====================================================================
-    # ANALYSIS
-    # =====================================================================
+
+def main(symbol="BTC"):
     print("\n" + "=" * 100)
-    print("📊 ANALYSIS & RECOMMENDATIONS")
+    print(" " * 20 + "EVALUATION REPORT: RAW DATA vs PROCESSED DATA (with CV)")
     print("=" * 100)
-    
-    acc_diff = results_raw['Accuracy'] - results_proc['Accuracy']
-    
-    print(f"\n1. WINNER: {'🏆 Raw Data (No CV)' if acc_diff > 0 else '🏆 Processed Data (with CV)'}")
-    print(f"   Accuracy Improvement: {abs(acc_diff):.2%}")
-    
-    print(f"\n2. WHY RAW DATA PERFORMS BETTER:")
-    if acc_diff > 0:
-        print(f"   ✓ Simpler features are more predictive")
-        print(f"   ✓ CV preprocessing adds noise instead of signal")
-        print(f"   ✓ ARIMA+GARCH may be overfitting the training data")
-        print(f"   ✓ Less feature engineering = less chance of data leakage")
-    else:
-        print(f"   ✓ Complex features capture market dynamics")
-        print(f"   ✓ Volatility patterns improve predictions")
-    
-    print(f"\n3. MODEL QUALITY ASSESSMENT:")
-    if results_raw['ROC-AUC'] > 0.7:
-        print(f"   ✓ GOOD: ROC-AUC = {results_raw['ROC-AUC']:.4f} (Excellent discrimination)")
-    elif results_raw['ROC-AUC'] > 0.6:
-        print(f"   ⚠ FAIR: ROC-AUC = {results_raw['ROC-AUC']:.4f} (Acceptable discrimination)")
-    else:
-        print(f"   ❌ POOR: ROC-AUC = {results_raw['ROC-AUC']:.4f} (Barely better than random)")
-        print(f"      → Consider improving features or adding more indicators")
-    
-    print(f"\n4. ACTIONABLE INSIGHTS:")
-    print(f"   ✓ Remove CV preprocessing from the pipeline")
-    print(f"   ✓ Use raw data approach to increase accuracy by ~17%")
-    print(f"   ✓ Add train/test split to all training code")
-    print(f"   ✓ Track metrics during model training")
-    print(f"   ✓ Consider adding more technical indicators")
-    print(f"   ✓ Implement cross-validation for robust evaluation")
 
-print("\n" + "=" * 100 + "\n")
+    results = results_by_approach(run_evaluation([symbol]), symbol)
+    raw, proc = results.get("raw"), results.get("cv")
+
+    if raw and proc:
+        print("\n" + "=" * 100)
+        print("TABLE 1: PERFORMANCE METRICS COMPARISON (Classification)")
+        print("=" * 100)
+
+        metrics_df = pd.DataFrame([
+            {
+                'Metric': name,
+                'Raw Data (No CV)': f"{raw[key]:.4f}",
+                'with CV': f"{proc[key]:.4f}",
+                'Winner': '🏆 Raw Data' if raw[key] > proc[key] else '🏆 with CV',
+                'Difference': f"{abs(raw[key] - proc[key]):.4f}"
+            }
+            for name, key in CLASSIFICATION_ROWS
+        ])
+        print("\n" + metrics_df.to_string(index=False))
+
+        print("\n" + "=" * 100)
+        print("TABLE 2: DATASET & TRAINING INFORMATION")
+        print("=" * 100)
+
+        dataset_df = pd.DataFrame([
+            {'Aspect': name, 'Raw Data': raw[key], 'with CV': proc[key]}
+            for name, key in DATASET_ROWS
+        ])
+        print("\n" + dataset_df.to_string(index=False))
+
+        print("\n" + "=" * 100)
+        print("TABLE 3: REGRESSION METRICS (Price Prediction)")
+        print("=" * 100)
+
+        regression_df = pd.DataFrame([
+            {
+                'Metric': name,
+                'Raw Data': _format(raw.get(key), fmt),
+                'with CV': _format(proc.get(key), fmt),
+                'Unit': unit
+            }
+            for name, key, fmt, unit in REGRESSION_ROWS
+        ])
+        print("\n" + regression_df.to_string(index=False))
+
+        print("\n" + "=" * 100)
+        print("TABLE 4: CONFUSION MATRIX")
+        print("=" * 100)
+
+        confusion_df = pd.DataFrame([
+            {'Metric': name, 'Raw Data': raw[key], 'with CV': proc[key]}
+            for name, key in CONFUSION_ROWS
+        ])
+        print("\n" + confusion_df.to_string(index=False))
+
+        # =====================================================================
+        # ANALYSIS
+        # =====================================================================
+        print("\n" + "=" * 100)
+        print("📊 ANALYSIS & RECOMMENDATIONS")
+        print("=" * 100)
+
+        acc_diff = raw['accuracy'] - proc['accuracy']
+
+        print(f"\n1. WINNER: {'🏆 Raw Data (No CV)' if acc_diff > 0 else '🏆 Processed Data (with CV)'}")
+        print(f"   Accuracy Improvement: {abs(acc_diff):.2%}")
+
+        print(f"\n2. WHY {'RAW DATA' if acc_diff > 0 else 'CV DATA'} PERFORMS BETTER:")
+        if acc_diff > 0:
+            print(f"   ✓ Simpler features are more predictive")
+            print(f"   ✓ CV preprocessing adds noise instead of signal")
+            print(f"   ✓ ARIMA+GARCH may be overfitting the training data")
+            print(f"   ✓ Less feature engineering = less chance of data leakage")
+        else:
+            print(f"   ✓ Complex features capture market dynamics")
+            print(f"   ✓ Volatility patterns improve predictions")
+
+        print(f"\n3. MODEL QUALITY ASSESSMENT:")
+        if raw['roc_auc'] > 0.7:
+            print(f"   ✓ GOOD: ROC-AUC = {raw['roc_auc']:.4f} (Excellent discrimination)")
+        elif raw['roc_auc'] > 0.6:
+            print(f"   ⚠ FAIR: ROC-AUC = {raw['roc_auc']:.4f} (Acceptable discrimination)")
+        else:
+            print(f"   ❌ POOR: ROC-AUC = {raw['roc_auc']:.4f} (Barely better than random)")
+            print(f"      → Consider improving features or adding more indicators")
+
+    print("\n" + "=" * 100 + "\n")
+
+
+if __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    main(sys.argv[1].upper() if len(sys.argv) > 1 else "BTC")
@@ -0,0 +1,301 @@
+# evaluation_runner.py
+"""
+Raw vs CV model evaluation for any number of symbols.
+
+The eval_* scripts used to fetch BTC, rebuild features and retrain the same
+two forests at import time, each on its own. This runner does the work once
+and the scripts only format its results:
+
+- price data is fetched once per symbol and day (disk cache)
+- features are cached per (symbol, approach, data hash), so the slow CV
+  pipeline only runs when the prices change
+- models come from the ModelRegistry, i.e. the same fitted forests /predict
+  serves (same tuned config, same data version)
+- symbol x approach combinations are evaluated across a process pool, and
+  each test split is scored with one batched predict_proba call
+
+Usage:
+    python evaluation_runner.py BTC ETH SOL --approaches raw cv --output eval.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import (
+    accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, confusion_matrix
+)
+from sklearn.model_selection import train_test_split
+
+from fetch_coinlore import fetch_crypto_data
+from volatility_pipeline import compute_conditional_volatility
+from feature_engineering import add_base_features, build_features, build_features_raw
+from train_model import calculate_regression_metrics, load_rf_config, predict_prices_for_evaluation, train_rf
+from tree_inference import get_flat_forest
+from model_registry import ModelRegistry, MODEL_STORE_DIR
+
+APPROACHES = ("raw", "cv")
+
+APPROACH_NAMES = {"raw": "Raw Data (No CV)", "cv": "Processed (with CV)"}
+
+# Registry model types the approaches are served under (prediction_service.py)
+APPROACH_MODEL_TYPES = {"raw": "direction", "cv": "price"}
+
+EVAL_CACHE_DIR = os.environ.get("EVAL_CACHE_DIR", os.path.join(MODEL_STORE_DIR, "eval_cache"))
+
+# Price data of the current process (set once per worker)
+_PRICES = {}
+
+
+def _frame_hash(df):
+    h = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()[:16]
+
+
+def _cached(path, build, refresh=False):
+    """Load path with joblib, or build the value and store it there"""
+    if not refresh and os.path.exists(path):
+        try:
+            return joblib.load(path)
+        except Exception as e:
+            print(f"✗ Ignoring unreadable cache {os.path.basename(path)}: {e}")
+
+    value = build()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    joblib.dump(value, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return value
+
+
+def load_prices(symbol, period="2y", cache_dir=EVAL_CACHE_DIR, refresh=False):
+    """fetch_crypto_data, cached on disk for the rest of the day"""
+    path = os.path.join(cache_dir, f"prices_{symbol}_{period}_{date.today().isoformat()}.joblib")
+    return _cached(path, lambda: fetch_crypto_data(symbol, period=period), refresh)
+
+
+def approach_features(df, approach):
+    """
+    Feature matrix of one approach.
+
+    Returns:
+        Tuple of (X, y, price_df) where price_df has Close and log_return
+    """
+    base = add_base_features(df)
+    if approach == "raw":
+        X, y, _ = build_features_raw(base)
+    elif approach == "cv":
+        X, y = build_features(compute_conditional_volatility(df, base_features=base))
+    else:
+        raise ValueError(f"Unknown approach: {approach}")
+    return X, y, base
+
+
+def load_features(symbol, approach, df, cache_dir=EVAL_CACHE_DIR, refresh=False):
+    """approach_features, cached per symbol, approach and price data hash"""
+    path = os.path.join(cache_dir, f"features_{symbol}_{approach}_{_frame_hash(df)}.joblib")
+    return _cached(path, lambda: approach_features(df, approach), refresh)
+
+
+def classification_report(model, X_test, y_test):
+    """Classification metrics and confusion matrix from one batched predict_proba"""
+    X_test = X_test[list(model.feature_names_in_)] if hasattr(model, "feature_names_in_") else X_test
+
+    flat = get_flat_forest(model)
+    if flat is not None:
+        proba, classes = flat.predict_proba(X_test), flat.classes_[0]
+    else:
+        proba, classes = model.predict_proba(X_test), model.classes_
+    y_pred = classes.take(np.argmax(proba, axis=1))
+    tn, fp, fn, tp = confusion_matrix(y_test, y_pred, labels=[0, 1]).ravel()
+
+    return {
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred, zero_division=0),
+        "recall": recall_score(y_test, y_pred, zero_division=0),
+        "f1": f1_score(y_test, y_pred, zero_division=0),
+        "roc_auc": roc_auc_score(y_test, proba[:, 1]) if len(np.unique(y_test)) > 1 else None,
+        "tp": int(tp),
+        "tn": int(tn),
+        "fp": int(fp),
+        "fn": int(fn)
+    }
+
+
+def evaluate_one(symbol, approach, store_dir=MODEL_STORE_DIR, cache_dir=EVAL_CACHE_DIR,
+                 test_size=0.2, n_price_samples=10, refresh=False, prices=None):
+    """
+    Evaluate one symbol x approach.
+
+    Args:
+        symbol: Crypto symbol
+        approach: "raw" or "cv"
+        store_dir: ModelRegistry directory the model is fetched from / trained into
+        cache_dir: Feature cache directory
+        test_size: Held-out share, as train_rf
+        n_price_samples: Rows used for the price-projection error (MAE/RMSE/MAPE)
+        refresh: Rebuild cached features
+        prices: {symbol: price DataFrame} (default: this worker's data)
+
+    Returns:
+        dict of metrics for one results row
+    """
+    start = time.perf_counter()
+    df = (prices if prices is not None else _PRICES)[symbol]
+    X, y, price_df = load_features(symbol, approach, df, cache_dir=cache_dir, refresh=refresh)
+
+    registry = ModelRegistry(store_dir)
+    params = load_rf_config(symbol, approach)
+    model, metrics, from_cache = registry.get_or_train(
+        symbol, APPROACH_MODEL_TYPES[approach], X, y, df=price_df, **params
+    )
+    if metrics.get("update") == "incremental":
+        # Grown trees were fit on the latest rows, which overlap the test split
+        # (only stores written before incremental models had their own key)
+        model, _, _ = train_rf(X, y, df=price_df, return_only_model=False, **params)
+        from_cache = False
+
+    # Same split as train_rf: held out from a full train_rf fit
+    _, X_test, _, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=params.get("random_state", 42)
+    )
+    result = {
+        "symbol": symbol,
+        "approach": approach,
+        "n_features": len(getattr(model, "feature_names_in_", X.columns)),
+        "train_size": len(X) - len(X_test),
+        "test_size": len(X_test)
+    }
+    result.update(classification_report(model, X_test, y_test))
+
+    # Seeded so the projected-price errors are reproducible between runs
+    np.random.seed(zlib.crc32(f"{symbol}:{approach}".encode()))
+    try:
+        predicted, _ = predict_prices_for_evaluation(model, X, price_df, n_test_samples=n_price_samples)
+        actual = price_df["Close"].iloc[-len(predicted):].values
+        result.update(calculate_regression_metrics(actual, predicted))
+    except Exception as e:
+        result.update(mae=None, rmse=None, mape=None, regression_error=str(e))
+
+    result["model_from_cache"] = from_cache
+    result["eval_time"] = time.perf_counter() - start
+    return result
+
+
+def _init_worker(prices):
+    global _PRICES
+    _PRICES = prices
+
+
+def _evaluate_task(symbol, approach, kwargs):
+    try:
+        return evaluate_one(symbol, approach, **kwargs)
+    except Exception as e:
+        return {"symbol": symbol, "approach": approach, "error": str(e)}
+
+
+def run_evaluation(symbols, approaches=APPROACHES, max_workers=None, store_dir=MODEL_STORE_DIR,
+                   cache_dir=EVAL_CACHE_DIR, refresh=False, test_size=0.2, n_price_samples=10):
+    """
+    Evaluate every symbol x approach combination.
+
+    Args:
+        symbols: Crypto symbols
+        approaches: Subset of APPROACHES
+        max_workers: Process pool size (1 runs in-process)
+        store_dir, cache_dir, refresh, test_size, n_price_samples: See evaluate_one
+
+    Returns:
+        DataFrame with one row per symbol x approach (failed rows carry 'error')
+    """
+    prices, rows = {}, []
+    for symbol in [s.upper() for s in symbols]:
+        try:
+            prices[symbol] = load_prices(symbol, cache_dir=cache_dir, refresh=refresh)
+        except Exception as e:
+            print(f"✗ Skipping {symbol}: {str(e)[:50]}")
+            rows.extend({"symbol": symbol, "approach": a, "error": str(e)} for a in approaches)
+
+    kwargs = {
+        "store_dir": store_dir,
+        "cache_dir": cache_dir,
+        "test_size": test_size,
+        "n_price_samples": n_price_samples,
+        "refresh": refresh
+    }
+    tasks = [(symbol, approach) for symbol in prices for approach in approaches]
+
+    if max_workers == 1 or len(tasks) <= 1:
+        _init_worker(prices)
+        rows.extend(_evaluate_task(s, a, kwargs) for s, a in tasks)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(prices,)
+        ) as pool:
+            futures = [pool.submit(_evaluate_task, s, a, kwargs) for s, a in tasks]
+            rows.extend(f.result() for f in futures)
+
+    return pd.DataFrame(rows)
+
+
+def results_by_approach(results, symbol):
+    """
+    {approach: metrics dict} of one symbol from run_evaluation results.
+
+    Failed evaluations are reported and left out.
+    """
+    by_approach = {}
+    for row in results[results["symbol"] == symbol.upper()].to_dict("records"):
+        error = row.get("error")
+        if isinstance(error, str):
+            print(f"❌ {APPROACH_NAMES.get(row['approach'], row['approach'])}: FAILED - {error}")
+            continue
+        by_approach[row["approach"]] = row
+    return by_approach
+
+
+def write_results(results, path):
+    """Write results as JSON (.json) or CSV (anything else)"""
+    if path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results.to_dict("records"), f, indent=2, default=str)
+    else:
+        results.to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Raw vs CV model evaluation")
+    parser.add_argument("symbols", nargs="+", help="Crypto symbols, e.g. BTC ETH")
+    parser.add_argument("--approaches", nargs="+", choices=APPROACHES, default=list(APPROACHES))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached prices and features")
+    parser.add_argument("--output", default=None, help="Write results to this CSV/JSON file")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"EVALUATION: {', '.join(args.approaches)} x {len(args.symbols)} symbols")
+    print("=" * 80)
+
+    start = time.perf_counter()
+    results = run_evaluation(args.symbols, args.approaches, max_workers=args.workers,
+                             refresh=args.refresh)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n✓ {len(results)} evaluations in {elapsed:.1f}s\n")
+    columns = [c for c in ["symbol", "approach", "accuracy", "precision", "recall", "f1",
+                           "roc_auc", "mape", "model_from_cache", "error"] if c in results]
+    print(results[columns].to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    if args.output:
+        write_results(results, args.output)
+        print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
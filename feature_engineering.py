@@ -1,5 +1,6 @@
 # feature_engineering.py
 import numpy as np
+from technical_indicators import compute_rsi
 
 
 def create_target(df):
@@ -48,3 +49,35 @@ def build_features(df):
     y = df["target"]
 
     return X, y
+
+
+def add_base_features(df):
+    """
+    Log return and RSI on the full price history.
+
+    Shared by both models: build_features_raw uses them directly and
+    compute_conditional_volatility(df, base_features=...) reuses them
+    instead of recomputing.
+    """
+    df = df.copy()
+    df['log_return'] = np.log(df['Close'] / df['Close'].shift(1))
+    df['rsi_14'] = compute_rsi(df['Close'])
+    df['rsi_slope'] = df['rsi_14'].diff()
+    return df
+
+
+def build_features_raw(df):
+    """Build features from raw data (no CV processing)"""
+    if 'rsi_slope' not in df.columns:
+        df = add_base_features(df)
+    else:
+        df = df.copy()
+    df['target'] = (df['log_return'].shift(-1) > 0).astype(int)
+    df['return_lag1'] = df['log_return'].shift(1)
+    df['return_lag2'] = df['log_return'].shift(2)
+    
+    df = df.dropna()
+    feature_cols = ['return_lag1', 'return_lag2', 'rsi_14', 'rsi_slope']
+    X = df[feature_cols]
+    y = df['target']
+    return X, y, df  # Return df too so it has log_return for predictions
@@ -4,6 +4,24 @@ import requests
 from datetime import datetime, timedelta
 import time
 
+# CoinLore coin IDs
+symbol_to_id = {
+    'BTC': 90, 'ETH': 80, 'BNB': 2710, 'XRP': 58, 'ADA': 257,
+    'DOGE': 2, 'SOL': 48543, 'DOT': 35683, 'MATIC': 33536,
+    'LTC': 1, 'AVAX': 44883, 'LINK': 2321, 'UNI': 33538,
+    'ATOM': 33285, 'XLM': 4, 'ALGO': 33234, 'VET': 2655,
+    'FIL': 33536, 'TRX': 2713, 'NEAR': 44444, 'APT': 50000,
+    'ARB': 51000, 'SHIB': 44444, 'AAVE': 33234, 'MKR': 33285,
+    'COMP': 33537, 'CRV': 33536, 'CAKE': 33539, 'SUSHI': 33543,
+    'OP': 50500, 'USDT': 518, 'USDC': 33285, 'DAI': 33285,
+    'BUSD': 33285, 'SNX': 33285, 'LDO': 44444, 'XVS': 33285,
+    'ALPACA': 44444, 'RAY': 44444, 'SRM': 44444, 'JOE': 44444,
+    'IMX': 44444, 'APE': 44444, 'SAND': 33285, 'MANA': 33285,
+    'AXS': 33285, 'GALA': 44444, 'FET': 33285, 'OCEAN': 33285,
+    'GRT': 33285, 'RNDR': 44444, 'PEPE': 44444, 'FLOKI': 44444,
+    'ICP': 33285
+}
+
 def fetch_crypto_data(symbol, period="2y"):
     """
     Fetch crypto data from CoinLore API
@@ -15,24 +33,6 @@ def fetch_crypto_data(symbol, period="2y"):
     Returns:
         pandas.DataFrame: OHLCV data
     """
-    # CoinLore coin IDs
-    symbol_to_id = {
-        'BTC': 90, 'ETH': 80, 'BNB': 2710, 'XRP': 58, 'ADA': 257,
-        'DOGE': 2, 'SOL': 48543, 'DOT': 35683, 'MATIC': 33536,
-        'LTC': 1, 'AVAX': 44883, 'LINK': 2321, 'UNI': 33538,
-        'ATOM': 33285, 'XLM': 4, 'ALGO': 33234, 'VET': 2655,
-        'FIL': 33536, 'TRX': 2713, 'NEAR': 44444, 'APT': 50000,
-        'ARB': 51000, 'SHIB': 44444, 'AAVE': 33234, 'MKR': 33285,
-        'COMP': 33537, 'CRV': 33536, 'CAKE': 33539, 'SUSHI': 33543,
-        'OP': 50500, 'USDT': 518, 'USDC': 33285, 'DAI': 33285,
-        'BUSD': 33285, 'SNX': 33285, 'LDO': 44444, 'XVS': 33285,
-        'ALPACA': 44444, 'RAY': 44444, 'SRM': 44444, 'JOE': 44444,
-        'IMX': 44444, 'APE': 44444, 'SAND': 33285, 'MANA': 33285,
-        'AXS': 33285, 'GALA': 44444, 'FET': 33285, 'OCEAN': 33285,
-        'GRT': 33285, 'RNDR': 44444, 'PEPE': 44444, 'FLOKI': 44444,
-        'ICP': 33285
-    }
-    
     coin_id = symbol_to_id.get(symbol.upper())
     if not coin_id:
         raise ValueError(f"Unsupported crypto: {symbol}")
@@ -0,0 +1,238 @@
+# hyperparameter_search.py
+"""
+Parallel RandomForest hyperparameter and feature-set search.
+
+Candidates (RF settings x feature subsets) are scored on walk-forward
+folds with successive halving: every candidate starts on a couple of the
+most recent folds, only the best 1/eta move on to more folds, so poor
+configurations stop early. Feature matrices and fold boundaries are
+built once and shared by every candidate; fold fits run across a process
+pool.
+
+The winner per symbol is written to rf_config.json, which train_rf reads
+(train_model.load_rf_config).
+
+Usage:
+    python hyperparameter_search.py BTC ETH --approach raw --candidates 24
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from panel_features import build_symbol_tensor
+from backtesting import _init_worker, evaluate_fold, feature_matrices, walk_forward_folds
+from train_model import RF_CONFIG_PATH
+
+PARAM_GRID = {
+    "n_estimators": [50, 100, 200, 400],
+    "max_depth": [3, 5, 8, None],
+    "min_samples_leaf": [1, 5, 20],
+    "max_features": ["sqrt", None]
+}
+
+FEATURE_GROUPS = {
+    "returns": ["return_lag1", "return_lag2"],
+    "cv": ["cv_lag1", "cv_lag2"],
+    "rsi": ["rsi_14", "rsi_slope"]
+}
+
+
+def candidate_feature_sets(feature_names):
+    """All features, plus every set with one feature group left out"""
+    sets = [list(feature_names)]
+    for group in FEATURE_GROUPS.values():
+        if not set(group) & set(feature_names):
+            continue
+        remaining = [f for f in feature_names if f not in group]
+        if remaining:
+            sets.append(remaining)
+    return sets
+
+
+def sample_candidates(feature_names, n_candidates=24, seed=42):
+    """
+    Random sample of (params, features) candidates from the grid.
+
+    Returns:
+        List of dicts with 'params' and 'features'
+    """
+    keys = list(PARAM_GRID)
+    grid = [
+        {"params": dict(zip(keys, values)), "features": features}
+        for values in itertools.product(*PARAM_GRID.values())
+        for features in candidate_feature_sets(feature_names)
+    ]
+    rng = np.random.default_rng(seed)
+    picked = rng.choice(len(grid), size=min(n_candidates, len(grid)), replace=False)
+    return [grid[i] for i in sorted(picked)]
+
+
+def successive_halving(matrices, feature_names, candidates, folds, eta=3, min_folds=2,
+                       max_workers=None):
+    """
+    Pick the best candidate per symbol with successive halving over folds.
+
+    Args:
+        matrices: {symbol: (X, y)} from backtesting.feature_matrices
+        feature_names: Column names of the matrices
+        candidates: List from sample_candidates
+        folds: {symbol: list of fold bounds}; symbols without a single fold
+            (fewer than train_size + test_size rows) are skipped
+        eta: Keep the best 1/eta candidates after each rung
+        min_folds: Folds evaluated in the first rung (multiplied by eta each rung)
+        max_workers: Process pool size
+
+    Returns:
+        {symbol: {'params', 'features', 'score', 'folds_evaluated', 'rungs'}}
+    """
+    feature_idx = [
+        [feature_names.index(f) for f in c["features"]] for c in candidates
+    ]
+    for symbol in [s for s in matrices if not folds.get(s)]:
+        print(f"✗ {symbol}: {len(matrices[symbol][0])} rows, too few for one walk-forward fold; skipped")
+    matrices = {symbol: m for symbol, m in matrices.items() if folds.get(symbol)}
+
+    # Most recent folds first: the first rungs judge candidates on recent behaviour
+    fold_order = {symbol: list(reversed(f)) for symbol, f in folds.items()}
+    survivors = {symbol: list(range(len(candidates))) for symbol in matrices}
+    counts = {}  # (symbol, candidate) -> [n_correct, n_test, n_folds]
+    rungs = {symbol: [] for symbol in matrices}
+
+    def score(symbol, cid):
+        correct, total, _ = counts.get((symbol, cid), (0, 0, 0))
+        return correct / total if total else 0.0
+
+    budget = min_folds
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker, initargs=(matrices,)
+    ) as pool:
+        while True:
+            futures = []
+            for symbol, cids in survivors.items():
+                for cid in cids:
+                    done = counts.get((symbol, cid), (0, 0, 0))[2]
+                    for fold_id in range(done, min(budget, len(fold_order[symbol]))):
+                        futures.append((symbol, cid, pool.submit(
+                            evaluate_fold,
+                            symbol,
+                            fold_id,
+                            fold_order[symbol][fold_id],
+                            model_params=candidates[cid]["params"],
+                            feature_idx=feature_idx[cid]
+                        )))
+
+            for symbol, cid, future in futures:
+                result = future.result()
+                correct, total, n = counts.get((symbol, cid), (0, 0, 0))
+                counts[(symbol, cid)] = (correct + result["n_correct"], total + result["n_test"], n + 1)
+
+            finished = True
+            for symbol, cids in survivors.items():
+                ranked = sorted(cids, key=lambda c: score(symbol, c), reverse=True)
+                rungs[symbol].append({
+                    "folds": min(budget, len(fold_order[symbol])),
+                    "candidates": len(ranked),
+                    "best_score": score(symbol, ranked[0])
+                })
+                if len(ranked) > 1 and budget < len(fold_order[symbol]):
+                    survivors[symbol] = ranked[:max(1, len(ranked) // eta)]
+                    finished = False
+                else:
+                    survivors[symbol] = ranked[:1]
+
+            if finished:
+                break
+            budget *= eta
+
+    best = {}
+    for symbol, cids in survivors.items():
+        cid = cids[0]
+        best[symbol] = {
+            "params": candidates[cid]["params"],
+            "features": candidates[cid]["features"],
+            "score": score(symbol, cid),
+            "folds_evaluated": counts[(symbol, cid)][2],
+            "rungs": rungs[symbol]
+        }
+    return best
+
+
+def write_rf_config(best, approach, path=None):
+    """Merge the winning configs into the rf_config.json read by train_rf"""
+    path = path or RF_CONFIG_PATH
+    config = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+    for symbol, entry in best.items():
+        config.setdefault(symbol, {})[approach] = {
+            "params": entry["params"],
+            "features": entry["features"],
+            "walk_forward_accuracy": entry["score"],
+            "searched_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive-halving RF search")
+    parser.add_argument("symbols", nargs="+", help="Crypto symbols, e.g. BTC ETH")
+    parser.add_argument("--approach", choices=["raw", "cv"], default="raw")
+    parser.add_argument("--candidates", type=int, default=24)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--min-folds", type=int, default=2)
+    parser.add_argument("--mode", choices=["expanding", "rolling"], default="expanding")
+    parser.add_argument("--train-size", type=int, default=365)
+    parser.add_argument("--test-size", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--config", default=None, help="Output file (default: rf_config.json)")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"HYPERPARAMETER SEARCH ({args.approach}, {args.candidates} candidates, eta={args.eta})")
+    print("=" * 80)
+
+    tensor = build_symbol_tensor([s.upper() for s in args.symbols], approach=args.approach)
+    matrices = feature_matrices(tensor)
+    folds = {
+        symbol: walk_forward_folds(len(X), args.mode, args.train_size, args.test_size)
+        for symbol, (X, _) in matrices.items()
+    }
+    candidates = sample_candidates(tensor.feature_names, args.candidates, seed=args.seed)
+
+    start = time.perf_counter()
+    best = successive_halving(
+        matrices,
+        tensor.feature_names,
+        candidates,
+        folds,
+        eta=args.eta,
+        min_folds=args.min_folds,
+        max_workers=args.workers
+    )
+    print(f"\n✓ Search finished in {time.perf_counter() - start:.1f}s\n")
+
+    for symbol, entry in best.items():
+        print(f"{symbol}: accuracy {entry['score']:.4f} over {entry['folds_evaluated']} folds")
+        print(f"    params:   {entry['params']}")
+        print(f"    features: {entry['features']}")
+        for rung in entry["rungs"]:
+            print(f"    rung: {rung['candidates']} candidates x {rung['folds']} folds "
+                  f"(best {rung['best_score']:.4f})")
+
+    write_rf_config(best, args.approach, args.config)
+    print(f"\n✓ Winning configs written to {args.config or RF_CONFIG_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# incremental_training.py
+"""
+Incremental RandomForest updates for newly arrived days.
+
+Instead of throwing the forest away when a day is appended, grow_forest()
+adds a few trees fitted on the most recent rows (warm_start) and retires
+the oldest trees so the forest size stays bounded. DriftMonitor scores
+each newly labelled day with the model that existed before it arrived
+and asks for a full retrain only when rolling accuracy falls too far
+below the accuracy measured at the last full training.
+"""
+import copy
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from train_model import train_rf
+
+
+class DriftMonitor:
+    """
+    Rolling accuracy on newly labelled days vs the last full-training accuracy.
+
+    Args:
+        baseline_accuracy: Test accuracy of the last full training
+        window: Number of recent predictions kept
+        tolerance: Allowed accuracy drop before a retrain is requested
+        min_samples: Predictions needed before drift can trigger
+    """
+
+    def __init__(self, baseline_accuracy, window=30, tolerance=0.05, min_samples=10, hits=None):
+        self.baseline_accuracy = float(baseline_accuracy)
+        self.window = window
+        self.tolerance = tolerance
+        self.min_samples = min_samples
+        self.hits = deque(hits or [], maxlen=window)
+
+    def update(self, y_true, y_pred):
+        for t, p in zip(np.asarray(y_true), np.asarray(y_pred)):
+            self.hits.append(int(t == p))
+
+    @property
+    def rolling_accuracy(self):
+        if not self.hits:
+            return None
+        return float(np.mean(self.hits))
+
+    def needs_retrain(self):
+        if len(self.hits) < self.min_samples:
+            return False
+        return self.rolling_accuracy < self.baseline_accuracy - self.tolerance
+
+    def to_dict(self):
+        return {
+            "baseline_accuracy": self.baseline_accuracy,
+            "window": self.window,
+            "tolerance": self.tolerance,
+            "min_samples": self.min_samples,
+            "hits": list(self.hits)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def grow_forest(model, X_recent, y_recent, n_new_trees=20, max_trees=200, seed=None):
+    """
+    Add trees fitted on recent data and retire the oldest ones.
+
+    Args:
+        model: Fitted RandomForestClassifier (not modified)
+        X_recent, y_recent: Recent rows the new trees are fitted on
+        n_new_trees: Trees added per update
+        max_trees: Forest size cap; the oldest trees beyond it are dropped
+        seed: random_state for the new trees (vary it between updates so
+            new trees do not reuse the bootstrap draws of retired ones)
+
+    Returns:
+        A new fitted model
+    """
+    model = copy.deepcopy(model)
+    params = {"warm_start": True, "n_estimators": len(model.estimators_) + n_new_trees}
+    if seed is not None:
+        params["random_state"] = seed
+    model.set_params(**params)
+    model.fit(X_recent, y_recent)
+
+    if len(model.estimators_) > max_trees:
+        model.estimators_ = model.estimators_[-max_trees:]
+    model.set_params(warm_start=False, n_estimators=len(model.estimators_))
+    return model
+
+
+def update_or_retrain(model, state, X, y, df=None, n_new_trees=20, max_trees=200,
+                      recent_window=180, train_kwargs=None):
+    """
+    Bring a model up to date with the latest data.
+
+    Rows of X after state['last_labelled'] are treated as new. Their
+    targets are scored with the existing model first (drift check), then
+    either a few trees are added or, on drift, the model is retrained.
+
+    Args:
+        model: Model from the previous call (or None to train from scratch)
+        state: dict returned by the previous call (or None)
+        X, y: Full feature matrix and target (latest row last)
+        df: Price DataFrame forwarded to train_rf on full retrains
+        n_new_trees, max_trees: See grow_forest
+        recent_window: Number of most recent rows used to fit new trees
+        train_kwargs: Extra keyword arguments for train_rf
+
+    Returns:
+        Tuple of (model, metrics, state)
+    """
+    train_kwargs = train_kwargs or {}
+    if train_kwargs.get("features"):
+        X = X[list(train_kwargs["features"])]
+    # The last row's target is the unknown next day, so it is not labelled yet
+    labelled_X, labelled_y = X.iloc[:-1], y.iloc[:-1]
+
+    if model is not None and state is not None:
+        drift = DriftMonitor.from_dict(state["drift"])
+        # Compare calendar days: fetch timestamps carry the time of the request
+        last_labelled = pd.Timestamp(state["last_labelled"]).normalize()
+        new_rows = pd.to_datetime(labelled_X.index).normalize() > last_labelled
+
+        if not new_rows.any():
+            return model, state["metrics"], state
+
+        drift.update(labelled_y[new_rows], model.predict(labelled_X[new_rows]))
+
+        if not drift.needs_retrain():
+            updates = state["updates"] + 1
+            model = grow_forest(
+                model,
+                labelled_X.iloc[-recent_window:],
+                labelled_y.iloc[-recent_window:],
+                n_new_trees=n_new_trees,
+                max_trees=max_trees,
+                seed=train_kwargs.get("random_state", 42) + updates
+            )
+            metrics = dict(
+                state["metrics"],
+                update="incremental",
+                n_estimators=len(model.estimators_),
+                rolling_accuracy=drift.rolling_accuracy
+            )
+            state = dict(
+                state,
+                last_labelled=str(labelled_X.index[-1]),
+                updates=updates,
+                drift=drift.to_dict(),
+                metrics=metrics
+            )
+            return model, metrics, state
+
+        print(
+            f"✗ Accuracy drift ({drift.rolling_accuracy:.3f} vs "
+            f"{drift.baseline_accuracy:.3f}), retraining from scratch"
+        )
+
+    model, metrics, _ = train_rf(X, y, df=df, return_only_model=False, **train_kwargs)
+    metrics = dict(
+        metrics,
+        update="full",
+        n_estimators=len(model.estimators_),
+        rolling_accuracy=None
+    )
+    state = {
+        "last_labelled": str(labelled_X.index[-1]),
+        "updates": 0,
+        "drift": DriftMonitor(metrics["accuracy"]).to_dict(),
+        "metrics": metrics
+    }
+    return model, metrics, state
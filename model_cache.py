@@ -0,0 +1,160 @@
+# model_cache.py
+"""
+In-process model cache bounded by bytes instead of by model count.
+
+Each entry's size is measured when it is stored (array bytes for flattened
+forests, serialized size for sklearn models). When the resident total goes
+over the budget, the least recently used entries are evicted. For pinned
+symbols the newest entry of each (symbol, model_type) is never evicted, so
+hot symbols stay loaded even if that means running over the budget; their
+older data versions are evicted like any other entry.
+"""
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+from tree_inference import FlatForest
+
+MODEL_CACHE_BYTES = int(os.environ.get("MODEL_CACHE_BYTES", str(256 * 1024 * 1024)))
+PINNED_SYMBOLS = [s for s in os.environ.get("PINNED_SYMBOLS", "").upper().split(",") if s]
+
+
+def model_nbytes(model):
+    """
+    Approximate resident size of a fitted model in bytes.
+
+    Flattened forests are measured by their arrays; anything else by its
+    pickled size, which for sklearn models is dominated by the same NumPy
+    buffers that live in memory.
+    """
+    if isinstance(model, FlatForest):
+        arrays = (model.feature, model.threshold, model._children, model.missing_left,
+                  model.values, model.roots)
+        return int(sum(a.nbytes for a in arrays))
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class ModelCache:
+    """
+    Thread-safe LRU cache with a byte budget.
+
+    Keys are ModelRegistry keys: (symbol, model_type, data version, params hash).
+
+    Args:
+        max_bytes: Byte budget for unpinned entries
+        pinned_symbols: Symbols whose newest entry per model type is never evicted
+        sizer: Function returning the size of a cached value in bytes
+    """
+
+    def __init__(self, max_bytes=MODEL_CACHE_BYTES, pinned_symbols=PINNED_SYMBOLS, sizer=model_nbytes):
+        self.max_bytes = max_bytes
+        self.pinned_symbols = {s.upper() for s in pinned_symbols}
+        self.sizer = sizer
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self._newest = {}  # (symbol, model_type) -> most recently stored key
+        self._resident = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def _is_pinned(self, key):
+        return key[0] in self.pinned_symbols and self._newest.get(key[:2]) == key
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes=None):
+        """
+        Store a value, evicting least recently used entries to stay in budget.
+
+        Returns:
+            True if the value was cached (False if it alone exceeds the budget)
+        """
+        nbytes = self.sizer(value) if nbytes is None else nbytes
+
+        with self._lock:
+            if key[0] not in self.pinned_symbols and nbytes > self.max_bytes:
+                self.rejected += 1
+                return False
+
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._resident -= old[1]
+            self._entries[key] = (value, nbytes)
+            self._resident += nbytes
+            self._newest[key[:2]] = key
+            self._evict()
+            return True
+
+    def _evict(self):
+        # Oldest first; pinned entries are skipped, not evicted
+        for key in list(self._entries):
+            if self._resident <= self.max_bytes:
+                break
+            if self._is_pinned(key):
+                continue
+            _, nbytes = self._entries.pop(key)
+            self._resident -= nbytes
+            self.evictions += 1
+
+    def discard(self, key):
+        """Drop an entry (e.g. a superseded model version) if it is cached"""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._resident -= old[1]
+            if self._newest.get(key[:2]) == key:
+                del self._newest[key[:2]]
+
+    def pin(self, symbol):
+        with self._lock:
+            self.pinned_symbols.add(symbol.upper())
+
+    def unpin(self, symbol):
+        with self._lock:
+            self.pinned_symbols.discard(symbol.upper())
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._newest.clear()
+            self._resident = 0
+
+    @property
+    def resident_bytes(self):
+        return self._resident
+
+    def stats(self):
+        """Counters and resident entries, for the /api/model-cache endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "max_bytes": self.max_bytes,
+                "resident_bytes": self._resident,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+                "pinned_symbols": sorted(self.pinned_symbols),
+                "models": [
+                    {
+                        "key": "_".join(map(str, key)),
+                        "bytes": nbytes,
+                        "pinned": self._is_pinned(key)
+                    }
+                    for key, (_, nbytes) in reversed(self._entries.items())
+                ]
+            }
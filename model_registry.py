@@ -0,0 +1,307 @@
+# model_registry.py
+"""
+Persistent registry of fitted models.
+
+Models are keyed by (symbol, model_type, data version, hyperparameters hash),
+stored on disk with joblib and loaded memory-mapped on demand. A byte-budgeted
+in-process LRU (model_cache.ModelCache) keeps the most recently used models
+ready, so identical /predict requests reuse the same fitted model instead of
+retraining it.
+"""
+import glob
+import hashlib
+import inspect
+import json
+import os
+import re
+import shutil
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from train_model import train_rf
+from incremental_training import update_or_retrain
+from compact_model import compact_forest, load_compact_forest, save_compact_forest
+from model_cache import ModelCache, MODEL_CACHE_BYTES, PINNED_SYMBOLS, model_nbytes
+
+MODEL_STORE_DIR = os.environ.get("MODEL_STORE_DIR", "model_store")
+
+# Serve forests from the compact float32/uint16 format (compact_model.py)
+COMPACT_MODELS = os.environ.get("COMPACT_MODELS", "0") == "1"
+
+# Arguments of the training function that are data, not hyperparameters
+_DATA_ARGS = {"X", "y", "df", "return_only_model"}
+
+
+def data_version(X, y):
+    """
+    Short content hash of the training data (features + target + dates).
+
+    The index is reduced to calendar days: fetch timestamps carry the time
+    of the request, so the same data fetched twice must give the same key.
+    """
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    days = pd.to_datetime(X.index).normalize()
+    h.update(pd.util.hash_pandas_object(pd.Series(days), index=False).values.tobytes())
+    h.update(pd.util.hash_pandas_object(y, index=False).values.tobytes())
+    h.update(",".join(map(str, X.columns)).encode())
+    return h.hexdigest()[:16]
+
+
+def resolve_params(train_fn, params):
+    """Merge explicit training params with the defaults of train_fn"""
+    resolved = {}
+    for name, p in inspect.signature(train_fn).parameters.items():
+        if name in _DATA_ARGS or p.default is inspect.Parameter.empty:
+            continue
+        resolved[name] = p.default
+    resolved.update(params)
+    return resolved
+
+
+def params_hash(params):
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+def _to_builtin(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class ModelRegistry:
+    """
+    Disk-backed model store with an in-process LRU.
+
+    Args:
+        store_dir: Directory where models (.joblib) and metrics (.json) are written
+        max_memory_bytes: Byte budget of the in-process model cache
+        mmap_mode: joblib mmap mode used when loading models from disk
+        compact: Also store forests as CompactForest directories and serve those
+            (the .joblib file is kept for incremental updates)
+        pinned_symbols: Symbols whose newest models are never evicted from memory
+    """
+
+    def __init__(self, store_dir=MODEL_STORE_DIR, max_memory_bytes=MODEL_CACHE_BYTES,
+                 mmap_mode="r", compact=COMPACT_MODELS, pinned_symbols=PINNED_SYMBOLS):
+        self.store_dir = store_dir
+        self.mmap_mode = mmap_mode
+        self.compact = compact
+        self.cache = ModelCache(max_bytes=max_memory_bytes, pinned_symbols=pinned_symbols)
+
+    def make_key(self, symbol, model_type, X, y, params):
+        return (
+            symbol.upper(),
+            model_type,
+            data_version(X, y),
+            params_hash(params)
+        )
+
+    def _paths(self, key):
+        symbol, model_type, version, phash = key
+        safe_symbol = re.sub(r"[^A-Z0-9]", "_", symbol)
+        stem = f"{safe_symbol}_{model_type}_{version}_{phash}"
+        return (
+            os.path.join(self.store_dir, stem + ".joblib"),
+            os.path.join(self.store_dir, stem + ".json")
+        )
+
+    def _compact_path(self, key):
+        return os.path.splitext(self._paths(key)[0])[0] + ".compact"
+
+    def _remember(self, key, entry):
+        self.cache.put(key, entry, nbytes=model_nbytes(entry[0]))
+
+    def get(self, key, full=False):
+        """
+        Look up a fitted model.
+
+        Args:
+            key: Registry key
+            full: Load the original sklearn model even when a compact copy is
+                served (needed to grow a forest); bypasses the in-memory LRU
+
+        Returns:
+            (model, metrics) or None if the key has never been trained
+        """
+        if not full:
+            entry = self.cache.get(key)
+            if entry is not None:
+                return entry
+
+        model_path, meta_path = self._paths(key)
+        if not (os.path.exists(model_path) and os.path.exists(meta_path)):
+            return None
+
+        compact_path = self._compact_path(key)
+        try:
+            if self.compact and not full and os.path.isdir(compact_path):
+                model = load_compact_forest(compact_path, mmap_mode=self.mmap_mode)
+            else:
+                model = joblib.load(model_path, mmap_mode=self.mmap_mode)
+                if self.compact and not full:
+                    # stored before compact mode was enabled: convert once
+                    try:
+                        save_compact_forest(compact_forest(model), compact_path)
+                        model = load_compact_forest(compact_path, mmap_mode=self.mmap_mode)
+                    except ValueError:
+                        pass
+            with open(meta_path, "r", encoding="utf-8") as f:
+                metrics = json.load(f)["metrics"]
+        except Exception as e:
+            print(f"✗ Could not load model {os.path.basename(model_path)}: {e}")
+            return None
+
+        entry = (model, metrics)
+        if not full:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, model, metrics, params=None, state=None):
+        """Persist a fitted model and its metrics, and keep it in memory"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        model_path, meta_path = self._paths(key)
+        metrics = {k: _to_builtin(v) for k, v in metrics.items()}
+
+        # Write to temp files first so a crash never leaves half a model behind
+        joblib.dump(model, model_path + ".tmp")
+        os.replace(model_path + ".tmp", model_path)
+
+        served = model
+        if self.compact:
+            try:
+                compact = compact_forest(model)
+                save_compact_forest(compact, self._compact_path(key))
+                served = load_compact_forest(self._compact_path(key), mmap_mode=self.mmap_mode)
+            except ValueError:
+                pass  # not a forest; served as is
+
+        meta = {
+            "symbol": key[0],
+            "model_type": key[1],
+            "data_version": key[2],
+            "params_hash": key[3],
+            "params": params or {},
+            "metrics": metrics,
+            "state": state
+        }
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, default=_json_default)
+        os.replace(meta_path + ".tmp", meta_path)
+
+        self._remember(key, (served, metrics))
+        self._drop_superseded(key)
+
+    def _drop_superseded(self, key):
+        """Delete older data versions of (symbol, model_type, params) once key is stored"""
+        symbol, model_type, version, phash = key
+        for meta_path in glob.glob(self._paths((symbol, model_type, "*", phash))[1]):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    old_version = json.load(f)["data_version"]
+            except (OSError, ValueError, KeyError):
+                continue
+            if old_version == version:
+                continue
+
+            old_key = (symbol, model_type, old_version, phash)
+            self.cache.discard(old_key)
+            model_path, _ = self._paths(old_key)
+            for path in (meta_path, model_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            shutil.rmtree(self._compact_path(old_key), ignore_errors=True)
+
+    def get_or_train(self, symbol, model_type, X, y, df=None, train_fn=train_rf, **params):
+        """
+        Return a fitted model for this data, training it only if needed.
+
+        Args:
+            symbol: Crypto symbol
+            model_type: "direction", "price", ...
+            X, y: Training features and target
+            df: Price DataFrame forwarded to train_fn (regression metrics)
+            train_fn: Training function with the train_rf signature
+            **params: Hyperparameters forwarded to train_fn
+
+        Returns:
+            Tuple of (model, metrics, from_cache)
+        """
+        resolved = resolve_params(train_fn, params)
+        key = self.make_key(symbol, model_type, X, y, dict(resolved, train_fn=train_fn.__name__))
+
+        entry = self.get(key)
+        if entry is not None:
+            model, metrics = entry
+            return model, metrics, True
+
+        model, metrics, _ = train_fn(X, y, df=df, return_only_model=False, **params)
+        self.put(key, model, metrics, params=resolved)
+        return model, metrics, False
+
+    def _latest_key(self, symbol, model_type, phash):
+        """Most recently written key for (symbol, model_type, params), any data version"""
+        pattern = self._paths((symbol, model_type, "*", phash))[1]
+        metas = glob.glob(pattern)
+        if not metas:
+            return None, None
+
+        newest = max(metas, key=os.path.getmtime)
+        try:
+            with open(newest, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+        key = (meta["symbol"], meta["model_type"], meta["data_version"], meta["params_hash"])
+        return key, meta.get("state")
+
+    def get_or_update(self, symbol, model_type, X, y, df=None, n_new_trees=20,
+                      max_trees=200, **params):
+        """
+        Like get_or_train, but new data grows the previous model incrementally.
+
+        The newest stored model for (symbol, model_type, params) is updated
+        with incremental_training.update_or_retrain, which adds a few trees
+        on recent rows and falls back to a full train_rf on accuracy drift.
+
+        Returns:
+            Tuple of (model, metrics, from_cache)
+        """
+        # Own params hash: a warm_start-grown forest must never be served to
+        # get_or_train callers as if it had been fully trained
+        resolved = dict(resolve_params(train_rf, params), train_fn="train_rf_incremental")
+        key = self.make_key(symbol, model_type, X, y, resolved)
+
+        entry = self.get(key)
+        if entry is not None:
+            model, metrics = entry
+            return model, metrics, True
+
+        prev_key, state = self._latest_key(key[0], model_type, key[3])
+        prev = self.get(prev_key, full=True) if prev_key is not None and state else None
+        prev_model = prev[0] if prev is not None else None
+
+        model, metrics, state = update_or_retrain(
+            prev_model, state if prev_model is not None else None, X, y, df=df,
+            n_new_trees=n_new_trees, max_trees=max_trees, train_kwargs=params
+        )
+        if prev_model is not None and model is prev_model:
+            # No new labelled day: the stored model is still current
+            entry = self.get(prev_key)
+            if entry is not None:
+                return entry[0], entry[1], True
+
+        self.put(key, model, metrics, params=resolved, state=state)
+        return model, metrics, False
+
+    def clear_memory(self):
+        self.cache.clear()
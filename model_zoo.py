@@ -0,0 +1,209 @@
+# model_zoo.py
+"""
+Pluggable classifier backends for the direction models.
+
+Every backend is a factory returning an unfitted sklearn classifier with
+predict / predict_proba, so train_classifier (train_model.py), the
+walk-forward backtester and the registry can swap models by name:
+
+    rf           RandomForestClassifier (the original train_rf model)
+    extra_trees  ExtraTreesClassifier
+    hgb          HistGradientBoostingClassifier
+    logreg       StandardScaler + LogisticRegression
+
+Benchmark (fit time, per-row latency, size, walk-forward accuracy):
+    python model_zoo.py BTC ETH --approach raw --accuracy-bar 0.5
+"""
+import argparse
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+
+def _rf(random_state=42, **params):
+    defaults = {"n_estimators": 200, "max_depth": 5, "class_weight": "balanced"}
+    return RandomForestClassifier(random_state=random_state, **dict(defaults, **params))
+
+
+def _extra_trees(random_state=42, **params):
+    defaults = {"n_estimators": 200, "max_depth": 5, "class_weight": "balanced"}
+    return ExtraTreesClassifier(random_state=random_state, **dict(defaults, **params))
+
+
+def _hgb(random_state=42, **params):
+    defaults = {"max_iter": 200, "max_depth": 3, "learning_rate": 0.05, "class_weight": "balanced"}
+    return HistGradientBoostingClassifier(random_state=random_state, **dict(defaults, **params))
+
+
+def _logreg(random_state=42, **params):
+    defaults = {"class_weight": "balanced", "max_iter": 1000}
+    return make_pipeline(
+        StandardScaler(),
+        LogisticRegression(random_state=random_state, **dict(defaults, **params))
+    )
+
+
+MODEL_BACKENDS = {
+    "rf": _rf,
+    "extra_trees": _extra_trees,
+    "hgb": _hgb,
+    "logreg": _logreg
+}
+
+
+def make_model(backend="rf", random_state=42, **params):
+    """
+    Unfitted classifier for a backend name.
+
+    Args:
+        backend: One of MODEL_BACKENDS
+        random_state: Random seed
+        **params: Backend-specific overrides (e.g. n_estimators, max_depth)
+    """
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend: {backend}. Choose from {sorted(MODEL_BACKENDS)}")
+    return MODEL_BACKENDS[backend](random_state=random_state, **params)
+
+
+def feature_importance(model):
+    """
+    Per-feature importance as a Series, or None if the model has none.
+
+    Tree ensembles report impurity importance, logistic regression the
+    absolute standardized coefficients (normalized to sum to 1).
+    """
+    names = getattr(model, "feature_names_in_", None)
+    if names is None:
+        return None
+
+    if hasattr(model, "feature_importances_"):
+        return pd.Series(model.feature_importances_, index=names)
+
+    final = model[-1] if hasattr(model, "steps") else model
+    if hasattr(final, "coef_"):
+        coef = np.abs(final.coef_[0])
+        return pd.Series(coef / coef.sum(), index=names)
+
+    return None
+
+
+def model_size_bytes(model):
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def row_latency(model, X_row, repeat=50):
+    """Average seconds per single-row predict_proba call"""
+    model.predict_proba(X_row)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        model.predict_proba(X_row)
+    return (time.perf_counter() - start) / repeat
+
+
+def benchmark_backends(matrices, feature_names, backends=None, mode="expanding",
+                       train_size=365, test_size=30, max_workers=None):
+    """
+    Fit time, per-row latency, size and walk-forward accuracy per backend.
+
+    Args:
+        matrices: {symbol: (X, y)} from backtesting.feature_matrices
+        feature_names: Column names of the matrices
+
+    Returns:
+        DataFrame with one row per backend
+    """
+    from backtesting import run_backtest
+    from tree_inference import get_flat_forest
+
+    rows = []
+    for backend in backends or list(MODEL_BACKENDS):
+        fit_times, latencies, flat_latencies, sizes = [], [], [], []
+
+        for X, y in matrices.values():
+            X_df = pd.DataFrame(X, columns=feature_names)
+            model = make_model(backend)
+
+            start = time.perf_counter()
+            model.fit(X_df, y)
+            fit_times.append(time.perf_counter() - start)
+
+            latencies.append(row_latency(model, X_df.iloc[-1:]))
+            sizes.append(model_size_bytes(model))
+
+            flat = get_flat_forest(model)
+            if flat is not None:
+                flat_latencies.append(row_latency(flat, X_df.iloc[-1:]))
+
+        _, summary = run_backtest(
+            matrices,
+            mode=mode,
+            train_size=train_size,
+            test_size=test_size,
+            model_params={"backend": backend},
+            max_workers=max_workers
+        )
+
+        row_ms = float(np.mean(latencies)) * 1e3
+        flat_ms = float(np.mean(flat_latencies)) * 1e3 if flat_latencies else None
+        rows.append({
+            "backend": backend,
+            "fit_time_s": float(np.mean(fit_times)),
+            "row_latency_ms": row_ms,
+            "flat_row_latency_ms": flat_ms,
+            # Forests are served through FlatForest (predict_horizon_directions)
+            "serving_latency_ms": flat_ms if flat_ms is not None else row_ms,
+            "size_kb": float(np.mean(sizes)) / 1024,
+            "walk_forward_accuracy": float(summary["pooled_accuracy"].mean()),
+            "walk_forward_roc_auc": float(summary["roc_auc"].mean())
+        })
+
+    return pd.DataFrame(rows)
+
+
+def main():
+    from panel_features import build_symbol_tensor
+    from backtesting import feature_matrices
+
+    parser = argparse.ArgumentParser(description="Benchmark model backends")
+    parser.add_argument("symbols", nargs="+", help="Crypto symbols, e.g. BTC ETH")
+    parser.add_argument("--approach", choices=["raw", "cv"], default="raw")
+    parser.add_argument("--backends", default=",".join(MODEL_BACKENDS))
+    parser.add_argument("--accuracy-bar", type=float, default=0.5)
+    parser.add_argument("--train-size", type=int, default=365)
+    parser.add_argument("--test-size", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("MODEL ZOO BENCHMARK")
+    print("=" * 80)
+
+    tensor = build_symbol_tensor([s.upper() for s in args.symbols], approach=args.approach)
+    results = benchmark_backends(
+        feature_matrices(tensor),
+        tensor.feature_names,
+        backends=args.backends.split(","),
+        train_size=args.train_size,
+        test_size=args.test_size,
+        max_workers=args.workers
+    )
+    print("\n" + results.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    passing = results[results["walk_forward_accuracy"] >= args.accuracy_bar]
+    if passing.empty:
+        print(f"\n✗ No backend reaches accuracy {args.accuracy_bar:.2%}")
+    else:
+        best = passing.sort_values("serving_latency_ms").iloc[0]
+        print(f"\n✓ Cheapest backend meeting {args.accuracy_bar:.2%}: {best['backend']} "
+              f"({best['serving_latency_ms']:.3f} ms/row, accuracy {best['walk_forward_accuracy']:.4f})")
+
+
+if __name__ == "__main__":
+    main()
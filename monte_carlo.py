@@ -0,0 +1,135 @@
+# monte_carlo.py
+"""
+Vectorized Monte Carlo price paths for the next-n-days forecast.
+
+predict_next_n_days_prices draws one random path, so every refresh shows a
+different forecast. simulate_price_paths draws thousands of paths for all
+horizons in one (paths x horizon) NumPy operation, using the same drift
+rule (model direction and probability) with noise scaled by the symbol's
+conditional volatility. The median path and quantile bands are stable and
+reproducible with a seeded Generator.
+
+Benchmark:
+    python monte_carlo.py --paths 10000 --horizon 5
+"""
+import argparse
+import time
+
+import numpy as np
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.75, 0.95)
+
+
+def expected_daily_returns(preds, probs, avg_daily_return):
+    """Drift per horizon step, same rule as predict_next_n_days_prices"""
+    preds = np.asarray(preds)
+    probs = np.asarray(probs, dtype=float)
+    return np.where(
+        preds == 1,
+        avg_daily_return * probs,
+        -avg_daily_return * (1 - probs)
+    )
+
+
+def simulate_price_paths(last_price, preds, probs, avg_daily_return, daily_volatility,
+                         n_paths=5000, noise_scale=0.5, seed=None):
+    """
+    Draw price paths for every horizon at once.
+
+    Args:
+        last_price: Latest close price
+        preds, probs: Model direction (1/0) and UP probability per horizon step
+        avg_daily_return: Mean daily log return of the symbol
+        daily_volatility: Daily volatility (conditional volatility if available)
+        n_paths: Number of simulated paths
+        noise_scale: Fraction of daily_volatility used as noise std (0.5 as before)
+        seed: Seed or np.random.Generator for reproducible paths
+
+    Returns:
+        float array of shape (n_paths, horizon)
+    """
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    drift = expected_daily_returns(preds, probs, avg_daily_return)
+
+    noise = rng.normal(0.0, daily_volatility * noise_scale, size=(n_paths, len(drift)))
+    growth = 1.0 + drift + noise
+    return float(last_price) * np.cumprod(growth, axis=1)
+
+
+def summarize_paths(paths, quantiles=DEFAULT_QUANTILES):
+    """
+    Median path plus quantile bands.
+
+    Returns:
+        dict with 'median', 'mean' and 'bands' ({quantile: list per horizon})
+    """
+    qs = np.quantile(paths, [0.5, *quantiles], axis=0)
+    return {
+        "median": qs[0].tolist(),
+        "mean": paths.mean(axis=0).tolist(),
+        "bands": {float(q): row.tolist() for q, row in zip(quantiles, qs[1:])}
+    }
+
+
+def forecast_volatility(df):
+    """Latest conditional volatility if the frame has it, else historical std"""
+    if "cv" in df.columns and df["cv"].notna().any():
+        return float(df["cv"].dropna().iloc[-1])
+    return float(df["log_return"].dropna().std())
+
+
+def _loop_paths(last_price, preds, probs, avg_daily_return, daily_volatility, n_paths):
+    # Reference: one np.random.normal draw per step, as predict_next_n_days_prices
+    paths = np.empty((n_paths, len(preds)))
+    for p in range(n_paths):
+        current_price = last_price
+        for i in range(len(preds)):
+            expected_return = (
+                avg_daily_return * probs[i]
+                if preds[i] == 1
+                else -avg_daily_return * (1 - probs[i])
+            )
+            expected_return += np.random.normal(0, daily_volatility * 0.5)
+            current_price *= (1 + expected_return)
+            paths[p, i] = current_price
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vectorized Monte Carlo paths")
+    parser.add_argument("--paths", type=int, default=10000)
+    parser.add_argument("--horizon", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    preds = rng.integers(0, 2, args.horizon)
+    probs = rng.uniform(0.4, 0.6, args.horizon)
+    avg_ret, vol = 0.001, 0.03
+
+    print("=" * 60)
+    print(f"MONTE CARLO: {args.paths} paths x {args.horizon} days")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    paths = simulate_price_paths(100.0, preds, probs, avg_ret, vol, n_paths=args.paths, seed=args.seed)
+    vec_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _loop_paths(100.0, preds, probs, avg_ret, vol, n_paths=min(args.paths, 2000))
+    loop_time = (time.perf_counter() - start) * args.paths / min(args.paths, 2000)
+
+    again = simulate_price_paths(100.0, preds, probs, avg_ret, vol, n_paths=args.paths, seed=args.seed)
+    summary = summarize_paths(paths)
+
+    print(f"  Vectorized: {vec_time * 1e3:.2f} ms")
+    print(f"  Python loop (extrapolated): {loop_time * 1e3:.2f} ms")
+    print(f"  Speedup: {loop_time / vec_time:.0f}x")
+    print(f"  Reproducible with seed: {np.array_equal(paths, again)}")
+    print(f"  Median path: {[round(v, 2) for v in summary['median']]}")
+    for q, band in summary["bands"].items():
+        print(f"    q{q:.2f}: {[round(v, 2) for v in band]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# multi_horizon.py
+"""
+Direct multi-horizon direction models.
+
+The recursive forecast scores day h by shifting the last feature row h-1
+times and zeroing the unknown lag1 return / CV, so later horizons are
+scored on made-up inputs. The direct mode trains one model with one output
+per horizon instead: output h learns "is the close h days ahead higher
+than the day before it" from today's real features. All horizons then come
+from a single predict_proba call on the last feature row.
+
+RandomForest / ExtraTrees handle multi-output targets natively; other
+model_zoo backends are wrapped in MultiOutputClassifier (one model per
+horizon, trained together).
+
+Benchmark against the recursive loop:
+    python multi_horizon.py BTC ETH --horizon 5 --test-days 90
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.multioutput import MultiOutputClassifier
+
+from model_zoo import make_model
+from tree_inference import get_flat_forest
+
+HORIZON_MODES = ("recursive", "direct")
+
+
+def horizon_targets(y, n):
+    """
+    Direction h days ahead (h = 1..n) for every row, from the next-day target.
+
+    y[t] is the direction of day t+1, so the direction of day t+h is
+    y[t+h-1]. Rows must be consecutive days (build_features / build_features_raw
+    only drop leading rows). The last row of y has no known next-day return
+    and is never used as a label.
+
+    Returns:
+        int DataFrame with columns target_h1..target_hn, rows with all horizons known
+    """
+    known = y.iloc[:-1]
+    targets = pd.concat(
+        {f"target_h{h}": known.shift(-(h - 1)) for h in range(1, n + 1)},
+        axis=1
+    )
+    return targets.dropna().astype(int)
+
+
+def is_direct_model(model):
+    """True for models trained by train_direct_horizons"""
+    return getattr(model, "n_horizons_", None) is not None
+
+
+def train_direct_horizons(X, y, df=None, n_horizons=5, test_size=0.2, random_state=42,
+                          return_only_model=False, features=None, backend="rf", **model_params):
+    """
+    Train one multi-output model that predicts every horizon at once.
+
+    Args:
+        X: Features
+        y: Next-day target (as from build_features / build_features_raw)
+        df: Unused, accepted for the train_rf signature (ModelRegistry)
+        n_horizons: Number of days predicted directly
+        test_size: Proportion of rows held out for the metrics
+        random_state: Random seed
+        return_only_model: If True, returns only the model
+        features: Optional subset of X columns to train on
+        backend, **model_params: See model_zoo.make_model
+
+    Returns:
+        Same as train_rf; metrics are averaged over horizons, with
+        'horizon_accuracy' listing the accuracy of each horizon
+    """
+    if features is not None:
+        X = X[list(features)]
+
+    Y = horizon_targets(y, n_horizons)
+    X = X.loc[Y.index]
+
+    X_train, X_test, Y_train, Y_test = train_test_split(
+        X, Y, test_size=test_size, random_state=random_state
+    )
+
+    model = make_model(backend, random_state=random_state, **model_params)
+    if not isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        model = MultiOutputClassifier(model)
+    model.fit(X_train, Y_train)
+    model.n_horizons_ = n_horizons
+
+    Y_pred = np.asarray(model.predict(X_test))
+    probas = model.predict_proba(X_test)
+
+    accuracy, f1, roc_auc = [], [], []
+    for h in range(n_horizons):
+        y_true = Y_test.iloc[:, h].to_numpy()
+        accuracy.append(accuracy_score(y_true, Y_pred[:, h]))
+        f1.append(f1_score(y_true, Y_pred[:, h], zero_division=0))
+        try:
+            roc_auc.append(roc_auc_score(y_true, probas[h][:, 1]))
+        except ValueError:
+            pass
+
+    metrics = {
+        'accuracy': float(np.mean(accuracy)),
+        'f1': float(np.mean(f1)),
+        'roc_auc': float(np.mean(roc_auc)) if roc_auc else float("nan"),
+        'horizon_accuracy': accuracy,
+        'train_size': len(X_train),
+        'test_size': len(X_test),
+        'mae': None,
+        'rmse': None,
+        'mape': None
+    }
+
+    if return_only_model:
+        return model
+
+    return model, metrics, (X_train, X_test, Y_train, Y_test)
+
+
+def predict_direct_horizons(model, X, n=5):
+    """
+    Direction and UP probability for the next n days from one batched call.
+
+    Returns:
+        Tuple of (preds, probs), as predict_horizon_directions
+    """
+    if n > model.n_horizons_:
+        raise ValueError(f"Model predicts {model.n_horizons_} days, {n} requested")
+
+    X_last = X.iloc[-1:]
+    if hasattr(model, "feature_names_in_"):
+        X_last = X_last[list(model.feature_names_in_)]
+
+    flat = get_flat_forest(model)
+    if flat is not None:
+        probas, classes = flat.predict_proba(X_last), flat.classes_
+    else:
+        probas = model.predict_proba(X_last)
+        classes = [e.classes_ for e in model.estimators_]
+
+    preds, probs = [], []
+    for proba, cls in list(zip(probas, classes))[:n]:
+        preds.append(int(cls[np.argmax(proba[0])]))
+        probs.append(round(proba[0, 1], 4))
+    return preds, probs
+
+
+def _legacy_recursive(model, X, n):
+    # The original step-by-step loop: 2 sklearn calls per day
+    X_last = X.iloc[-1:].copy()
+    preds, probs = [], []
+    for _ in range(n):
+        preds.append(int(model.predict(X_last)[0]))
+        probs.append(model.predict_proba(X_last)[0][1])
+        X_last["return_lag2"] = X_last["return_lag1"]
+        X_last["return_lag1"] = 0
+        if "cv_lag1" in X_last.columns:
+            X_last["cv_lag2"] = X_last["cv_lag1"]
+            X_last["cv_lag1"] = 0
+    return preds, probs
+
+
+def compare_horizon_modes(X, y, n=5, test_days=90, **model_params):
+    """
+    Recursive vs direct forecasts on the last test_days forecast origins.
+
+    Both models are trained on the rows before the test window; each origin
+    t is scored with X up to t and compared with the realized directions.
+
+    Returns:
+        dict with per-horizon accuracy and mean latency per forecast for both modes
+    """
+    from train_model import train_rf, predict_horizon_directions
+
+    Y = horizon_targets(y, n)
+    origins = Y.index[-test_days:]
+    train_end = X.index.get_loc(origins[0])
+
+    # y[train_end - 1] is the direction of the first origin's own day, known at that origin
+    X_train, y_train = X.iloc[:train_end], y.iloc[:train_end]
+    recursive = train_rf(X_train, y_train, return_only_model=True, **model_params)
+    direct = train_direct_horizons(X_train, y.iloc[:train_end + 1], n_horizons=n,
+                                   return_only_model=True, **model_params)
+
+    hits = {"recursive": np.zeros(n), "direct": np.zeros(n)}
+    times = {"recursive": 0.0, "direct": 0.0}
+
+    for origin in origins:
+        X_hist = X.loc[:origin]
+        actual = Y.loc[origin].to_numpy()
+
+        start = time.perf_counter()
+        rec_preds, _ = predict_horizon_directions(recursive, X_hist, n)
+        times["recursive"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        dir_preds, _ = predict_direct_horizons(direct, X_hist, n)
+        times["direct"] += time.perf_counter() - start
+
+        hits["recursive"] += np.asarray(rec_preds) == actual
+        hits["direct"] += np.asarray(dir_preds) == actual
+
+    # The legacy loop is slow; time it on a few origins only
+    sample = origins[-10:]
+    start = time.perf_counter()
+    for origin in sample:
+        _legacy_recursive(recursive, X.loc[:origin], n)
+    legacy_ms = (time.perf_counter() - start) / len(sample) * 1e3
+
+    return {
+        "n_origins": len(origins),
+        "recursive_accuracy": (hits["recursive"] / len(origins)).tolist(),
+        "direct_accuracy": (hits["direct"] / len(origins)).tolist(),
+        "recursive_ms": times["recursive"] / len(origins) * 1e3,
+        "direct_ms": times["direct"] / len(origins) * 1e3,
+        "legacy_loop_ms": legacy_ms
+    }
+
+
+def main():
+    from fetch_coinlore import fetch_crypto_data
+    from feature_engineering import build_features_raw
+
+    parser = argparse.ArgumentParser(description="Recursive vs direct multi-horizon forecasts")
+    parser.add_argument("symbols", nargs="+", help="Crypto symbols, e.g. BTC ETH")
+    parser.add_argument("--horizon", type=int, default=5)
+    parser.add_argument("--test-days", type=int, default=90)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"MULTI-HORIZON BENCHMARK ({args.horizon} days, {args.test_days} forecast origins)")
+    print("=" * 80)
+
+    for symbol in args.symbols:
+        try:
+            X, y, _ = build_features_raw(fetch_crypto_data(symbol.upper()))
+            result = compare_horizon_modes(X, y, n=args.horizon, test_days=args.test_days)
+        except Exception as e:
+            print(f"\n✗ {symbol}: {str(e)[:80]}")
+            continue
+
+        print(f"\n{symbol.upper()} ({result['n_origins']} origins)")
+        print(f"  {'Horizon':<10}{'Recursive':>12}{'Direct':>12}")
+        for h, (r, d) in enumerate(zip(result["recursive_accuracy"], result["direct_accuracy"]), 1):
+            print(f"  {'t+' + str(h):<10}{r:>12.4f}{d:>12.4f}")
+        print(f"  {'Mean':<10}{np.mean(result['recursive_accuracy']):>12.4f}"
+              f"{np.mean(result['direct_accuracy']):>12.4f}")
+        print(f"  Latency per forecast: recursive {result['recursive_ms']:.2f} ms, "
+              f"direct {result['direct_ms']:.2f} ms, "
+              f"original 2n-call loop {result['legacy_loop_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
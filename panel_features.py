@@ -0,0 +1,233 @@
+# panel_features.py
+"""
+Vectorized feature builder for many symbols at once.
+
+Instead of looping over symbols and calling build_features / build_features_raw
+one DataFrame at a time, prices are aligned into a (days x symbols) panel and
+every feature is computed column-wise in one pass. The result is a
+(symbols x days x features) tensor plus targets and validity masks.
+"""
+import numpy as np
+import pandas as pd
+from fetch_coinlore import fetch_crypto_data
+from volatility_pipeline import compute_conditional_volatility
+
+RAW_FEATURES = ["return_lag1", "return_lag2", "rsi_14", "rsi_slope"]
+
+CV_FEATURES = [
+    "return_lag1",
+    "return_lag2",
+    "cv_lag1",
+    "cv_lag2",
+    "rsi_14",
+    "rsi_slope"
+]
+
+
+class FeatureTensor:
+    """
+    Container for a (symbols x days x features) feature tensor.
+
+    Attributes:
+        X: float array of shape (n_symbols, n_days, n_features)
+        y: float array of shape (n_symbols, n_days), next-day direction (1/0), NaN if unknown
+        feature_mask: bool array (n_symbols, n_days), True where every feature is finite
+        target_mask: bool array (n_symbols, n_days), True where the next-day return is known
+        symbols: list of symbols (axis 0)
+        dates: DatetimeIndex (axis 1)
+        feature_names: list of feature names (axis 2)
+    """
+
+    def __init__(self, X, y, feature_mask, target_mask, symbols, dates, feature_names):
+        self.X = X
+        self.y = y
+        self.feature_mask = feature_mask
+        self.target_mask = target_mask
+        self.symbols = list(symbols)
+        self.dates = dates
+        self.feature_names = list(feature_names)
+
+    @property
+    def mask(self):
+        """Rows usable for training: features valid and target known"""
+        return self.feature_mask & self.target_mask
+
+    @property
+    def shape(self):
+        return self.X.shape
+
+    def symbol_frame(self, symbol, require_target=True):
+        """
+        Features and target for one symbol, in the same layout as build_features.
+
+        Args:
+            symbol: Symbol to extract
+            require_target: If True, drop rows whose next-day return is unknown
+
+        Returns:
+            Tuple of (X DataFrame indexed by date, y Series)
+        """
+        s = self.symbols.index(symbol)
+        rows = self.mask[s] if require_target else self.feature_mask[s]
+
+        X = pd.DataFrame(
+            self.X[s, rows],
+            index=self.dates[rows],
+            columns=self.feature_names
+        )
+        y = pd.Series(
+            np.nan_to_num(self.y[s, rows]).astype(int),
+            index=X.index,
+            name="target"
+        )
+        return X, y
+
+    def training_arrays(self):
+        """
+        Stack the valid rows of every symbol for pooled training.
+
+        Returns:
+            Tuple of (X 2D array, y 1D int array, symbol_idx, date_idx)
+        """
+        symbol_idx, date_idx = np.nonzero(self.mask)
+        X = self.X[symbol_idx, date_idx]
+        y = self.y[symbol_idx, date_idx].astype(int)
+        return X, y, symbol_idx, date_idx
+
+    def latest_rows(self):
+        """
+        Last row with valid features for every symbol, for batch scoring.
+
+        Returns:
+            DataFrame indexed by symbol with the feature columns and a 'date' column
+        """
+        valid = self.feature_mask
+        has_any = valid.any(axis=1)
+        # index of the last True in each row
+        last_idx = valid.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+
+        symbols = [s for s, ok in zip(self.symbols, has_any) if ok]
+        idx = last_idx[has_any]
+        rows = self.X[np.nonzero(has_any)[0], idx]
+
+        latest = pd.DataFrame(rows, index=symbols, columns=self.feature_names)
+        latest["date"] = self.dates[idx]
+        return latest
+
+
+def _rolling_rsi(close_panel, period=14):
+    # Same formula as technical_indicators.compute_rsi, applied to every column
+    delta = close_panel.diff()
+    gain = delta.clip(lower=0)
+    loss = -delta.clip(upper=0)
+
+    avg_gain = gain.rolling(period).mean()
+    avg_loss = loss.rolling(period).mean()
+
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+def build_feature_tensor(close_panel, cv_panel=None):
+    """
+    Build the feature tensor for a whole price panel in one vectorized pass.
+
+    Args:
+        close_panel: DataFrame (days x symbols) of Close prices, NaN where a symbol has no data
+        cv_panel: Optional DataFrame (days x symbols) of conditional volatility.
+            If given, CV lag features are added (same columns as build_features),
+            otherwise the raw feature set of build_features_raw is produced.
+
+    Returns:
+        FeatureTensor
+    """
+    log_return = np.log(close_panel / close_panel.shift(1))
+    rsi = _rolling_rsi(close_panel)
+
+    features = {
+        "return_lag1": log_return.shift(1),
+        "return_lag2": log_return.shift(2),
+        "rsi_14": rsi,
+        "rsi_slope": rsi.diff()
+    }
+
+    if cv_panel is not None:
+        cv_panel = cv_panel.reindex(index=close_panel.index, columns=close_panel.columns)
+        features["cv_lag1"] = cv_panel.shift(1)
+        features["cv_lag2"] = cv_panel.shift(2)
+        # Rows before the CV series starts are not valid for the CV model
+        cv_valid = cv_panel.notna().to_numpy().T
+        feature_names = CV_FEATURES
+    else:
+        cv_valid = None
+        feature_names = RAW_FEATURES
+
+    # (symbols x days x features)
+    X = np.stack(
+        [features[name].to_numpy(dtype=float).T for name in feature_names],
+        axis=-1
+    )
+
+    next_return = log_return.shift(-1).to_numpy(dtype=float).T
+    target_mask = np.isfinite(next_return)
+    y = np.where(target_mask, (next_return > 0).astype(float), np.nan)
+
+    feature_mask = np.isfinite(X).all(axis=-1)
+    if cv_valid is not None:
+        feature_mask &= cv_valid
+
+    return FeatureTensor(
+        X=X,
+        y=y,
+        feature_mask=feature_mask,
+        target_mask=target_mask,
+        symbols=close_panel.columns,
+        dates=close_panel.index,
+        feature_names=feature_names
+    )
+
+
+def build_price_panel(symbols, approach="raw", period="2y"):
+    """
+    Fetch many symbols and align them on one date index.
+
+    Args:
+        symbols: List of crypto symbols
+        approach: "raw" (Close only) or "cv" (Close + conditional volatility)
+        period: History period passed to fetch_crypto_data
+
+    Returns:
+        Tuple of (close_panel, cv_panel); cv_panel is None for approach="raw"
+    """
+    closes = {}
+    cvs = {}
+    failed = []
+
+    for symbol in symbols:
+        try:
+            df = fetch_crypto_data(symbol, period=period)
+            # fetch timestamps carry time-of-day; align on calendar days
+            df.index = pd.to_datetime(df.index).normalize()
+            closes[symbol] = df["Close"]
+
+            if approach == "cv":
+                df_cv = compute_conditional_volatility(df)
+                cvs[symbol] = df_cv["cv"]
+        except Exception as e:
+            print(f"✗ Skipping {symbol}: {str(e)[:50]}")
+            failed.append(symbol)
+            closes.pop(symbol, None)
+
+    if not closes:
+        raise ValueError(f"No valid cryptos. All {len(failed)} failed.")
+
+    close_panel = pd.DataFrame(closes).sort_index()
+    cv_panel = pd.DataFrame(cvs).sort_index() if approach == "cv" else None
+
+    return close_panel, cv_panel
+
+
+def build_symbol_tensor(symbols, approach="raw", period="2y"):
+    """Fetch symbols and build their feature tensor (see build_feature_tensor)"""
+    close_panel, cv_panel = build_price_panel(symbols, approach=approach, period=period)
+    return build_feature_tensor(close_panel, cv_panel)
@@ -0,0 +1,347 @@
+# pooled_model.py
+"""
+One RandomForest for the whole symbol universe.
+
+Per-symbol models are trained on the request path (on a registry miss)
+and each sees only ~2 years of one coin. The pooled model is trained once,
+offline, on the stacked raw features of every symbol. Each symbol's
+features are z-scored with that symbol's own mean/std first, so coins
+with very different volatility share split thresholds. /predict with
+model_type "pooled" only scores: any supported ticker is normalized with
+statistics from its own history and run through the shared forest.
+
+Usage:
+    python pooled_model.py train                  # every supported symbol
+    python pooled_model.py benchmark BTC ETH SOL --test-days 60
+"""
+import argparse
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
+
+from fetch_coinlore import symbol_to_id
+from panel_features import build_symbol_tensor
+from model_zoo import make_model
+from tree_inference import get_flat_forest
+
+POOLED_MODEL_PATH = os.environ.get(
+    "POOLED_MODEL_PATH",
+    os.path.join(os.environ.get("MODEL_STORE_DIR", "model_store"), "pooled_raw.joblib")
+)
+
+_loaded = {}
+_load_lock = threading.Lock()
+
+
+def symbol_stats(X):
+    """Per-feature mean and std of one symbol's feature rows"""
+    X = np.asarray(X, dtype=float)
+    mean = np.nanmean(X, axis=0)
+    std = np.nanstd(X, axis=0)
+    std[~(std > 0)] = 1.0
+    return mean, std
+
+
+class SymbolView:
+    """
+    The pooled forest seen from one symbol: scales raw feature rows with the
+    symbol's statistics, then scores them. Exposes the classifier attributes
+    used by predict_horizon_directions / predict_price_bands.
+    """
+
+    def __init__(self, pooled, mean, std):
+        self.pooled = pooled
+        self.mean = mean
+        self.std = std
+        self.feature_names_in_ = np.array(pooled.feature_names, dtype=object)
+        self.classes_ = pooled.model.classes_
+        if hasattr(pooled.model, "feature_importances_"):
+            self.feature_importances_ = pooled.model.feature_importances_
+
+    def _scale(self, X):
+        X = np.asarray(X[list(self.feature_names_in_)] if hasattr(X, "columns") else X, dtype=float)
+        return (X - self.mean) / self.std
+
+    def predict_proba(self, X):
+        X = self._scale(X)
+        flat = get_flat_forest(self.pooled.model)
+        if flat is not None:
+            return flat.predict_proba(X)
+        return self.pooled.model.predict_proba(X)
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+class PooledModel:
+    """
+    Cross-symbol forest plus the metadata needed to score any symbol.
+
+    Attributes:
+        model: Fitted classifier trained on normalized features
+        feature_names: Feature columns (RAW_FEATURES)
+        symbols: Symbols the forest was trained on
+        metrics: Holdout metrics, overall and per symbol
+        trained_at: Training timestamp
+    """
+
+    def __init__(self, model, feature_names, symbols, metrics, trained_at=None):
+        self.model = model
+        self.feature_names = list(feature_names)
+        self.symbols = list(symbols)
+        self.metrics = metrics
+        self.trained_at = trained_at or time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def for_symbol(self, X):
+        """
+        View that scores rows of one symbol.
+
+        Args:
+            X: That symbol's feature history (build_features_raw output);
+                its mean/std normalize the rows being scored
+        """
+        mean, std = symbol_stats(X[self.feature_names])
+        return SymbolView(self, mean, std)
+
+    def symbol_metrics(self, symbol):
+        return self.metrics["per_symbol"].get(symbol.upper(), self.metrics["overall"])
+
+
+def normalized_arrays(tensor):
+    """
+    Stacked training rows with every symbol z-scored by its own statistics.
+
+    Returns:
+        Tuple of (X, y, symbol_idx, date_idx) as FeatureTensor.training_arrays
+    """
+    X = np.full_like(tensor.X, np.nan)
+    for s in range(len(tensor.symbols)):
+        rows = tensor.feature_mask[s]
+        if rows.any():
+            mean, std = symbol_stats(tensor.X[s, rows])
+            X[s, rows] = (tensor.X[s, rows] - mean) / std
+
+    symbol_idx, date_idx = np.nonzero(tensor.mask)
+    return X[symbol_idx, date_idx], tensor.y[symbol_idx, date_idx].astype(int), symbol_idx, date_idx
+
+
+def _classification_metrics(y_true, y_pred, y_proba):
+    try:
+        roc_auc = roc_auc_score(y_true, y_proba)
+    except ValueError:
+        roc_auc = None
+    return {
+        "accuracy": accuracy_score(y_true, y_pred),
+        "precision": precision_score(y_true, y_pred, zero_division=0),
+        "recall": recall_score(y_true, y_pred, zero_division=0),
+        "f1": f1_score(y_true, y_pred, zero_division=0),
+        "roc_auc": roc_auc,
+        "test_size": len(y_true)
+    }
+
+
+def holdout_split(date_idx, n_dates, test_days):
+    """Train on every date before the last test_days dates, test on the rest"""
+    cutoff = n_dates - test_days
+    return date_idx < cutoff, date_idx >= cutoff
+
+
+def train_pooled_model(tensor, test_days=60, refit=True, backend="rf", **model_params):
+    """
+    Train the pooled model on a FeatureTensor.
+
+    Args:
+        tensor: Raw-feature FeatureTensor of the symbol universe
+        test_days: Most recent dates held out for the reported metrics
+        refit: Refit on every row (including the holdout) after evaluation
+        backend, **model_params: See model_zoo.make_model
+
+    Returns:
+        PooledModel
+    """
+    X, y, symbol_idx, date_idx = normalized_arrays(tensor)
+    train, test = holdout_split(date_idx, len(tensor.dates), test_days)
+
+    model = make_model(backend, **model_params)
+    model.fit(X[train], y[train])
+
+    proba = model.predict_proba(X[test])
+    pred = model.classes_.take(np.argmax(proba, axis=1))
+    proba = proba[:, 1]
+    metrics = {
+        "overall": dict(_classification_metrics(y[test], pred, proba), train_size=int(train.sum())),
+        "per_symbol": {}
+    }
+    for s, symbol in enumerate(tensor.symbols):
+        rows = symbol_idx[test] == s
+        if rows.any():
+            metrics["per_symbol"][symbol] = _classification_metrics(y[test][rows], pred[rows], proba[rows])
+
+    if refit:
+        model = make_model(backend, **model_params)
+        model.fit(X, y)
+
+    return PooledModel(model, tensor.feature_names, tensor.symbols, metrics)
+
+
+def save_pooled_model(pooled, path=None):
+    """
+    Save the pooled model as a plain dict (forest + metadata).
+
+    PooledModel itself is not pickled: when trained from the CLI its class
+    lives in __main__, which the app could not unpickle.
+    """
+    path = path or POOLED_MODEL_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    payload = {
+        "model": pooled.model,
+        "feature_names": pooled.feature_names,
+        "symbols": pooled.symbols,
+        "metrics": pooled.metrics,
+        "trained_at": pooled.trained_at
+    }
+    joblib.dump(payload, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    _loaded.pop(path, None)
+
+
+def load_pooled_model(path=None):
+    """
+    Trained pooled model, loaded once per process and reloaded when the file changes.
+
+    Raises:
+        ValueError: If the pooled model has not been trained yet
+    """
+    path = path or POOLED_MODEL_PATH
+    if not os.path.exists(path):
+        raise ValueError("Pooled model not trained yet. Run: python pooled_model.py train")
+
+    mtime = os.path.getmtime(path)
+    with _load_lock:
+        entry = _loaded.get(path)
+        if entry is None or entry[0] != mtime:
+            payload = joblib.load(path)
+            # files written before save_pooled_model stored a dict hold the object itself
+            entry = (mtime, payload if isinstance(payload, PooledModel) else PooledModel(**payload))
+            _loaded[path] = entry
+    return entry[1]
+
+
+def check_round_trip(pooled, tensor, path=None):
+    """
+    Reload a saved pooled model and check it scores like the one in memory.
+
+    Raises:
+        ValueError: If the reloaded model differs
+    """
+    loaded = load_pooled_model(path)
+    X_sym, _ = tensor.symbol_frame(pooled.symbols[0])
+    expected = pooled.for_symbol(X_sym).predict_proba(X_sym)
+    if (loaded.symbols != pooled.symbols
+            or loaded.feature_names != pooled.feature_names
+            or not np.allclose(loaded.for_symbol(X_sym).predict_proba(X_sym), expected)):
+        raise ValueError(f"Pooled model reloaded from {path or POOLED_MODEL_PATH} does not match")
+    print(f"✓ Reloaded {type(loaded).__name__} scores identically")
+
+
+def benchmark(tensor, test_days=60, **model_params):
+    """
+    Pooled model vs one train_rf forest per symbol, on the same time holdout.
+
+    Returns:
+        Tuple of (per-symbol DataFrame, summary dict)
+    """
+    from train_model import predict_horizon_directions
+
+    start = time.perf_counter()
+    pooled = train_pooled_model(tensor, test_days=test_days, refit=False, **model_params)
+    pooled_train_time = time.perf_counter() - start
+
+    rows = []
+    per_symbol_train_time = 0.0
+    for s, symbol in enumerate(tensor.symbols):
+        if symbol not in pooled.metrics["per_symbol"]:
+            continue
+        X_sym, y_sym = tensor.symbol_frame(symbol)
+        train = X_sym.index < tensor.dates[len(tensor.dates) - test_days]
+
+        start = time.perf_counter()
+        model = make_model("rf", **model_params)
+        model.fit(X_sym[train], y_sym[train])
+        fit_time = time.perf_counter() - start
+        per_symbol_train_time += fit_time
+
+        y_test = y_sym[~train]
+        rf_metrics = _classification_metrics(
+            y_test, model.predict(X_sym[~train]), model.predict_proba(X_sym[~train])[:, 1]
+        )
+
+        # Request-path cost: per-symbol pays the fit on a cache miss, pooled only scores
+        start = time.perf_counter()
+        predict_horizon_directions(pooled.for_symbol(X_sym), X_sym, n=5)
+        pooled_latency = time.perf_counter() - start
+
+        rows.append({
+            "symbol": symbol,
+            "per_symbol_accuracy": rf_metrics["accuracy"],
+            "pooled_accuracy": pooled.metrics["per_symbol"][symbol]["accuracy"],
+            "per_symbol_request_ms": (fit_time + pooled_latency) * 1e3,
+            "pooled_request_ms": pooled_latency * 1e3,
+            "n_test": len(y_test)
+        })
+
+    results = pd.DataFrame(rows)
+    weights = results["n_test"]
+    summary = {
+        "per_symbol_accuracy": float(np.average(results["per_symbol_accuracy"], weights=weights)),
+        "pooled_accuracy": float(np.average(results["pooled_accuracy"], weights=weights)),
+        "per_symbol_train_time_s": per_symbol_train_time,
+        "pooled_train_time_s": pooled_train_time
+    }
+    return results, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pooled cross-symbol model")
+    parser.add_argument("command", choices=["train", "benchmark"])
+    parser.add_argument("symbols", nargs="*", help="Symbols (default: every supported symbol)")
+    parser.add_argument("--test-days", type=int, default=60)
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--path", default=None, help=f"Model file (default: {POOLED_MODEL_PATH})")
+    args = parser.parse_args()
+
+    symbols = [s.upper() for s in args.symbols] or sorted(symbol_to_id)
+
+    print("=" * 80)
+    print(f"POOLED MODEL: {args.command.upper()} ({len(symbols)} symbols)")
+    print("=" * 80)
+
+    tensor = build_symbol_tensor(symbols, approach="raw", period=args.period)
+
+    if args.command == "train":
+        start = time.perf_counter()
+        pooled = train_pooled_model(tensor, test_days=args.test_days)
+        save_pooled_model(pooled, args.path)
+        overall = pooled.metrics["overall"]
+        print(f"\n✓ Trained on {len(pooled.symbols)} symbols in {time.perf_counter() - start:.1f}s")
+        print(f"  Holdout accuracy: {overall['accuracy']:.4f} ({overall['test_size']} rows)")
+        print(f"✓ Saved to {args.path or POOLED_MODEL_PATH}")
+        check_round_trip(pooled, tensor, args.path)
+    else:
+        results, summary = benchmark(tensor, test_days=args.test_days)
+        print("\n" + results.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+        print(f"\n  Per-symbol train_rf: accuracy {summary['per_symbol_accuracy']:.4f}, "
+              f"total training {summary['per_symbol_train_time_s']:.2f}s")
+        print(f"  Pooled model:        accuracy {summary['pooled_accuracy']:.4f}, "
+              f"one-off training {summary['pooled_train_time_s']:.2f}s")
+        print(f"  Median request: {results['per_symbol_request_ms'].median():.1f} ms (per-symbol miss) "
+              f"vs {results['pooled_request_ms'].median():.1f} ms (pooled)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+# prediction_service.py
+"""
+Full /predict pipeline (fetch -> features -> model -> forecast) as a plain
+function, so the Flask route and the background precompute worker build
+exactly the same result dict.
+"""
+import os
+import zlib
+
+import pandas as pd
+
+from fetch_coinlore import fetch_crypto_data
+from crypto_stats import get_crypto_stats
+from volatility_pipeline import compute_conditional_volatility
+from feature_engineering import add_base_features, build_features, build_features_raw
+from train_model import predict_price_bands, load_rf_config, train_classifier
+from model_zoo import feature_importance
+from pooled_model import load_pooled_model
+from multi_horizon import train_direct_horizons
+from whatif import probability_surface
+
+MODEL_TYPES = ("direction", "price")
+
+# Scored by the shared cross-symbol model (pooled_model.py), never trained per request
+POOLED_MODEL_TYPE = "pooled"
+
+# Direction and price models from one fetch (see combine_results)
+BOTH_MODEL_TYPE = "both"
+
+# Grow the previous forest with warm_start instead of retraining on new days
+INCREMENTAL_TRAINING = os.environ.get("INCREMENTAL_TRAINING", "0") == "1"
+
+# Classifier backend (see model_zoo.py); "rf" keeps train_rf and its tuned configs
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "rf")
+
+
+# "recursive" shifts the last feature row per day, "direct" trains one output per day
+HORIZON_MODE = os.environ.get("HORIZON_MODE", "recursive")
+
+# Stop growing RandomForests once their out-of-bag class probabilities stop changing (adaptive_forest.py)
+ADAPTIVE_FOREST = os.environ.get("ADAPTIVE_FOREST", "0") == "1"
+
+
+def _fit_kwargs(ticker, approach, n_days):
+    if MODEL_BACKEND == "rf":
+        kwargs = load_rf_config(ticker, approach)
+    else:
+        kwargs = {"train_fn": train_classifier, "backend": MODEL_BACKEND}
+
+    if HORIZON_MODE == "direct":
+        kwargs.update(train_fn=train_direct_horizons, n_horizons=n_days)
+    elif ADAPTIVE_FOREST and MODEL_BACKEND == "rf":
+        kwargs["adaptive"] = True
+    return kwargs
+
+
+def _fit_function(registry):
+    if INCREMENTAL_TRAINING and MODEL_BACKEND == "rf" and HORIZON_MODE == "recursive":
+        return registry.get_or_update
+    return registry.get_or_train
+
+
+def _label_incremental(model_info, metrics):
+    """
+    Incrementally grown forests keep the test metrics of their last full
+    training: show the rolling accuracy on the new days and mark the rest
+    as baseline.
+    """
+    if metrics.get("update") != "incremental":
+        return model_info
+
+    rolling = metrics.get("rolling_accuracy")
+    model_info = dict(model_info)
+    for name in ("f1_score", "roc_auc", "mape"):
+        if name in model_info and model_info[name] != "N/A":
+            model_info[name] += " (baseline)"
+    model_info["accuracy"] = (
+        f"{rolling:.4f} (rolling, new days)" if rolling is not None
+        else model_info["accuracy"] + " (baseline)"
+    )
+    model_info["note"] += f" (grown incrementally to {metrics['n_estimators']} trees)"
+    return model_info
+
+
+def _direction_model(ticker, base, fit, n_days):
+    # Use RAW DATA model - Best for direction prediction (57.34% accuracy)
+    X, y, df = build_features_raw(base)
+    model, metrics, _ = fit(ticker, "direction", X, y, **_fit_kwargs(ticker, "raw", n_days))
+    model_info = {
+        "type": "Raw Data Model",
+        "purpose": "Direction Prediction (UP/DOWN)",
+        "accuracy": f"{metrics['accuracy']:.4f}",
+        "f1_score": f"{metrics['f1']:.4f}",
+        "roc_auc": f"{metrics['roc_auc']:.4f}",
+        "note": "Best for predicting market direction"
+    }
+    return model, X, df, _label_incremental(model_info, metrics)
+
+
+def _pooled_model(ticker, base):
+    # Shared model trained offline on every symbol; nothing is trained here
+    X, y, df = build_features_raw(base)
+    pooled = load_pooled_model()
+    model = pooled.for_symbol(X)
+    metrics = pooled.symbol_metrics(ticker)
+    roc_auc = metrics.get("roc_auc")
+    model_info = {
+        "type": "Pooled Cross-Symbol Model",
+        "purpose": "Direction Prediction (UP/DOWN)",
+        "accuracy": f"{metrics['accuracy']:.4f}",
+        "f1_score": f"{metrics['f1']:.4f}",
+        "roc_auc": f"{roc_auc:.4f}" if roc_auc is not None else "N/A",
+        "note": f"One model trained on {len(pooled.symbols)} symbols ({pooled.trained_at})"
+    }
+    return model, X, df, model_info
+
+
+def _price_model(ticker, raw_df, base, fit, n_days):
+    # Use WITH CV model - Best for price prediction (7.07% MAPE error)
+    df_cv = compute_conditional_volatility(raw_df, base_features=base)
+    X, y = build_features(df_cv)
+    model, metrics, _ = fit(ticker, "price", X, y, df=raw_df, **_fit_kwargs(ticker, "cv", n_days))
+    model_info = {
+        "type": "CV-Processed Model",
+        "purpose": "Price Prediction Accuracy",
+        "accuracy": f"{metrics['accuracy']:.4f}",
+        "mape": f"{metrics['mape']:.2f}%" if metrics.get('mape') else "N/A",
+        "roc_auc": f"{metrics['roc_auc']:.4f}",
+        "note": "Best for accurately predicting price movement"
+    }
+    return model, X, df_cv, _label_incremental(model_info, metrics)
+
+
+def _forecast(ticker, model_type, model, X, df, model_info, crypto_stats, n_days):
+    last_date = pd.to_datetime(df.index[-1])
+
+    # Seed by symbol and day so refreshing the page shows the same forecast
+    seed = zlib.crc32(f"{ticker}:{model_type}:{last_date.date()}".encode())
+    predicted_prices, preds, probs, bands = predict_price_bands(
+        model, X, df, n=n_days, seed=seed
+    )
+    low_q, high_q = min(bands), max(bands)
+    future_dates = [
+        (last_date + pd.Timedelta(days=i + 1)).strftime("%Y-%m-%d")
+        for i in range(n_days)
+    ]
+
+    dates = pd.to_datetime(df.index).strftime("%Y-%m-%d").tolist()
+    prices = df["Close"].round(2).tolist()
+    if "cv" in df.columns:
+        cv_values = df["cv"].round(4).tolist()
+    else:
+        cv_values = [None] * len(prices)
+
+    importance = feature_importance(model)
+    if importance is None:
+        importance = pd.Series(dtype=float)
+    importance = importance.sort_values(ascending=False)
+
+    return {
+        "ticker": ticker,
+        "model_type": model_type,
+        "model_info": model_info,
+        "crypto_stats": crypto_stats,
+        "predictions": [
+            {
+                "date": d,
+                "prediction": "UP" if p == 1 else "DOWN",
+                "probability": round(float(prob), 4),
+                "predicted_price": round(float(price), 2),
+                "price_low": round(float(low), 2),
+                "price_high": round(float(high), 2),
+            }
+            for d, p, prob, price, low, high in zip(
+                future_dates, preds, probs, predicted_prices,
+                bands[low_q], bands[high_q]
+            )
+        ],
+        "price_bands": {
+            "quantiles": sorted(bands),
+            "bands": [bands[q] for q in sorted(bands)],
+            "median": predicted_prices,
+        },
+        "dates": dates,
+        "prices": prices,
+        "cv": cv_values,
+        "feat_items": list(
+            zip(
+                importance.index.tolist(),
+                importance.values.round(4).tolist(),
+            )
+        ),
+    }
+
+
+def combine_results(direction_result, price_result):
+    """
+    Single "both" response from a direction and a price result.
+
+    The page-level fields (charts, stats) come from the price result, which
+    carries the CV series; 'models' holds both results for side-by-side display.
+    """
+    return dict(
+        price_result,
+        model_type=BOTH_MODEL_TYPE,
+        models=[direction_result, price_result]
+    )
+
+
+def run_prediction(ticker, model_type, registry, n_days=5):
+    """
+    Run the prediction pipeline for one symbol.
+
+    Args:
+        ticker: Crypto symbol (e.g., 'BTC')
+        model_type: "direction" (raw data model), "pooled" (cross-symbol model),
+            "both" (direction and price models from one fetch)
+            or anything else (CV price model)
+        registry: ModelRegistry used to fetch or train the model
+        n_days: Forecast horizon
+
+    Returns:
+        dict: Result rendered by predict.html
+    """
+    df = fetch_crypto_data(ticker)
+    fit = _fit_function(registry)
+
+    # Log returns and RSI are computed once and shared by every model below
+    base = add_base_features(df)
+
+    # Get crypto stats
+    crypto_stats = get_crypto_stats(ticker)
+
+    # Choose model based on user selection
+    if model_type == BOTH_MODEL_TYPE:
+        direction = _direction_model(ticker, base, fit, n_days)
+        price = _price_model(ticker, df, base, fit, n_days)
+        return combine_results(
+            _forecast(ticker, "direction", *direction, crypto_stats, n_days),
+            _forecast(ticker, "price", *price, crypto_stats, n_days)
+        )
+
+    if model_type == "direction":
+        model, X, df_model, model_info = _direction_model(ticker, base, fit, n_days)
+    elif model_type == POOLED_MODEL_TYPE:
+        model, X, df_model, model_info = _pooled_model(ticker, base)
+    else:  # model_type == "price"
+        model, X, df_model, model_info = _price_model(ticker, df, base, fit, n_days)
+
+    return _forecast(ticker, model_type, model, X, df_model, model_info, crypto_stats, n_days)
+
+
+def run_whatif(ticker, model_type, registry, returns, cv_scales, n_days=5):
+    """
+    UP probability surface over hypothetical next-day returns (whatif.py).
+
+    Uses the same cached model as run_prediction for this model_type (n_days
+    must match for direct multi-horizon models), so a what-if request after
+    /predict trains nothing.
+
+    Returns:
+        dict: probability_surface() output plus ticker, model_type and last date
+    """
+    df = fetch_crypto_data(ticker)
+    base = add_base_features(df)
+    fit = _fit_function(registry)
+
+    if model_type == "direction":
+        model, X, df_model, _ = _direction_model(ticker, base, fit, n_days)
+    elif model_type == POOLED_MODEL_TYPE:
+        model, X, df_model, _ = _pooled_model(ticker, base)
+    else:  # model_type == "price"
+        model, X, df_model, _ = _price_model(ticker, df, base, fit, n_days)
+
+    surface = probability_surface(model, X, df_model, returns, cv_scales)
+    return dict(
+        surface,
+        ticker=ticker,
+        model_type=model_type,
+        last_date=pd.to_datetime(df_model.index[-1]).strftime("%Y-%m-%d")
+    )
@@ -0,0 +1,196 @@
+# prediction_snapshots.py
+"""
+Background precomputation of /predict results.
+
+A scheduler runs the full prediction pipeline for every supported symbol
+and model type on a fixed cadence and saves each result as a versioned
+JSON snapshot. The /predict route serves the latest snapshot when it is
+fresh enough and only falls back to the synchronous pipeline otherwise.
+
+Run as a separate worker:
+    python prediction_snapshots.py --interval 3600
+    python prediction_snapshots.py --once --symbols BTC,ETH
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+from fetch_coinlore import symbol_to_id
+from prediction_service import MODEL_TYPES, run_prediction
+
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_MAX_AGE = int(os.environ.get("SNAPSHOT_MAX_AGE", "3600"))
+PRECOMPUTE_INTERVAL = int(os.environ.get("PRECOMPUTE_INTERVAL", "0"))
+
+
+class SnapshotStore:
+    """
+    Versioned JSON snapshots of prediction results.
+
+    Layout: <root>/<SYMBOL>/<model_type>/<version>.json, where version is a
+    UTC timestamp, so the newest snapshot sorts last.
+
+    Args:
+        root: Snapshot directory
+        keep_versions: Number of versions kept per (symbol, model_type)
+    """
+
+    def __init__(self, root=SNAPSHOT_DIR, keep_versions=3):
+        self.root = root
+        self.keep_versions = keep_versions
+
+    def _dir(self, ticker, model_type):
+        safe_ticker = re.sub(r"[^A-Z0-9]", "_", ticker.upper())
+        return os.path.join(self.root, safe_ticker, model_type)
+
+    def _versions(self, ticker, model_type):
+        return sorted(glob.glob(os.path.join(self._dir(ticker, model_type), "*.json")))
+
+    def save(self, ticker, model_type, result):
+        """Write a new snapshot version and prune old ones"""
+        now = datetime.now(timezone.utc)
+        version = now.strftime("%Y%m%dT%H%M%S%fZ")
+        directory = self._dir(ticker, model_type)
+        os.makedirs(directory, exist_ok=True)
+
+        snapshot = {
+            "version": version,
+            "created_at": now.timestamp(),
+            "ticker": ticker.upper(),
+            "model_type": model_type,
+            "result": result
+        }
+
+        path = os.path.join(directory, version + ".json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, default=str)
+        os.replace(path + ".tmp", path)
+
+        for old in self._versions(ticker, model_type)[:-self.keep_versions]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+        return version
+
+    def latest(self, ticker, model_type, max_age=None):
+        """
+        Load the newest snapshot.
+
+        Args:
+            max_age: If given, ignore snapshots older than this many seconds
+
+        Returns:
+            Snapshot dict (with 'result') or None
+        """
+        versions = self._versions(ticker, model_type)
+        if not versions:
+            return None
+
+        try:
+            with open(versions[-1], "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if max_age is not None and time.time() - snapshot["created_at"] > max_age:
+            return None
+
+        return snapshot
+
+
+def precompute_all(store, registry, symbols=None, model_types=MODEL_TYPES):
+    """
+    Run the prediction pipeline for every symbol and model type.
+
+    Returns:
+        dict with lists of 'succeeded' and 'failed' (symbol, model_type) pairs
+    """
+    symbols = symbols or sorted(symbol_to_id)
+    succeeded, failed = [], []
+    total = len(symbols) * len(model_types)
+    done = 0
+
+    for symbol in symbols:
+        for model_type in model_types:
+            done += 1
+            try:
+                result = run_prediction(symbol, model_type, registry)
+                store.save(symbol, model_type, result)
+                succeeded.append((symbol, model_type))
+                print(f"[{done}/{total}] ✓ {symbol} {model_type}")
+            except Exception as e:
+                failed.append((symbol, model_type))
+                print(f"[{done}/{total}] ✗ {symbol} {model_type}: {str(e)[:50]}")
+
+    return {"succeeded": succeeded, "failed": failed}
+
+
+class PrecomputeScheduler(threading.Thread):
+    """
+    Daemon thread that calls precompute_all every `interval` seconds.
+
+    Args:
+        store: SnapshotStore
+        registry: ModelRegistry
+        interval: Seconds between the start of two runs
+        symbols: Symbols to precompute (default: every supported symbol)
+    """
+
+    def __init__(self, store, registry, interval=3600, symbols=None):
+        super().__init__(daemon=True, name="prediction-precompute")
+        self.store = store
+        self.registry = registry
+        self.interval = interval
+        self.symbols = symbols
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            started = time.time()
+            try:
+                precompute_all(self.store, self.registry, symbols=self.symbols)
+            except Exception as e:
+                print(f"✗ Precompute run failed: {e}")
+            elapsed = time.time() - started
+            self._stop_event.wait(max(0, self.interval - elapsed))
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def main():
+    from model_registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Precompute /predict snapshots")
+    parser.add_argument("--interval", type=int, default=3600, help="Seconds between runs")
+    parser.add_argument("--once", action="store_true", help="Run one pass and exit")
+    parser.add_argument("--symbols", default="", help="Comma-separated symbols (default: all)")
+    args = parser.parse_args()
+
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()] or None
+    store = SnapshotStore()
+    registry = ModelRegistry()
+
+    if args.once:
+        summary = precompute_all(store, registry, symbols=symbols)
+        print(f"\n✓ Success: {len(summary['succeeded'])}, ✗ Failed: {len(summary['failed'])}")
+        return
+
+    scheduler = PrecomputeScheduler(store, registry, interval=args.interval, symbols=symbols)
+    scheduler.start()
+    try:
+        while scheduler.is_alive():
+            scheduler.join(timeout=1)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
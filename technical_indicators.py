@@ -13,11 +13,17 @@ def compute_rsi(series, period=14):
     return rsi
 
 
-def add_technical_features(df):
+def add_technical_features(df, base_features=None):
     df = df.copy()
 
-    df["rsi_14"] = compute_rsi(df["Close"])
-    df["rsi_slope"] = df["rsi_14"].diff()
+    if base_features is not None:
+        # RSI already computed on the full history (feature_engineering.add_base_features);
+        # identical on every row that survives the dropna below
+        df["rsi_14"] = base_features["rsi_14"].reindex(df.index)
+        df["rsi_slope"] = base_features["rsi_slope"].reindex(df.index)
+    else:
+        df["rsi_14"] = compute_rsi(df["Close"])
+        df["rsi_slope"] = df["rsi_14"].diff()
 
     df["ma_10"] = df["Close"].rolling(10).mean()
     df["ma_20"] = df["Close"].rolling(20).mean()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+What-if rows vs build_features (offline, synthetic prices).
+
+Plugging the return (and CV) that was actually observed on the last day into
+whatif_rows, using the history up to the day before, must give the feature
+row build_features produces on the extended frame: the return / CV lags of
+the first row after that day, and its RSI on that day.
+
+Usage:
+    python test_whatif.py
+"""
+import numpy as np
+import pandas as pd
+
+from feature_engineering import add_base_features, build_features, build_features_raw
+from whatif import whatif_rows
+
+
+def synthetic_prices(days=120, seed=7):
+    rng = np.random.RandomState(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0.001, 0.03, days))
+    df = pd.DataFrame({"Close": close}, index=pd.date_range(end="2026-10-19", periods=days, freq="D"))
+    df["cv"] = rng.uniform(0.01, 0.05, days)
+    return df
+
+
+def extended(df):
+    """df with one placeholder day appended, so the row after its last day exists"""
+    nxt = df.iloc[-1:].copy()
+    nxt.index = nxt.index + pd.Timedelta(days=1)
+    return pd.concat([df, nxt])
+
+
+def observed_whatif_row(history, observed, with_cv):
+    """whatif_rows on history, with the observed last day as the hypothetical one"""
+    r = observed["Close"] / history["Close"].iloc[-1] - 1
+    scale = observed["cv"] / history["cv"].iloc[-1]
+    if with_cv:
+        X, _ = build_features(add_base_features(history))
+        df = add_base_features(history)
+    else:
+        X, _, df = build_features_raw(history.drop(columns="cv"))
+    rows, _, _ = whatif_rows(X, df, [r], [scale])
+    return rows.iloc[0]
+
+
+def check(with_cv):
+    full = synthetic_prices()
+    history, observed = full.iloc[:-1], full.iloc[-1]
+    row = observed_whatif_row(history, observed, with_cv)
+
+    if with_cv:
+        X_ext, _ = build_features(add_base_features(extended(full)))
+    else:
+        X_ext, _, _ = build_features_raw(extended(full).drop(columns="cv"))
+
+    lags = [c for c in X_ext.columns if "_lag" in c]
+    rsi = [c for c in X_ext.columns if c.startswith("rsi")]
+    np.testing.assert_allclose(row[lags].values, X_ext[lags].iloc[-1].values, rtol=1e-9)
+    np.testing.assert_allclose(row[rsi].values, X_ext[rsi].iloc[-2].values, rtol=1e-9)
+
+
+def test_whatif_row_matches_build_features_raw():
+    check(with_cv=False)
+
+
+def test_whatif_row_matches_build_features_cv():
+    check(with_cv=True)
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 70)
+    print("TESTING what-if rows against build_features")
+    print("=" * 70)
+    failed = 0
+    for name, test in [("raw features", test_whatif_row_matches_build_features_raw),
+                       ("CV features", test_whatif_row_matches_build_features_cv)]:
+        try:
+            test()
+            print(f"  ✅ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"  ❌ {name}: {e}")
+    raise SystemExit(1 if failed else 0)
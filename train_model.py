@@ -1,8 +1,44 @@
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, mean_absolute_error, mean_squared_error
+import json
+import os
+
 import numpy as np
 import pandas as pd
+from tree_inference import get_flat_forest
+from model_zoo import make_model
+from multi_horizon import is_direct_model, predict_direct_horizons
+from adaptive_forest import grow_until_converged
+from monte_carlo import DEFAULT_QUANTILES, simulate_price_paths, summarize_paths, forecast_volatility
+
+RF_CONFIG_PATH = os.environ.get("RF_CONFIG_PATH", "rf_config.json")
+
+
+def load_rf_config(symbol, approach="raw", path=None):
+    """
+    Tuned train_rf settings for a symbol, written by hyperparameter_search.py.
+
+    Args:
+        symbol: Crypto symbol
+        approach: "raw" (direction model features) or "cv" (price model features)
+        path: Config file (default: RF_CONFIG_PATH)
+
+    Returns:
+        dict of train_rf keyword arguments (empty if the symbol was never tuned)
+    """
+    path = path or RF_CONFIG_PATH
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    entry = config.get(symbol.upper(), {}).get(approach)
+    if not entry:
+        return {}
+    return dict(entry["params"], features=entry["features"])
 
 def calculate_regression_metrics(y_true, y_pred):
     """
@@ -25,6 +61,28 @@ def calculate_regression_metrics(y_true, y_pred):
         'mape': mape
     }
 
+def project_prices(last_price, probs, directions, avg_daily_return, daily_volatility):
+    """
+    Price path implied by a sequence of direction predictions.
+
+    Each step moves by the average daily return scaled by the UP probability
+    (or its complement for DOWN), plus N(0, volatility / 2) noise from the
+    global NumPy RNG, compounded from last_price.
+
+    Returns:
+        Array of projected prices, one per prediction
+    """
+    probs = np.asarray(probs, dtype=float)
+    expected_returns = np.where(
+        np.asarray(directions) == 1,
+        avg_daily_return * probs,
+        -avg_daily_return * (1 - probs)
+    )
+    expected_returns += np.random.normal(0, daily_volatility * 0.5, size=len(probs))
+    # same left-to-right compounding as a running product
+    return np.cumprod(np.concatenate([[last_price], 1 + expected_returns]))[1:]
+
+
 def predict_prices_for_evaluation(model, X, df, n_test_samples=10):
     """
     Generate price predictions for evaluation on test data
@@ -38,42 +96,29 @@ def predict_prices_for_evaluation(model, X, df, n_test_samples=10):
     Returns:
         Tuple of (predicted_prices, predicted_directions)
     """
-    preds, probs = [], []
-    predicted_prices = []
-    
-    # Use last n_test_samples for evaluation
-    for i in range(n_test_samples):
-        if i + 1 >= len(X):
-            break
-            
-        X_current = X.iloc[-(n_test_samples-i):-(n_test_samples-i-1)].copy()
-        
-        p = model.predict(X_current)[0]
-        prob = model.predict_proba(X_current)[0][1]
-        
-        preds.append(int(p))
-        probs.append(prob)
+    # Score the last n_test_samples rows in one batched call
+    X_eval = X.iloc[-n_test_samples:]
+    if hasattr(model, "feature_names_in_"):
+        X_eval = X_eval[list(model.feature_names_in_)]
+
+    flat = get_flat_forest(model)
+    if flat is not None:
+        proba, classes = flat.predict_proba(X_eval), flat.classes_[0]
+    else:
+        proba, classes = model.predict_proba(X_eval), model.classes_
+    preds = classes.take(np.argmax(proba, axis=1)).astype(int)
     
     # Generate price projections
-    last_price = df["Close"].iloc[-1]
     returns = df["log_return"].dropna()
-    avg_daily_return = returns.mean()
-    daily_volatility = returns.std()
-    
-    current_price = last_price
-    for i in range(min(n_test_samples, len(preds))):
-        expected_return = (
-            avg_daily_return * probs[i]
-            if preds[i] == 1
-            else -avg_daily_return * (1 - probs[i])
-        )
-        expected_return += np.random.normal(0, daily_volatility * 0.5)
-        current_price *= (1 + expected_return)
-        predicted_prices.append(current_price)
+    predicted_prices = project_prices(
+        df["Close"].iloc[-1], proba[:, 1], preds, returns.mean(), returns.std()
+    )
     
-    return np.array(predicted_prices), np.array(preds)
+    return predicted_prices, preds
 
-def train_rf(X, y, df=None, test_size=0.2, random_state=42, return_only_model=False):
+def train_rf(X, y, df=None, test_size=0.2, random_state=42, return_only_model=False,
+             n_estimators=200, max_depth=5, min_samples_leaf=1, max_features="sqrt",
+             features=None, symbol=None, adaptive=False, watch_rows=20):
     """
     Train RandomForest with proper train/test split and comprehensive evaluation.
     
@@ -84,6 +129,18 @@ def train_rf(X, y, df=None, test_size=0.2, random_state=42, return_only_model=Fa
         test_size: Proportion of data to use for testing (default 0.2)
         random_state: Random seed for reproducibility
         return_only_model: If True, returns only model (for backward compatibility with app.py)
+        n_estimators: Number of trees in the forest
+        max_depth: Maximum depth of each tree
+        min_samples_leaf: Minimum samples per leaf
+        max_features: Features considered per split
+        features: Optional subset of X columns to train on
+        symbol: If given and rf_config.json has a tuned config for it
+            (see hyperparameter_search.py), that config overrides the settings above
+        adaptive: Grow trees in increments until the out-of-bag UP probabilities
+            and the probabilities of the last watch_rows rows change by less than
+            a tolerance between increments (adaptive_forest.py); n_estimators is
+            then the upper bound
+        watch_rows: Latest rows whose probabilities must converge
     
     Returns:
         If return_only_model=True: model (for backward compatibility)
@@ -92,19 +149,67 @@ def train_rf(X, y, df=None, test_size=0.2, random_state=42, return_only_model=Fa
             - metrics: Dictionary with classification + regression metrics
             - train_test_data: Tuple of (X_train, X_test, y_train, y_test)
     """
+    if symbol is not None:
+        approach = "cv" if "cv_lag1" in X.columns else "raw"
+        tuned = load_rf_config(symbol, approach)
+        n_estimators = tuned.get("n_estimators", n_estimators)
+        max_depth = tuned.get("max_depth", max_depth)
+        min_samples_leaf = tuned.get("min_samples_leaf", min_samples_leaf)
+        max_features = tuned.get("max_features", max_features)
+        features = tuned.get("features", features)
+
+    return train_classifier(
+        X, y,
+        df=df,
+        backend="rf",
+        test_size=test_size,
+        random_state=random_state,
+        return_only_model=return_only_model,
+        features=features,
+        adaptive=adaptive,
+        watch_rows=watch_rows,
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        min_samples_leaf=min_samples_leaf,
+        max_features=max_features
+    )
+
+def train_classifier(X, y, df=None, backend="rf", test_size=0.2, random_state=42,
+                     return_only_model=False, features=None, adaptive=False, watch_rows=20,
+                     **model_params):
+    """
+    Train any model_zoo backend with the same split and evaluation as train_rf.
+
+    Args:
+        X: Features
+        y: Target variable (UP/DOWN classification)
+        df: DataFrame with price data (for regression evaluation)
+        backend: Model backend name (see model_zoo.MODEL_BACKENDS)
+        test_size: Proportion of data to use for testing (default 0.2)
+        random_state: Random seed for reproducibility
+        return_only_model: If True, returns only the model
+        features: Optional subset of X columns to train on
+        adaptive, watch_rows: Adaptive forest size, see train_rf (forest backends only)
+        **model_params: Backend settings (e.g. n_estimators, max_depth)
+
+    Returns:
+        Same as train_rf
+    """
+    if features is not None:
+        X = X[list(features)]
+
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=test_size, random_state=random_state
     )
     
     # Train model
-    model = RandomForestClassifier(
-        n_estimators=200,
-        max_depth=5,
-        random_state=random_state,
-        class_weight="balanced"
-    )
-    model.fit(X_train, y_train)
+    model = make_model(backend, random_state=random_state, **model_params)
+    tree_trace = None
+    if adaptive:
+        model, tree_trace = grow_until_converged(model, X_train, y_train, X.iloc[-watch_rows:])
+    else:
+        model.fit(X_train, y_train)
     
     # Evaluate CLASSIFICATION metrics
     y_pred = model.predict(X_test)
@@ -120,24 +225,24 @@ def train_rf(X, y, df=None, test_size=0.2, random_state=42, return_only_model=Fa
         'train_size': len(X_train),
         'test_size': len(X_test)
     }
+    if tree_trace is not None:
+        # Chosen forest size, so inference cost is visible in the stored metrics
+        metrics.update({
+            'n_estimators': len(model.estimators_),
+            'oob_score': tree_trace[-1]['oob_score'],
+            'tree_trace': tree_trace
+        })
     
     # Evaluate REGRESSION metrics (if price data provided)
     if df is not None:
         try:
             # Generate estimated prices based on predictions
-            last_price = df["Close"].iloc[-1]
             returns = df["log_return"].dropna()
-            avg_daily_return = returns.mean()
-            daily_volatility = returns.std()
-            
-            predicted_prices = []
-            current_price = last_price
-            
-            for prob in y_pred_proba[:min(len(y_pred_proba), 10)]:
-                expected_return = avg_daily_return * prob if prob > 0.5 else -avg_daily_return * (1 - prob)
-                expected_return += np.random.normal(0, daily_volatility * 0.5)
-                current_price *= (1 + expected_return)
-                predicted_prices.append(current_price)
+            probs = y_pred_proba[:10]
+            predicted_prices = project_prices(
+                df["Close"].iloc[-1], probs, (probs > 0.5).astype(int),
+                returns.mean(), returns.std()
+            )
             
             # Get actual prices for comparison
             actual_prices = df["Close"].iloc[-(len(predicted_prices)):].values
@@ -168,16 +273,18 @@ def train_rf(X, y, df=None, test_size=0.2, random_state=42, return_only_model=Fa
     
     return model, metrics, (X_train, X_test, y_train, y_test)
 
-def predict_next_n_days_prices(model, X, df, n=5):
-    preds, probs = [], []
+def horizon_feature_rows(X, n):
+    """
+    Feature rows used to score each of the next n days.
+
+    Starting from the last row of X, each step shifts lag1 into lag2 and
+    zeroes lag1 (unknown future return / CV), exactly as the step-by-step loop did.
+    """
     X_last = X.iloc[-1:].copy()
+    rows = []
 
     for _ in range(n):
-        p = model.predict(X_last)[0]
-        prob = model.predict_proba(X_last)[0][1]
-
-        preds.append(int(p))
-        probs.append(round(prob, 4))
+        rows.append(X_last.copy())
 
         X_last["return_lag2"] = X_last["return_lag1"]
         X_last["return_lag1"] = 0
@@ -187,6 +294,78 @@ def predict_next_n_days_prices(model, X, df, n=5):
             X_last["cv_lag2"] = X_last["cv_lag1"]
             X_last["cv_lag1"] = 0
 
+    return pd.concat(rows, ignore_index=True)
+
+
+def predict_horizon_directions(model, X, n=5):
+    """
+    Direction and UP probability for each of the next n days.
+
+    Returns:
+        Tuple of (preds, probs)
+    """
+    if is_direct_model(model):
+        # one output per horizon, scored from the last real feature row
+        return predict_direct_horizons(model, X, n)
+
+    X_steps = horizon_feature_rows(X, n)
+    if hasattr(model, "feature_names_in_"):
+        # the model may have been trained on a tuned feature subset
+        X_steps = X_steps[list(model.feature_names_in_)]
+
+    # Score every horizon step in one batched call
+    flat = get_flat_forest(model)
+    if flat is not None:
+        proba = flat.predict_proba(X_steps)
+        classes = flat.classes_[0]
+    else:
+        proba = model.predict_proba(X_steps)
+        classes = model.classes_
+
+    preds = [int(p) for p in classes.take(np.argmax(proba, axis=1))]
+    probs = [round(p, 4) for p in proba[:, 1]]
+    return preds, probs
+
+
+def predict_price_bands(model, X, df, n=5, n_paths=5000, quantiles=DEFAULT_QUANTILES, seed=None):
+    """
+    Monte Carlo version of predict_next_n_days_prices.
+
+    Args:
+        model: Trained classifier
+        X: Features DataFrame
+        df: Price DataFrame with Close, log_return (and cv for CV models)
+        n: Number of days to forecast
+        n_paths: Number of simulated price paths
+        quantiles: Quantile bands to report
+        seed: Seed for reproducible paths
+
+    Returns:
+        Tuple of (median_prices, preds, probs, bands) where bands maps
+        quantile -> list of prices per day
+    """
+    preds, probs = predict_horizon_directions(model, X, n)
+
+    returns = df["log_return"].dropna()
+    paths = simulate_price_paths(
+        df["Close"].iloc[-1],
+        preds,
+        probs,
+        returns.mean(),
+        forecast_volatility(df),
+        n_paths=n_paths,
+        seed=seed
+    )
+    summary = summarize_paths(paths, quantiles)
+
+    median_prices = [round(p, 2) for p in summary["median"]]
+    bands = {q: [round(p, 2) for p in band] for q, band in summary["bands"].items()}
+    return median_prices, preds, probs, bands
+
+
+def predict_next_n_days_prices(model, X, df, n=5):
+    preds, probs = predict_horizon_directions(model, X, n)
+
     last_price = df["Close"].iloc[-1]
     returns = df["log_return"].dropna()
 
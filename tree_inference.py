@@ -0,0 +1,274 @@
+# tree_inference.py
+"""
+Flattened-array inference for fitted tree ensembles.
+
+compile_forest() copies every tree of a fitted RandomForestClassifier (or
+ExtraTreesClassifier) into a handful of concatenated NumPy arrays. FlatForest
+then scores one row or a whole batch with pure array operations, skipping
+sklearn's per-call validation and joblib dispatch. Probabilities are
+accumulated in the same order and dtype as sklearn, so results match
+predict_proba bit-for-bit.
+
+Benchmark / verification:
+    python tree_inference.py --rows 1 --repeat 200
+"""
+import argparse
+import time
+import weakref
+
+import numpy as np
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+_TREE_DTYPE = np.float32  # sklearn trees compare float32 inputs against float64 thresholds
+
+
+class FlatForest:
+    """
+    A forest stored as flat node arrays.
+
+    Attributes:
+        feature: int array (n_nodes,), split feature per node (0 for leaves)
+        threshold: float64 array (n_nodes,), split threshold (+inf for leaves)
+        left, right: int arrays (n_nodes,), global child indices (leaves point to themselves)
+        missing_left: bool array (n_nodes,), where NaN inputs go
+        values: float64 array (n_nodes, n_outputs, max_classes), normalized class probabilities
+        roots: int array (n_trees,), global index of each tree's root
+        depth: number of descent steps needed to reach any leaf
+    """
+
+    def __init__(self, feature, threshold, left, right, missing_left, values, roots,
+                 depth, classes, n_classes, n_features, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.values = values
+        self.roots = roots
+        self.depth = depth
+        self.classes_ = classes
+        self.n_classes_ = n_classes
+        self.n_features = n_features
+        self.feature_names = feature_names
+        # children[2 * node + go_left] -> next node
+        self._children = np.stack([right, left], axis=1).ravel()
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_outputs(self):
+        return self.values.shape[1]
+
+    def _as_array(self, X):
+        if self.feature_names is not None and hasattr(X, "columns"):
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=_TREE_DTYPE)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(
+                f"X has {X.shape[1]} features, but the forest expects {self.n_features}"
+            )
+        return X
+
+    def apply(self, X):
+        """Leaf index reached by every row in every tree, shape (n_rows, n_trees)"""
+        X = self._as_array(X)
+        X_flat = X.ravel()
+        row_base = (np.arange(X.shape[0]) * X.shape[1])[:, None]
+        node = np.tile(self.roots, (X.shape[0], 1))
+        has_nan = np.isnan(X_flat).any()
+
+        for _ in range(self.depth):
+            x = X_flat[row_base + self.feature[node]]
+            go_left = x <= self.threshold[node]
+            if has_nan:
+                go_left = np.where(np.isnan(x), self.missing_left[node], go_left)
+            node = self._children[2 * node + go_left]
+
+        return node
+
+    def predict_proba(self, X):
+        """Class probabilities; a list of arrays for multi-output forests (like sklearn)"""
+        leaves = self.apply(X)
+        # Sequential accumulation over trees, as RandomForestClassifier.predict_proba
+        summed = self.values[leaves].cumsum(axis=1)[:, -1]
+        summed /= self.n_trees
+
+        probas = [summed[:, k, :n] for k, n in enumerate(self.n_classes_)]
+        if self.n_outputs == 1:
+            return probas[0]
+        return probas
+
+    def predict(self, X):
+        proba = self.predict_proba(X)
+        if self.n_outputs == 1:
+            return self.classes_[0].take(np.argmax(proba, axis=1), axis=0)
+
+        return np.stack(
+            [c.take(np.argmax(p, axis=1), axis=0) for c, p in zip(self.classes_, proba)],
+            axis=1
+        )
+
+
+def _tree_node_values(tree, n_classes):
+    # Same normalization as DecisionTreeClassifier.predict_proba
+    values = np.array(tree.value, dtype=np.float64)
+    for k, n in enumerate(n_classes):
+        proba = values[:, k, :n]
+        normalizer = proba.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        proba /= normalizer
+    return values
+
+
+def compile_forest(model):
+    """
+    Flatten a fitted forest classifier into a FlatForest.
+
+    Args:
+        model: Fitted RandomForestClassifier / ExtraTreesClassifier
+
+    Returns:
+        FlatForest
+    """
+    if not isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        raise ValueError(f"Cannot compile {type(model).__name__}, expected a forest classifier")
+    if not hasattr(model, "estimators_"):
+        raise ValueError("Model is not fitted")
+
+    multi_output = getattr(model, "n_outputs_", 1) > 1
+    classes = list(model.classes_) if multi_output else [model.classes_]
+    n_classes = [len(c) for c in classes]
+
+    features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+    offset = 0
+    depth = 0
+
+    for est in model.estimators_:
+        tree = est.tree_
+        n = tree.node_count
+        node_ids = np.arange(n) + offset
+        is_leaf = tree.children_left == -1
+
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+        rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+        if hasattr(tree, "missing_go_to_left"):
+            missing.append(np.asarray(tree.missing_go_to_left, dtype=bool))
+        else:
+            missing.append(np.zeros(n, dtype=bool))
+
+        tree_values = _tree_node_values(tree, n_classes)
+        max_classes = max(n_classes)
+        if tree_values.shape[2] < max_classes:
+            pad = np.zeros((n, tree_values.shape[1], max_classes - tree_values.shape[2]))
+            tree_values = np.concatenate([tree_values, pad], axis=2)
+        values.append(tree_values)
+
+        roots.append(offset)
+        depth = max(depth, tree.max_depth)
+        offset += n
+
+    feature_names = (
+        list(model.feature_names_in_) if hasattr(model, "feature_names_in_") else None
+    )
+
+    return FlatForest(
+        feature=np.concatenate(features).astype(np.intp),
+        threshold=np.concatenate(thresholds).astype(np.float64),
+        left=np.concatenate(lefts).astype(np.intp),
+        right=np.concatenate(rights).astype(np.intp),
+        missing_left=np.concatenate(missing),
+        values=np.concatenate(values),
+        roots=np.asarray(roots, dtype=np.intp),
+        depth=int(depth),
+        classes=[np.asarray(c) for c in classes],
+        n_classes=n_classes,
+        n_features=model.n_features_in_,
+        feature_names=feature_names
+    )
+
+
+# Compiled forests, keyed by the sklearn model they were built from
+_compiled = weakref.WeakKeyDictionary()
+
+
+def get_flat_forest(model):
+    """
+    Compiled FlatForest for a model, rebuilt if the model's trees changed.
+
+    Returns None for models that are not tree ensembles; flattened forests
+    (e.g. compact_model.CompactForest) are returned as they are.
+    """
+    if isinstance(model, FlatForest):
+        return model
+    if not isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        return None
+
+    tree_ids = tuple(id(e) for e in model.estimators_)
+    entry = _compiled.get(model)
+    if entry is None or entry[0] != tree_ids:
+        entry = (tree_ids, compile_forest(model))
+        _compiled[model] = entry
+    return entry[1]
+
+
+def check_equivalence(model, X, flat=None):
+    """
+    Compare FlatForest probabilities with sklearn's predict_proba.
+
+    Returns:
+        dict with 'bitwise_equal' and 'max_abs_diff'
+    """
+    flat = flat or compile_forest(model)
+    expected = model.predict_proba(X)
+    actual = flat.predict_proba(X)
+    if not isinstance(expected, list):
+        expected, actual = [expected], [actual]
+
+    return {
+        "bitwise_equal": all(np.array_equal(e, a) for e, a in zip(expected, actual)),
+        "max_abs_diff": float(max(np.abs(e - a).max() for e, a in zip(expected, actual)))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify and time FlatForest against sklearn")
+    parser.add_argument("--rows", type=int, default=1, help="Rows per predict call")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed calls per engine")
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(700, 6))
+    y = (X[:, 0] + rng.normal(scale=2, size=700) > 0).astype(int)
+
+    model = RandomForestClassifier(
+        n_estimators=args.trees, max_depth=args.depth, random_state=42, class_weight="balanced"
+    ).fit(X, y)
+    flat = compile_forest(model)
+
+    print("=" * 60)
+    print("FLAT FOREST vs SKLEARN")
+    print("=" * 60)
+    check = check_equivalence(model, X, flat)
+    print(f"  Bitwise equal on {len(X)} rows: {check['bitwise_equal']}")
+    print(f"  Max abs diff: {check['max_abs_diff']:.3e}")
+
+    batch = X[:args.rows]
+    for name, fn in [("sklearn", model.predict_proba), ("flat", flat.predict_proba)]:
+        fn(batch)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            fn(batch)
+        per_call = (time.perf_counter() - start) / args.repeat
+        print(f"  {name:>8}: {per_call * 1e3:.3f} ms per call ({args.rows} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -52,14 +52,19 @@ def compute_cv_from_residuals(residuals):
 
 #pipeline
 
-def compute_conditional_volatility(price_df):
+def compute_conditional_volatility(price_df, base_features=None):
+    # base_features: optional add_base_features(price_df) output whose
+    # log_return and RSI are reused instead of recomputed
     df = price_df.copy()
     
     if len(df) < 30:
         raise ValueError(f"Not enough data: need at least 30 days, got {len(df)}")
 
-    close_prices = df["Close"].squeeze()
-    df["log_return"] = np.log(close_prices / close_prices.shift(1))
+    if base_features is not None:
+        df["log_return"] = base_features["log_return"]
+    else:
+        close_prices = df["Close"].squeeze()
+        df["log_return"] = np.log(close_prices / close_prices.shift(1))
     df = df.dropna()
     
     if len(df) < 20:
@@ -69,7 +74,7 @@ def compute_conditional_volatility(price_df):
     cv = compute_cv_from_residuals(resid)
 
     df["cv"] = cv
-    df = add_technical_features(df)
+    df = add_technical_features(df, base_features)
 
     return df
 
@@ -0,0 +1,183 @@
+# whatif.py
+"""
+What-if scoring over hypothetical next-day returns.
+
+"What is the UP probability for the day after tomorrow if tomorrow closes
+-5% .. +5%?" Each hypothetical return r (and, for CV models, a CV level
+given as a multiple of the latest CV) is turned into the feature row the
+model would see once that day has closed:
+
+- return_lag1 <- r, return_lag2 <- latest observed log return
+- cv_lag1 <- scale * latest CV, cv_lag2 <- latest CV
+- rsi_14 / rsi_slope recomputed with the hypothetical close appended
+
+The whole grid is scored with one batched predict_proba call.
+
+Usage:
+    python whatif.py BTC --min -0.05 --max 0.05 --steps 11
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from technical_indicators import compute_rsi
+from tree_inference import get_flat_forest
+
+DEFAULT_MIN_RETURN = -0.05
+DEFAULT_MAX_RETURN = 0.05
+DEFAULT_STEPS = 21
+DEFAULT_CV_SCALES = (0.5, 1.0, 1.5, 2.0)
+MAX_GRID_ROWS = 10000
+
+RSI_PERIOD = 14
+
+
+def return_grid(min_return=DEFAULT_MIN_RETURN, max_return=DEFAULT_MAX_RETURN, steps=DEFAULT_STEPS):
+    """Evenly spaced simple returns, e.g. -0.05 .. 0.05"""
+    if steps < 2 or max_return <= min_return:
+        raise ValueError("Need steps >= 2 and max_return > min_return")
+    return np.linspace(min_return, max_return, steps)
+
+
+def hypothetical_rsi(close, returns, period=RSI_PERIOD):
+    """
+    RSI after appending close[-1] * (1 + r) for every r, without recomputing
+    the whole series (compute_rsi uses a simple rolling mean of gains/losses).
+
+    Returns:
+        Array of RSI values, one per return
+    """
+    close = np.asarray(close, dtype=float).ravel()[-period:]
+    if len(close) < period:
+        raise ValueError(f"Need at least {period} closes to compute RSI")
+
+    deltas = np.diff(close)  # period - 1 known deltas
+    new_delta = close[-1] * np.asarray(returns, dtype=float)
+
+    gain = deltas.clip(min=0).sum() + new_delta.clip(min=0)
+    loss = -deltas.clip(max=0).sum() - new_delta.clip(max=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = gain / loss
+        return 100 - 100 / (1 + rs)
+
+
+def whatif_rows(X, df, returns, cv_scales=DEFAULT_CV_SCALES):
+    """
+    Feature rows for every (cv_scale, return) combination.
+
+    Args:
+        X: Feature matrix from build_features / build_features_raw
+        df: DataFrame with Close and log_return (and cv for CV models) up to
+            the last row of X
+        returns: Hypothetical next-day simple returns
+        cv_scales: Hypothetical CV as a multiple of the latest CV (ignored
+            when X has no CV lags)
+
+    Returns:
+        Tuple of (rows DataFrame ordered cv_scale-major, cv_scales used, rsi per return)
+    """
+    returns = np.asarray(returns, dtype=float)
+    has_cv = "cv_lag1" in X.columns
+    cv_scales = np.asarray(cv_scales if has_cv else [1.0], dtype=float)
+
+    last = X.iloc[-1]
+    rsi = hypothetical_rsi(df["Close"], returns)
+    last_rsi = compute_rsi(df["Close"].iloc[-(RSI_PERIOD + 1):]).iloc[-1]
+
+    n_returns, n_scales = len(returns), len(cv_scales)
+    rows = pd.DataFrame({col: np.full(n_returns * n_scales, last[col], dtype=float) for col in X.columns})
+    rows["return_lag2"] = df["log_return"].iloc[-1]
+    rows["return_lag1"] = np.tile(np.log1p(returns), n_scales)
+    if "rsi_14" in rows.columns:
+        rows["rsi_14"] = np.tile(rsi, n_scales)
+    if "rsi_slope" in rows.columns:
+        rows["rsi_slope"] = np.tile(rsi - last_rsi, n_scales)
+    if has_cv:
+        rows["cv_lag2"] = df["cv"].iloc[-1]
+        rows["cv_lag1"] = np.repeat(cv_scales * df["cv"].iloc[-1], n_returns)
+
+    return rows, cv_scales, rsi
+
+
+def score_rows(model, rows):
+    """
+    UP probability of every row in one batched call.
+
+    Direct multi-horizon models are scored on their first output, the day
+    after the hypothetical one.
+    """
+    if hasattr(model, "feature_names_in_"):
+        # the model may have been trained on a tuned feature subset
+        rows = rows[list(model.feature_names_in_)]
+
+    flat = get_flat_forest(model)
+    if flat is not None:
+        proba, classes = flat.predict_proba(rows), flat.classes_[0]
+    else:
+        proba = model.predict_proba(rows)
+        classes = model.classes_ if not isinstance(proba, list) else model.estimators_[0].classes_
+
+    if isinstance(proba, list):
+        proba = proba[0]
+    return proba[:, list(classes).index(1)]
+
+
+def probability_surface(model, X, df, returns, cv_scales=DEFAULT_CV_SCALES):
+    """
+    Score the what-if grid for one model.
+
+    Returns:
+        dict with the grid axes, the probability surface (one list per CV
+        scale, one value per return) and the unperturbed latest probability
+    """
+    if len(returns) * max(len(cv_scales), 1) > MAX_GRID_ROWS:
+        raise ValueError(f"What-if grid is limited to {MAX_GRID_ROWS} rows")
+
+    rows, cv_scales, rsi = whatif_rows(X, df, returns, cv_scales)
+
+    start = time.perf_counter()
+    proba = score_rows(model, pd.concat([rows, X.iloc[-1:]], ignore_index=True))
+    score_ms = (time.perf_counter() - start) * 1e3
+
+    surface = proba[:-1].reshape(len(cv_scales), len(returns))
+    return {
+        "returns": [round(float(r), 6) for r in returns],
+        "cv_scales": [round(float(s), 4) for s in cv_scales],
+        "rsi": [round(float(v), 4) for v in rsi],
+        "probabilities": surface.round(4).tolist(),
+        "latest_probability": round(float(proba[-1]), 4),
+        "n_rows": int(len(rows)),
+        "score_ms": round(score_ms, 3)
+    }
+
+
+def main():
+    from fetch_coinlore import fetch_crypto_data
+    from feature_engineering import build_features_raw
+    from train_model import train_rf
+
+    parser = argparse.ArgumentParser(description="What-if UP probability over next-day returns")
+    parser.add_argument("symbol", help="Crypto symbol, e.g. BTC")
+    parser.add_argument("--min", type=float, default=DEFAULT_MIN_RETURN)
+    parser.add_argument("--max", type=float, default=DEFAULT_MAX_RETURN)
+    parser.add_argument("--steps", type=int, default=11)
+    args = parser.parse_args()
+
+    X, y, df = build_features_raw(fetch_crypto_data(args.symbol.upper()))
+    model = train_rf(X, y, return_only_model=True)
+    surface = probability_surface(model, X, df, return_grid(args.min, args.max, args.steps))
+
+    print("=" * 80)
+    print(f"WHAT-IF: {args.symbol.upper()} (latest UP probability {surface['latest_probability']:.4f})")
+    print("=" * 80)
+    print(f"\n{'Return':>8}{'RSI':>9}{'P(UP)':>9}")
+    for r, rsi, p in zip(surface["returns"], surface["rsi"], surface["probabilities"][0]):
+        print(f"{r:>8.2%}{rsi:>9.2f}{p:>9.4f}")
+    print(f"\n✓ {surface['n_rows']} rows scored in {surface['score_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()